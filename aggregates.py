@@ -0,0 +1,231 @@
+import sys
+
+import pandas as pd
+
+from features import NUMERIC_FEATURES, TARGET_COLUMN
+from observations import DATE_COLUMN, HISTORY_TABLE, STATION_COLUMN, load_history
+
+# =========================
+# AGGREGATE CACHE
+# =========================
+# Per stasiun dan periode disimpan jumlah baris (n) dan jumlah nilai (sum_<kolom>). Rata-rata = sum / n.
+# Tabel disimpan di artifact store sebagai agg_daily/agg_weekly/agg_monthly, bersama daftar part riwayat
+# (manifest "aggregates") yang sudah dijumlahkan. Part baru/berubah sejak refresh terakhir -> hanya bucket
+# (stasiun, periode) yang tersentuh rentang tanggal part itu yang dihitung ulang dari riwayat, jadi stasiun
+# baru maupun data susulan bertanggal lama ikut masuk.
+VALUE_COLUMNS = [TARGET_COLUMN] + NUMERIC_FEATURES
+GRANULARITIES = {"daily": "D", "weekly": "W", "monthly": "M"}
+INDEX_COLUMNS = [STATION_COLUMN, "period"]
+
+
+def table_name(granularity):
+    return f"agg_{granularity}"
+
+
+def _bucket(dates, granularity):
+    if granularity == "daily":
+        return dates.dt.normalize()
+    return dates.dt.to_period(GRANULARITIES[granularity]).dt.start_time
+
+
+def summarize(observations, granularity):
+    frame = observations[[STATION_COLUMN] + VALUE_COLUMNS].assign(
+        period=_bucket(observations[DATE_COLUMN], granularity), n=1)
+    grouped = frame.groupby(INDEX_COLUMNS)
+    sums = grouped[VALUE_COLUMNS].sum().add_prefix("sum_")
+    return pd.concat([grouped["n"].sum(), sums], axis=1)
+
+
+def _bucket_start(day, granularity):
+    return _bucket(pd.Series([pd.Timestamp(day)]), granularity).iloc[0]
+
+
+# Akhir bucket terakhir (inklusif) yang memuat `day`
+def _bucket_end(day, granularity):
+    day = pd.Timestamp(day)
+    if granularity == "daily":
+        return day.normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    return day.to_period(GRANULARITIES[granularity]).end_time
+
+
+# Sumber riwayat di manifest: part hasil ingest.py, atau tabel dataset lama (station None = semua stasiun)
+def history_sources(manifest):
+    parts = (manifest.get("history") or {}).get("parts")
+    if parts:
+        return {path: {key: part[key] for key in ("sha256", "station", "rows", "min_date", "max_date")}
+                for path, part in parts.items()}
+    table = manifest.get("tables", {}).get(HISTORY_TABLE)
+    if table is None:
+        return {}
+    return {HISTORY_TABLE: {"sha256": table["sha256"], "station": None, "rows": table["rows"],
+                            "min_date": None, "max_date": None}}
+
+
+class AggregateCache:
+    # parts: sumber riwayat yang sudah dijumlahkan (lihat history_sources); None = tidak diketahui
+    def __init__(self, tables=None, parts=None):
+        self.tables = tables or {}
+        self.parts = parts
+
+    @classmethod
+    def build(cls, observations, parts=None):
+        return cls({gran: summarize(observations, gran) for gran in GRANULARITIES}, parts)
+
+    @classmethod
+    def load(cls):
+        from artifact_store import load_table, read_manifest
+
+        parts = (read_manifest().get("aggregates") or {}).get("parts")
+        return cls({gran: load_table(table_name(gran)).set_index(INDEX_COLUMNS) for gran in GRANULARITIES}, parts)
+
+    def save(self):
+        from artifact_store import publish_table, update_manifest
+
+        for gran, table in self.tables.items():
+            publish_table(table_name(gran), table.reset_index())
+        # Dicatat setelah tabel: bila terputus di tengah, refresh berikutnya menghitung ulang bucket yang sama
+        with update_manifest() as manifest:
+            manifest["aggregates"] = {"parts": self.parts}
+
+    # Tanggal observasi terakhir per stasiun
+    def watermarks(self):
+        daily = self.tables.get("daily")
+        if daily is None or daily.empty:
+            return pd.Series(dtype="datetime64[ns]")
+        periods = daily.index.get_level_values("period")
+        return pd.Series(periods).groupby(daily.index.get_level_values(STATION_COLUMN)).max()
+
+    def has_station(self, station):
+        daily = self.tables.get("daily")
+        return daily is not None and station in daily.index.get_level_values(STATION_COLUMN)
+
+    # Semua bucket stasiun yang tersentuh [first, last] diganti hasil summarize atas riwayat lengkap
+    # bucket-bucket itu (termasuk part lain yang tanggalnya tumpang tindih)
+    def recompute(self, station, first, last):
+        spans = {gran: (_bucket_start(first, gran), _bucket_end(last, gran)) for gran in GRANULARITIES}
+        since = min(start for start, _ in spans.values()) - pd.Timedelta(1, "ns")
+        observations = load_history(since=since, until=max(end for _, end in spans.values()), stations=[station])
+        for gran, (start, end) in spans.items():
+            rows = observations[(observations[DATE_COLUMN] >= start) & (observations[DATE_COLUMN] <= end)]
+            existing = self.tables.get(gran)
+            if existing is not None:
+                periods = existing.index.get_level_values("period")
+                stale = (existing.index.get_level_values(STATION_COLUMN) == station) & (periods >= start) & (periods <= end)
+                existing = existing[~stale]
+            frames = [table for table in (existing, summarize(rows, gran) if len(rows) else None) if table is not None]
+            self.tables[gran] = pd.concat(frames).sort_index() if frames else summarize(rows, gran)
+
+    def means(self, granularity, station=None):
+        table = self.tables[granularity]
+        if station is not None:
+            table = table.xs(station, level=STATION_COLUMN, drop_level=False)
+        sums = table[[f"sum_{col}" for col in VALUE_COLUMNS]].to_numpy()
+        means = pd.DataFrame(sums / table["n"].to_numpy()[:, None], index=table.index, columns=VALUE_COLUMNS)
+        return means.assign(n=table["n"])
+
+    def latest(self, granularity, periods, station=None):
+        table = self.tables[granularity]
+        if station is not None:
+            table = table.xs(station, level=STATION_COLUMN, drop_level=False)
+        return AggregateCache({granularity: table.tail(periods)}).means(granularity)
+
+    # Rata-rata bergulir atas nilai harian; hanya membaca `periods + window - 1` hari terakhir
+    def rolling(self, column, window, periods, station=None):
+        daily = self.latest("daily", periods + window - 1, station)
+        series = daily[column].droplevel(STATION_COLUMN)
+        return series.rolling(f"{window}D", min_periods=1).mean().tail(periods)
+
+    def overall(self, station=None):
+        # Total dari tabel bulanan (jauh lebih kecil dari harian)
+        table = self.tables["monthly"]
+        if station is not None:
+            table = table.xs(station, level=STATION_COLUMN, drop_level=False)
+        totals = table.sum()
+        return {col: totals[f"sum_{col}"] / totals["n"] for col in VALUE_COLUMNS} | {"n": int(totals["n"])}
+
+
+# Muat cache dari store lalu hitung ulang bucket yang tersentuh part riwayat baru atau berubah. Dibangun
+# ulang penuh bila daftar part sebelumnya tidak diketahui, ada part yang hilang, atau sumbernya tabel
+# dataset lama (tanpa rentang tanggal per stasiun).
+# save=False untuk jalur baca (UI): hasil hanya di memori, store dan manifest tidak disentuh.
+def refresh(save=True):
+    from artifact_store import ArtifactError, read_manifest
+
+    try:
+        cache = AggregateCache.load()
+    except ArtifactError:
+        cache = AggregateCache()
+    sources = history_sources(read_manifest())
+    previous = cache.parts
+    changed = {key: source for key, source in sources.items() if previous is None or previous.get(key) != source}
+    removed = [key for key in previous or {} if key not in sources]
+    if not changed and not removed:
+        return cache, 0
+
+    if previous is None or removed or any(source["station"] is None for source in changed.values()):
+        observations = load_history()
+        cache, added = AggregateCache.build(observations, sources), len(observations)
+    else:
+        spans = {}
+        for key, source in changed.items():
+            # Part yang ditulis ulang: rentang lama juga dihitung ulang agar baris yang hilang ikut keluar
+            for part in (source, previous.get(key)):
+                if part and part["min_date"]:
+                    first, last = spans.get(part["station"], (part["min_date"], part["max_date"]))
+                    spans[part["station"]] = (min(first, part["min_date"]), max(last, part["max_date"]))
+        for station, (first, last) in spans.items():
+            cache.recompute(station, first, last)
+        cache.parts, added = sources, sum(source["rows"] for source in changed.values())
+    if save:
+        cache.save()
+    return cache, added
+
+
+# =========================
+# MODEL METRICS
+# =========================
+# Evaluasi pada split uji yang sama dengan notebook (70:30, random_state=42)
+def evaluate_on_test_split(model, observations, test_size=0.3, random_state=42):
+    from sklearn.model_selection import train_test_split
+
+    from features import FEATURE_COLUMNS
+    from train import evaluate
+
+    _, X_test, _, y_test = train_test_split(observations[FEATURE_COLUMNS], observations[TARGET_COLUMN],
+                                            test_size=test_size, random_state=random_state)
+    return evaluate(model, X_test, y_test)
+
+
+# Metrik disimpan di manifest per versi model, jadi model hanya dimuat & dievaluasi sekali per versi
+def model_metrics(model=None, station=None):
+    from artifact_store import ArtifactError, has_store, model_entry, set_model_metrics
+    from observations import DEFAULT_STATION
+    from predictor import get_model
+
+    if not has_store():
+        # Tanpa store: metrik yang ditulis train.py untuk pickle di model/
+        import json
+
+        from train import METRICS_PATH
+
+        with open(METRICS_PATH) as f:
+            report = json.load(f)
+        return report["splits"][report["selected_split"]]
+    try:
+        entry = model_entry(station)
+    except ArtifactError:
+        entry = {}
+    if entry.get("metrics") and (model is None or entry.get("version") == getattr(model, "version", None)):
+        return entry["metrics"]
+    model = model if model is not None else get_model(station)
+    metrics = evaluate_on_test_split(model, load_history(stations=[station or DEFAULT_STATION]))
+    if entry.get("version") == getattr(model, "version", None):
+        set_model_metrics(entry["version"], metrics)
+    return metrics
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["refresh"]:
+        sys.exit("Pemakaian: python aggregates.py refresh")
+    cache, added = refresh()
+    print(f"{added} observasi dari part baru dijumlahkan; observasi terakhir per stasiun:\n{cache.watermarks().to_string()}")
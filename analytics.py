@@ -0,0 +1,154 @@
+import pandas as pd
+
+from features import NUMERIC_FEATURES, TARGET_COLUMN
+from observations import DATE_COLUMN, DEFAULT_STATION, HISTORY_TABLE, RR_SENTINELS, STATION_COLUMN
+
+# =========================
+# ANALYTICS QUERIES
+# =========================
+# Kueri atas seluruh riwayat (part Parquet dari ingest.py) dengan pyarrow.dataset:
+# - file stasiun lain tidak dibuka (dipilih lewat manifest),
+# - filter tanggal/ddd_car didorong ke pembaca Parquet, row group di luar rentang dilewati,
+# - hanya kolom yang diminta yang didekode,
+# - statistik dihitung dengan pyarrow.compute / Table.group_by, bukan pandas atas frame penuh.
+# Bila riwayat belum di-ingest, tabel dataset lama dipakai dengan aturan pembersihan yang sama.
+PAGE_SIZE = 25
+STAT_COLUMNS = [TARGET_COLUMN] + NUMERIC_FEATURES
+TABLE_COLUMNS = [DATE_COLUMN, STATION_COLUMN] + STAT_COLUMNS + ["ddd_car"]
+# Label grup -> kolom kunci (bulan/tahun diturunkan dari Tanggal)
+GROUP_KEYS = {"Bulan": "bulan", "Tahun": "tahun", "Arah angin (ddd_car)": "ddd_car", "Stasiun": STATION_COLUMN}
+DESCRIBE_ROWS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class HistorySource:
+    def __init__(self, dataset, base_filter=None, station_column=True):
+        self.dataset = dataset
+        self.base_filter = base_filter
+        # Tabel dataset lama tidak punya kolom stasiun; semua barisnya milik stasiun default
+        self.station_column = station_column
+
+    @classmethod
+    def open(cls, stations=None):
+        import pyarrow.dataset as ds
+
+        from artifact_store import history_files, table_path
+
+        files = history_files(stations)
+        if files:
+            return cls(ds.dataset(files, format="parquet"))
+        if stations is not None and DEFAULT_STATION not in stations:
+            return None
+        dataset = ds.dataset(table_path(HISTORY_TABLE), format="parquet")
+        # Sama dengan observations.clean_observations: dropna lalu buang sentinel RR
+        valid = None
+        for name in dataset.schema.names:
+            condition = ds.field(name).is_valid()
+            valid = condition if valid is None else valid & condition
+        return cls(dataset, valid & ~ds.field("RR").isin(list(RR_SENTINELS)), station_column=False)
+
+    def expression(self, start=None, end=None, ddd_car=None):
+        import pyarrow.dataset as ds
+
+        expression = self.base_filter
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field(DATE_COLUMN) >= pd.Timestamp(start))
+        if end is not None:
+            # Inklusif sampai akhir hari `end`
+            conditions.append(ds.field(DATE_COLUMN) < pd.Timestamp(end) + pd.Timedelta(days=1))
+        if ddd_car:
+            # Nilai tersimpan dalam bentuk normalize_ddd_car ("C ", "SE")
+            conditions.append(ds.field("ddd_car").isin([code.strip().upper().ljust(2) for code in ddd_car]))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    # Baca hanya kolom `columns` dari baris yang lolos filter
+    def scan(self, columns, limit=None, **filters):
+        import pyarrow as pa
+
+        stored = [col for col in columns if col in self.dataset.schema.names]
+        scanner = self.dataset.scanner(columns=stored, filter=self.expression(**filters))
+        # head() berhenti membaca batch begitu `limit` baris terkumpul
+        table = scanner.head(limit) if limit is not None else scanner.to_table()
+        if STATION_COLUMN in columns and not self.station_column:
+            table = table.append_column(STATION_COLUMN, pa.array([DEFAULT_STATION] * table.num_rows, pa.string()))
+        return table.select(columns)
+
+    def count(self, **filters):
+        return self.dataset.count_rows(filter=self.expression(**filters))
+
+
+# `source`: HistorySource lain (mis. dataset sintetis di benchmark); default riwayat di artifact store
+def _open(stations, source=None):
+    if source is not None:
+        return source
+    source = HistorySource.open(stations)
+    if source is None:
+        raise LookupError(f"Tidak ada riwayat untuk stasiun {', '.join(stations)}")
+    return source
+
+
+def count_rows(stations=None, source=None, **filters):
+    return _open(stations, source).count(**filters)
+
+
+# Satu halaman tabel (urutan penyimpanan: per stasiun, lalu tanggal) dan jumlah total baris
+def query_page(page=0, page_size=PAGE_SIZE, stations=None, columns=TABLE_COLUMNS, source=None, **filters):
+    source = _open(stations, source)
+    total = source.count(**filters)
+    table = source.scan(columns, limit=(page + 1) * page_size, **filters)
+    return table.slice(page * page_size, page_size).to_pandas(), total
+
+
+# Seperti DataFrame.describe(), dihitung di pyarrow.compute dari kolom statistik saja
+def describe(stations=None, columns=STAT_COLUMNS, source=None, **filters):
+    import pyarrow.compute as pc
+
+    table = _open(stations, source).scan(columns, **filters)
+    stats = {}
+    for col in columns:
+        values = table[col]
+        min_max = pc.min_max(values)
+        quartiles = pc.quantile(values, q=[0.25, 0.5, 0.75], interpolation="linear").to_pylist()
+        stats[col] = [pc.count(values).as_py(), pc.mean(values).as_py(), pc.stddev(values, ddof=1).as_py(),
+                      min_max["min"].as_py(), *quartiles, min_max["max"].as_py()]
+    return pd.DataFrame(stats, index=DESCRIBE_ROWS, dtype="float64")
+
+
+# Statistik per grup (jumlah, rata-rata, simpangan baku, min, maks) untuk satu kolom nilai
+def grouped_stats(group_key, column=TARGET_COLUMN, stations=None, source=None, **filters):
+    import pyarrow.compute as pc
+
+    needs_date = group_key in ("bulan", "tahun")
+    table = _open(stations, source).scan([DATE_COLUMN if needs_date else group_key, column], **filters)
+    if needs_date:
+        # Kunci bilangan bulat (tahun*100 + bulan) jauh lebih murah daripada strftime per baris
+        years = pc.year(table[DATE_COLUMN])
+        keys = pc.add(pc.multiply(years, 100), pc.month(table[DATE_COLUMN])) if group_key == "bulan" else years
+        table = table.append_column(group_key, keys).drop_columns([DATE_COLUMN])
+    aggregations = [(column, "count"), (column, "mean"), (column, "stddev", pc.VarianceOptions(ddof=1)),
+                    (column, "min"), (column, "max")]
+    result = table.group_by(group_key).aggregate(aggregations).to_pandas()
+    result.columns = [col.removeprefix(f"{column}_") for col in result.columns]
+    result = result[[group_key, "count", "mean", "stddev", "min", "max"]].sort_values(group_key).reset_index(drop=True)
+    if group_key == "bulan":
+        result["bulan"] = [f"{key // 100}-{key % 100:02d}" for key in result["bulan"]]
+    elif group_key == "ddd_car":
+        result["ddd_car"] = result["ddd_car"].str.strip()
+    return result
+
+
+# Rentang tanggal dari manifest (tanpa membaca data) untuk batas filter tanggal
+def date_bounds(stations=None):
+    from artifact_store import read_manifest
+
+    history = read_manifest().get("history") or {}
+    parts = [part for part in history.get("parts", {}).values() if stations is None or part["station"] in stations]
+    if parts:
+        return (pd.Timestamp(min(part["min_date"] for part in parts)),
+                pd.Timestamp(max(part["max_date"] for part in parts)))
+    import pyarrow.compute as pc
+
+    dates = pc.min_max(_open(stations).scan([DATE_COLUMN])[DATE_COLUMN])
+    return pd.Timestamp(dates["min"].as_py()), pd.Timestamp(dates["max"].as_py())
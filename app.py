@@ -1,9 +1,7 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import time
-from jcopml.utils import load_model  # Pastikan library jcopml terinstal
+from predictor import get_model
+from warmup import start_warmup, wait_for_imports
+# pandas, plotly, dan model diimpor/dimuat di halaman yang membutuhkannya (lihat MAIN CONTENT)
 
 # =========================
 # PAGE CONFIG
@@ -15,13 +13,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# =========================
-# PATHS TO PICKLE FILES
-# =========================
-MODEL_PATH = "model/rfr_cuaca.pkl"
-DATA_SAMPLE_PATH = "dataset2.pkl"
-DESCRIPTIVE_STATS_PATH = "descriptive_stats.pkl"
-
 # =========================
 # ENHANCED CUSTOM CSS & MATERIAL ICONS LINK
 # =========================
@@ -155,28 +146,137 @@ st.markdown("""
 # =========================
 # UTILITY FUNCTIONS
 # =========================
-@st.cache_resource
-def load_ml_model(path):
+# Registry (model_registry.py) berbagi model antar sesi dan memuat ulang saat versi di store berganti,
+# jadi model diminta ulang setiap rerun (murah bila sudah dimuat) alih-alih di-cache per sesi
+def load_ml_model(station):
+    from artifact_store import ArtifactError
     try:
-        return load_model(path)
-    except FileNotFoundError:
-        st.error(f"File model '{path}' tidak ditemukan.")
+        return get_model(station)
+    except FileNotFoundError as e:
+        st.error(f"File model tidak ditemukan: {e}")
+        return None
+    except ArtifactError as e:
+        st.error(f"Artefak model tidak valid: {e}")
         return None
     except Exception as e:
         st.error(f"Kesalahan memuat model: {e}")
         return None
 
-@st.cache_data
-def load_pickle_data(path, description):
+# Kueri riwayat (analytics.py): hanya baris dan kolom yang diminta yang dibaca dari Parquet
+@st.cache_data(ttl=300)
+def run_history_query(query, stations, start=None, end=None, ddd_car=(), **options):
+    import analytics
+    from artifact_store import ArtifactError
     try:
-        return pd.read_pickle(path)
-    except FileNotFoundError:
-        st.warning(f"File '{description}' ('{path}') tidak ditemukan.")
+        return getattr(analytics, query)(stations=list(stations) or None, start=start, end=end, ddd_car=list(ddd_car), **options)
+    except (ArtifactError, LookupError) as e:
+        st.warning(f"Riwayat observasi tidak tersedia: {e}")
         return None
+
+@st.cache_data(ttl=300)
+def load_history_bounds(stations):
+    from analytics import date_bounds
+    try:
+        return date_bounds(list(stations) or None)
+    except Exception:
+        return None
+
+# Prediksi dicatat untuk pemantauan (monitoring.py); gagal menulis log tidak menggagalkan prediksi
+def record_predictions(frame, outputs, station, model, dates=None, source="app"):
+    from monitoring import log_predictions
+    try:
+        log_predictions(frame, outputs, station, getattr(model, "version", None), dates, source)
+    except OSError as e:
+        st.warning(f"Prediksi tidak tercatat untuk pemantauan: {e}")
+
+# Hanya bagian log yang baru yang dibaca; sketch drift & jendela akurasi disimpan di state monitoring
+@st.cache_data(ttl=60)
+def load_monitoring_summary(station):
+    from monitoring import refresh_monitor
+    try:
+        return refresh_monitor().summary(station)
     except Exception as e:
-        st.error(f"Kesalahan memuat '{description}': {e}")
+        st.warning(f"Data pemantauan tidak tersedia: {e}")
         return None
 
+# Antrean pekerjaan latar (jobs.py): tabel SQLite dan satu proses pekerja dipakai bersama oleh semua
+# proses server di host ini. Daftar pekerjaan di-poll di dalam fragment, jadi halaman tidak ikut dirender ulang.
+JOB_POLL_SECONDS = 2
+JOB_KIND_LABELS = {"score": "Prediksi batch", "train": "Latih ulang model", "update": "Pembaruan inkremental"}
+
+def read_job_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def render_job(job):
+    import os
+    import time
+    from functools import partial
+    from jobs import ACTIVE_STATUSES, STATUS_LABELS, cancel, job_dir
+    params, result = job["params"], job["result"] or {}
+    station = (params.get("station") or "stasiun default").replace("-", " ").title()
+    if job["kind"] == "score":
+        detail = params["filename"]
+    elif job["kind"] == "update":
+        detail = f"+{params['new_trees']} pohon, jendela {params['window_days']} hari"
+    else:
+        detail = f"{params['search']}, uji {params['test_size']:.0%}"
+    with st.container(border=True):
+        col_j1, col_j2 = st.columns([4, 1])
+        col_j1.markdown(f"**{JOB_KIND_LABELS[job['kind']]}** · {detail} · {station}")
+        col_j1.caption(f"#{job['id']} · dibuat {time.strftime('%d-%m-%Y %H:%M:%S', time.localtime(job['created']))}")
+        col_j2.markdown(f"**{STATUS_LABELS[job['status']]}**")
+        if job["status"] in ACTIVE_STATUSES:
+            st.progress(job["progress"], text=job["message"] or "")
+            if not job["cancel_requested"]:
+                col_j2.button("Batalkan", key=f"job_cancel_button_{job['id']}", on_click=cancel, args=(job["id"],))
+        elif job["status"] == "done" and job["kind"] == "score":
+            col_r1, col_r2, col_r3 = st.columns(3)
+            col_r1.metric("Baris diprediksi", f"{result['rows_scored']:,}")
+            col_r2.metric("Baris tidak valid", f"{result['rows_invalid']:,}")
+            col_r3.metric("Kecepatan", f"{result['rows_per_second']:,.0f} baris/detik")
+            if result.get("file"):
+                path = os.path.join(job_dir(job["id"]), result["file"])
+                st.download_button("Unduh Hasil Prediksi (CSV)", data=partial(read_job_file, path), file_name=f"prediksi_{params['filename'].rsplit('.', 1)[0]}.csv", mime="text/csv", key=f"job_download_button_{job['id']}")
+        elif job["status"] == "done" and result["version"] is None:
+            metrics = result["metrics"]
+            st.warning(f"Kandidat tidak diterbitkan: MAE holdout {metrics['mae']:.3f} °C, versi aktif {metrics['current_holdout']['mae']:.3f} °C.")
+        elif job["status"] == "done":
+            metrics = result["metrics"]
+            col_r1, col_r2, col_r3 = st.columns(3)
+            col_r1.metric("Versi terbit", result["version"])
+            if job["kind"] == "update":
+                current = metrics["current_holdout"]
+                col_r2.metric("R² holdout", f"{metrics['r2']:.4f}", delta=f"{metrics['r2'] - current['r2']:+.4f}")
+                col_r3.metric("MAE holdout", f"{metrics['mae']:.3f} °C", delta=f"{metrics['mae'] - current['mae']:+.3f} °C", delta_color="inverse")
+                st.caption(f"+{metrics['trees_added']} pohon baru, {metrics['trees_retired']} pohon tertua dipensiunkan dalam {metrics['update_seconds']:.2f} detik; holdout {metrics['holdout_start']} s.d. {metrics['holdout_end']}.")
+            else:
+                col_r2.metric("R² uji", f"{metrics['r2']:.4f}")
+                col_r3.metric("MAE uji", f"{metrics['mae']:.3f} °C")
+        elif job["status"] == "failed":
+            st.error(job["error"] or "Pekerjaan gagal.")
+        else:
+            st.caption(job["error"] or job["message"] or "")
+
+# polling: fragment di-rerun tiap JOB_POLL_SECONDS selama ada pekerjaan aktif; setelah semuanya
+# selesai, seluruh halaman dirender ulang sekali sehingga timer polling berhenti
+def render_job_list(kind, polling, limit):
+    from jobs import ACTIVE_STATUSES, ensure_worker, list_jobs
+    job_list = list_jobs(kind, limit)
+    if any(job["status"] == "queued" for job in job_list):
+        ensure_worker()  # pekerja berhenti sendiri saat menganggur; nyalakan lagi bila ada antrean
+    if polling and not any(job["status"] in ACTIVE_STATUSES for job in job_list):
+        st.rerun()
+    if not job_list:
+        st.info("Belum ada pekerjaan.")
+    for job in job_list:
+        render_job(job)
+
+def show_jobs(kind=None, limit=10):
+    from jobs import ACTIVE_STATUSES, list_jobs
+    polling = any(job["status"] in ACTIVE_STATUSES for job in list_jobs(kind, limit))
+    st.fragment(render_job_list, run_every=JOB_POLL_SECONDS if polling else None)(kind, polling, limit)
+
 def get_weather_recommendation(temp, humidity, rainfall, sunshine):
     recommendations = []
     if rainfall > 10:
@@ -198,28 +298,160 @@ def get_weather_recommendation(temp, humidity, rainfall, sunshine):
     return recommendations
 
 
-def create_weather_chart(temp_history_value):
-    dates = [(datetime.now() - timedelta(days=x)).strftime("%d %b") for x in range(6, -1, -1)]
-    base_temps = [temp_history_value - 3 + (i*0.5) + (x * (i%2 - 0.5)*2) for i, x in enumerate(range(7))]
+def create_weather_chart(daily_temps, forecast_temps=None, envelope=None):
+    import plotly.graph_objects as go
+    # Deret pendek: garis halus dengan marker; deret panjang (hasil downsampling): garis biasa
+    short = len(daily_temps) <= 31
+    base_temps = daily_temps.round(1).tolist()
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=dates, y=base_temps, mode='lines+markers', name='Suhu',
-                           line=dict(color='#2c99a3', width=3, shape='spline'),
+    if envelope is not None:
+        fig.add_trace(go.Scatter(x=list(envelope.index) + list(envelope.index[::-1]),
+                                 y=envelope["high"].round(1).tolist() + envelope["low"].round(1).tolist()[::-1],
+                                 fill='toself', fillcolor='rgba(44,153,163,0.15)', line=dict(width=0),
+                                 hoverinfo='skip', name='Min–maks'))
+    fig.add_trace(go.Scatter(x=daily_temps.index, y=base_temps, mode='lines+markers' if short else 'lines', name='Observasi',
+                           line=dict(color='#2c99a3', width=3 if short else 1.5, shape='spline' if short else 'linear'),
                            marker=dict(size=8, color='#2c99a3', symbol='circle')))
-    fig.update_layout(title_text="Tren Suhu (Data Simulasi)", title_x=0.5, yaxis_title="Suhu (°C)",
+    title = "Tren Suhu (Data Observasi)"
+    if forecast_temps is not None and len(forecast_temps):
+        # Garis prakiraan disambung dari titik observasi terakhir
+        forecast_dates = list(daily_temps.index[-1:]) + list(forecast_temps.index)
+        fig.add_trace(go.Scatter(x=forecast_dates, y=base_temps[-1:] + forecast_temps.round(1).tolist(),
+                                 mode='lines+markers', name='Prakiraan',
+                                 line=dict(color='#f39c12', width=3, shape='spline', dash='dash'),
+                                 marker=dict(size=7, color='#f39c12', symbol='diamond')))
+        title = "Tren Suhu (Observasi & Prakiraan)"
+    fig.update_layout(title_text=title, title_x=0.5, yaxis_title="Suhu (°C)",
                       plot_bgcolor='rgba(255,255,255,0.8)', paper_bgcolor='rgba(0,0,0,0)',
-                      font=dict(family="Inter", size=12, color="#333"), showlegend=False, height=350,
+                      font=dict(family="Inter", size=12, color="#333"), showlegend=len(fig.data) > 1, height=350,
+                      margin=dict(l=40, r=40, t=60, b=40), legend=dict(orientation="h", y=-0.15))
+    fig.update_xaxes(showgrid=False, tickformat="%d %b" if short else None)
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(44,153,163,0.1)')
+    return fig
+
+def create_sensitivity_chart(sweep, feature, current_value):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    if isinstance(current_value, str):
+        fig.add_trace(go.Bar(x=sweep[feature].str.strip(), y=sweep["Tavg"].round(2), marker_color='#2c99a3'))
+    else:
+        fig.add_trace(go.Scatter(x=sweep[feature], y=sweep["Tavg"], mode='lines', line=dict(color='#2c99a3', width=3)))
+        fig.add_vline(x=current_value, line=dict(color='#f39c12', dash='dash'), annotation_text="input")
+    fig.update_layout(title_text=f"Prediksi Tavg terhadap {feature}", title_x=0.5, xaxis_title=feature, yaxis_title="Suhu (°C)",
+                      plot_bgcolor='rgba(255,255,255,0.8)', paper_bgcolor='rgba(0,0,0,0)',
+                      font=dict(family="Inter", size=12, color="#333"), showlegend=False, height=380,
                       margin=dict(l=40, r=40, t=60, b=40))
-    fig.update_xaxes(showgrid=False)
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(44,153,163,0.1)')
     return fig
 
-# =========================
-# LOAD MODEL
-# =========================
-if 'model' not in st.session_state:
-    with st.spinner('Memuat model prediksi, mohon tunggu...'):
-        st.session_state.model = load_ml_model(MODEL_PATH)
-model = st.session_state.model
+def create_sensitivity_heatmap(x_values, y_values, predictions, x_feature, y_feature, current_values):
+    import plotly.graph_objects as go
+    x_axis = [str(v).strip() for v in x_values] if x_values.dtype == object else x_values
+    fig = go.Figure(go.Heatmap(x=x_axis, y=y_values, z=predictions.round(2), colorscale="Tealrose",
+                               colorbar=dict(title="°C")))
+    fig.add_trace(go.Scatter(x=[str(current_values[x_feature]).strip() if x_values.dtype == object else current_values[x_feature]],
+                             y=[current_values[y_feature]], mode='markers', name='input',
+                             marker=dict(size=12, color='white', symbol='x', line=dict(width=2, color='#333'))))
+    fig.update_layout(title_text=f"Prediksi Tavg: {x_feature} × {y_feature}", title_x=0.5, xaxis_title=x_feature, yaxis_title=y_feature,
+                      paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Inter", size=12, color="#333"), showlegend=False,
+                      height=450, margin=dict(l=40, r=40, t=60, b=40))
+    return fig
+
+# Permutation importance versi aktif, dihitung saat versi diterbitkan; halaman hanya membacanya dari manifest
+@st.cache_data(ttl=300)
+def load_feature_importance(model_version, station):
+    from sensitivity import feature_importance
+    try:
+        return feature_importance(model_version, station)
+    except Exception as e:
+        st.warning(f"Feature importance tidak tersedia: {e}")
+        return None
+
+# Cache agregat (artifact store) dimuat sekali per proses; observasi baru ditambahkan secara inkremental di
+# memori saja. Tabel di store hanya ditulis oleh ingest.py dan `python aggregates.py refresh`.
+@st.cache_resource(ttl=300)
+def load_aggregates():
+    from aggregates import refresh
+    return refresh(save=False)[0]
+
+@st.cache_data(ttl=300)
+def load_dashboard_stats(station):
+    try:
+        from forecasting import LOOKBACK
+        cache = load_aggregates()
+        if not cache.has_station(station):
+            st.info(f"Belum ada observasi teragregasi untuk stasiun {station}.")
+            return None
+        return {"monthly": cache.latest("monthly", 2, station), "lookback": cache.latest("daily", LOOKBACK, station)}
+    except Exception as e:
+        st.warning(f"Statistik dataset tidak tersedia: {e}")
+        return None
+
+# Deret Tavg harian lengkap satu stasiun; dibagi antar sesi (tidak disalin) karena hanya dibaca
+@st.cache_resource(ttl=300)
+def load_daily_history(station):
+    try:
+        cache = load_aggregates()
+        return cache.means("daily", station)["Tavg"].droplevel("station") if cache.has_station(station) else None
+    except Exception:
+        return None  # penyebabnya sudah ditampilkan oleh load_dashboard_stats
+
+# Figur dibangun dan diserialisasi ke JSON sekali per (stasiun, rentang, versi model, observasi terakhir);
+# string JSON itu yang dibagi antar sesi, bukan objek Figure (lihat charts.figure_from_json).
+# Deret panjang dipangkas di server ke lebar grafik (charts.py), jadi browser menerima paling banyak
+# CHART_WIDTH_PX titik berapa pun panjang riwayatnya; rentang yang lebih sempit (zoom) diambil ulang
+# dengan resolusi lebih halus.
+@st.cache_resource(max_entries=64, ttl=300)
+def load_trend_figure(station, start, end, model_version, last_observation, _forecast_temps):
+    from charts import chart_slice
+    window, line, envelope = chart_slice(load_daily_history(station), start, end)
+    spec = create_weather_chart(line, _forecast_temps if end == last_observation else None, envelope).to_json()
+    return spec, {"days": len(window), "points": len(line), "json_kb": len(spec) / 1024}
+
+@st.cache_resource
+def load_forecaster():
+    from forecasting import load_forecaster as load_forecast_model
+    try:
+        return load_forecast_model()
+    except Exception as e:
+        st.warning(f"Model prakiraan tidak tersedia: {e}")
+        return None
+
+# Prakiraan rekursif dari jendela LOOKBACK hari terakhir saja, bukan dari seluruh riwayat
+@st.cache_data(ttl=300)
+def load_temperature_forecast(lookback_daily, days):
+    from forecasting import ForecastState
+    forecaster = load_forecaster()
+    if forecaster is None:
+        return None
+    state = ForecastState.from_daily(lookback_daily.droplevel("station"))
+    return forecaster.forecast(state, days)["Tavg"]
+
+# Metrik uji disimpan di manifest per versi model
+@st.cache_data
+def load_model_metrics(model_version, station):
+    from aggregates import model_metrics
+    try:
+        return model_metrics(station=station)
+    except Exception as e:
+        st.warning(f"Metrik model tidak tersedia: {e}")
+        return None
+
+def current_model_version(station):
+    from artifact_store import ArtifactError, model_version
+    try:
+        return model_version(station)
+    except (ArtifactError, KeyError):
+        return None
+
+@st.cache_data(ttl=60)
+def load_station_options():
+    from model_registry import available_stations
+    try:
+        return available_stations()
+    except Exception:
+        from observations import DEFAULT_STATION
+        return [DEFAULT_STATION]
 
 # =========================
 # SIDEBAR
@@ -235,7 +467,7 @@ with st.sidebar:
         </div>""", unsafe_allow_html=True)
     
     # Opsi menu asli (tanpa nama ikon di tampilan)
-    menu_options = ["Dashboard", "Analytics", "Prediksi"] 
+    menu_options = ["Dashboard", "Analytics", "Prediksi", "Pekerjaan"] 
     
     # st.selectbox sekarang menggunakan menu_options langsung
     menu = st.selectbox(
@@ -244,14 +476,21 @@ with st.sidebar:
         index=0, 
         key="main_menu_selectbox"
     )
+
+    station_options = load_station_options()
+    selected_station = st.selectbox("Stasiun:", station_options, index=0, format_func=lambda station: station.replace("-", " ").title(), key="station_selectbox")
+
+    show_perf_panel = st.checkbox("Tampilkan panel performa", value=False, key="perf_panel_checkbox")
     
 
 # =========================
 # MAIN CONTENT
 # =========================
+wait_for_imports()
 
 # Dashboard Section
-if menu == "Dashboard": # Sekarang menu langsung berisi "Dashboard", "Analytics", atau "Prediksi"
+if menu == "Dashboard": # Sekarang menu langsung berisi "Dashboard", "Analytics", "Prediksi", atau "Pekerjaan"
+    import pandas as pd
     # ... (Sisa kode untuk Dashboard tetap sama) ...
     st.markdown("""
         <div class="fade-in-up" style="background: linear-gradient(135deg, #2c99a3 0%, #4db8c4 100%);
@@ -261,37 +500,92 @@ if menu == "Dashboard": # Sekarang menu langsung berisi "Dashboard", "Analytics"
             <p style="color: rgba(255,255,255,0.9); margin: 8px 0 0 0; font-size: 1.1em;">Ringkasan dan Analisis Sistem</p>
         </div>""", unsafe_allow_html=True)
     
+    dashboard_stats = load_dashboard_stats(selected_station)
+    model_test_metrics = load_model_metrics(current_model_version(selected_station), selected_station)
+
     st.subheader("Statistik Cepat (Dataset)")
     cols_metric = st.columns(4)
-    metrics_data = [
-        {"label": "Suhu Rata-rata", "value": "27.5°C", "delta": "0.2°C", "icon": "thermostat"},
-        {"label": "Kelembapan", "value": "85%", "delta": "-1%", "icon": "water_drop"},
-        {"label": "Curah Hujan", "value": "5.5mm", "delta": "0.5mm", "icon": "umbrella"},
-        {"label": "Penyinaran", "value": "5.2 jam", "delta": "-0.3 jam", "icon": "wb_sunny"}
-    ]
-    for i, metric_item in enumerate(metrics_data): 
-        with cols_metric[i]:
-            st.metric(label=f"{metric_item['label']}", value=metric_item["value"], delta=metric_item["delta"])
+    if dashboard_stats is not None:
+        monthly_stats = dashboard_stats["monthly"]
+        latest_month, previous_month = monthly_stats.iloc[-1], monthly_stats.iloc[0]
+        metrics_data = [
+            {"label": "Suhu Rata-rata", "column": "Tavg", "unit": "°C", "icon": "thermostat"},
+            {"label": "Kelembapan", "column": "RH_avg", "unit": "%", "icon": "water_drop"},
+            {"label": "Curah Hujan", "column": "RR", "unit": "mm", "icon": "umbrella"},
+            {"label": "Penyinaran", "column": "ss", "unit": " jam", "icon": "wb_sunny"}
+        ]
+        for i, metric_item in enumerate(metrics_data): 
+            with cols_metric[i]:
+                value, delta = latest_month[metric_item["column"]], latest_month[metric_item["column"]] - previous_month[metric_item["column"]]
+                st.metric(label=f"{metric_item['label']}", value=f"{value:.1f}{metric_item['unit']}", delta=f"{delta:+.1f}{metric_item['unit']}")
+        latest_period = monthly_stats.index.get_level_values("period")[-1]
+        st.caption(f"Rata-rata bulan {latest_period:%B %Y} ({int(latest_month['n'])} hari observasi), dibandingkan dengan bulan sebelumnya.")
     st.markdown("---")
     
     col_chart, col_accuracy = st.columns([2, 1])
     with col_chart:
         with st.container(border=True): 
-            st.markdown("<h3 style='color: #2c99a3; margin-bottom: 15px;'><span class='material-icons' style='vertical-align: middle; margin-right: 5px;'>trending_up</span>Tren Suhu 7 Hari Terakhir (Dataset)</h3>", unsafe_allow_html=True)
-            fig = create_weather_chart(27.5) 
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown("<h3 style='color: #2c99a3; margin-bottom: 15px;'><span class='material-icons' style='vertical-align: middle; margin-right: 5px;'>trending_up</span>Tren Suhu (Observasi & Prakiraan)</h3>", unsafe_allow_html=True)
+            daily_history = load_daily_history(selected_station)
+            if dashboard_stats is not None and daily_history is not None and len(daily_history):
+                from charts import HISTORY_RANGES, figure_from_json, range_bounds
+                range_key = st.radio("Rentang:", list(HISTORY_RANGES), horizontal=True, key="trend_range_radio", label_visibility="collapsed")
+                range_start, range_end = range_bounds(daily_history, range_key)
+                if (range_end - range_start).days > 31:
+                    # Zoom: rentang yang lebih sempit dibangun ulang dari data harian dengan resolusi lebih halus
+                    zoom = st.slider("Perbesar rentang tanggal:", min_value=range_start.date(), max_value=range_end.date(),
+                                     value=(range_start.date(), range_end.date()), format="DD MMM YYYY",
+                                     key=f"trend_zoom_slider_{selected_station}_{range_key}")
+                    range_start, range_end = pd.Timestamp(zoom[0]), pd.Timestamp(zoom[1])
+                forecast_temps = load_temperature_forecast(dashboard_stats["lookback"], 7)
+                trend_spec, chart_info = load_trend_figure(selected_station, range_start, range_end, current_model_version(selected_station),
+                                                           daily_history.index[-1], forecast_temps)
+                st.plotly_chart(figure_from_json(trend_spec), use_container_width=True)
+                caption = f"{chart_info['points']:,} titik ditampilkan dari {chart_info['days']:,} hari observasi ({chart_info['json_kb']:.0f} KB)."
+                if chart_info["points"] < chart_info["days"]:
+                    caption += " Garis diringkas dengan LTTB dan pita menunjukkan suhu min–maks tiap bucket; perbesar rentang untuk detail harian."
+                if forecast_temps is not None and range_end == daily_history.index[-1]:
+                    caption += f" Prakiraan {len(forecast_temps)} hari setelah observasi terakhir ({daily_history.index[-1]:%d %b %Y}), dari lag dan rata-rata bergulir suhu, kelembapan dan curah hujan."
+                st.caption(caption)
     with col_accuracy:
         with st.container(border=True): 
             st.markdown("<h3 style='color: #2c99a3; margin-bottom: 15px;'><span class='material-icons' style='vertical-align: middle; margin-right: 5px;'>verified</span>Kinerja Model</h3>", unsafe_allow_html=True)
-            accuracy_percentage = 74.00 
-            st.progress(int(accuracy_percentage), text=f"R² Score (Data Uji): {accuracy_percentage:.2f}%")
-            st.caption("Metrik evaluasi utama dari model Random Forest Regressor.")
-            st.markdown(f"""
-                <ul style='font-size: 0.9em; padding-left: 20px;'>
-                    <li>MAE (Mean Absolute Error): 0.35 °C</li>
-                    <li>RMSE (Root Mean Squared Error): 0.45 °C</li>
-                </ul>
-            """, unsafe_allow_html=True)
+            if model_test_metrics is not None:
+                accuracy_percentage = model_test_metrics["r2"] * 100
+                st.progress(min(max(int(accuracy_percentage), 0), 100), text=f"R² Score (Data Uji): {accuracy_percentage:.2f}%")
+                st.caption("Metrik evaluasi utama dari model Random Forest Regressor.")
+                st.markdown(f"""
+                    <ul style='font-size: 0.9em; padding-left: 20px;'>
+                        <li>MAE (Mean Absolute Error): {model_test_metrics["mae"]:.2f} °C</li>
+                        <li>RMSE (Root Mean Squared Error): {model_test_metrics["rmse"]:.2f} °C</li>
+                    </ul>
+                """, unsafe_allow_html=True)
+    st.markdown("---")
+
+    # Akurasi bergulir & drift input dari log prediksi yang digabung dengan Tavg aktual (monitoring.py)
+    with st.container(border=True):
+        st.markdown("<h3 style='color: #2c99a3; margin-bottom: 15px;'><span class='material-icons' style='vertical-align: middle; margin-right: 5px;'>monitor_heart</span>Pemantauan Model (Online)</h3>", unsafe_allow_html=True)
+        monitoring_summary = load_monitoring_summary(selected_station)
+        if monitoring_summary is None:
+            st.info("Belum ada prediksi yang tercatat untuk stasiun ini.")
+        else:
+            online_accuracy = monitoring_summary["accuracy"]
+            cols_online = st.columns(4)
+            if online_accuracy is not None:
+                cols_online[0].metric("MAE bergulir", f"{online_accuracy['mae']:.2f} °C")
+                cols_online[1].metric("RMSE bergulir", f"{online_accuracy['rmse']:.2f} °C")
+                cols_online[2].metric("R² bergulir", f"{online_accuracy['r2'] * 100:.1f}%" if online_accuracy["r2"] is not None else "-")
+                cols_online[3].metric("Pasangan prediksi–aktual", f"{online_accuracy['n']:,}")
+                st.caption(f"Dari {online_accuracy['n']:,} prediksi terakhir yang Tavg aktualnya sudah masuk (model {online_accuracy['model_version']}, bias {online_accuracy['bias']:+.2f} °C). "
+                           f"{monitoring_summary['pending']:,} prediksi masih menunggu observasi; {monitoring_summary['logged']:,} prediksi tercatat.")
+            else:
+                st.caption(f"{monitoring_summary['logged']:,} prediksi tercatat; {monitoring_summary['pending']:,} menunggu Tavg aktual untuk dinilai.")
+            if monitoring_summary["expired"]:
+                st.caption(f"{monitoring_summary['expired']:,} prediksi tidak pernah mendapat Tavg aktual dalam {monitoring_summary['pending_max_age_days']} hari setelah tanggalnya dan tidak dinilai.")
+            drift_table = pd.DataFrame(monitoring_summary["drift"]).rename(columns={"feature": "Fitur", "psi": "PSI", "ks": "KS", "n": "Jumlah input", "status": "Status"})
+            st.dataframe(drift_table.style.format({"PSI": "{:.3f}", "KS": "{:.3f}"}, na_rep="-"), use_container_width=True, hide_index=True)
+            st.caption(f"Drift input terhadap distribusi data latih (bin kuantil): PSI < 0.1 stabil, 0.1–0.25 waspada, > 0.25 drift. KS = selisih maksimum distribusi kumulatif. "
+                       f"Status baru dinilai setelah {monitoring_summary['drift_min_samples']:,} input.")
     st.markdown("---")
 
     with st.expander("Informasi Sistem Prediksi", expanded=False):
@@ -302,9 +596,9 @@ Sistem <strong>Prediksi Cuaca Sambas</strong> menggunakan algoritma <strong>Rand
         
         cols_fitur_dashboard = st.columns(2) 
         fitur_utama_data = [
-            {"title": "Model Akurat", "desc": "R² Score 74.00% (data uji)", "icon": "model_training"},
+            {"title": "Model Akurat", "desc": f"R² Score {model_test_metrics['r2'] * 100:.2f}% (data uji)" if model_test_metrics else "R² Score (data uji)", "icon": "model_training"},
             {"title": "Prediksi Cepat", "desc": "Hasil prediksi instan", "icon": "bolt"},
-            {"title": "Visualisasi Data", "desc": "Grafik tren suhu (simulasi)", "icon": "monitoring"},
+            {"title": "Visualisasi Data", "desc": "Grafik tren suhu (data observasi)", "icon": "monitoring"},
             {"title": "Panduan Input", "desc": "Penjelasan parameter prediksi", "icon": "help_outline"}
         ]
         for i, fitur_item_dashboard in enumerate(fitur_utama_data): 
@@ -350,26 +644,74 @@ elif menu == "Analytics":
                             <p><strong>T_avg:</strong> Suhu udara rata-rata harian (°C)</p></div>""", unsafe_allow_html=True)
     st.markdown("---")
     
-    col_data_sample_main, col_desc_stats_main = st.columns(2) 
-    with col_data_sample_main:
-        with st.container(border=True): 
-            st.markdown("#### Sampel Data (5 Baris Pertama)")
-            data_sample = load_pickle_data(DATA_SAMPLE_PATH, "sampel data")
-            if data_sample is not None:
-                st.dataframe(data_sample.head(), use_container_width=True, hide_index=True)
+    # Filter stasiun/tanggal/ddd_car diterapkan di pembaca Parquet; tabel dibaca per halaman
+    import math
+    from analytics import GROUP_KEYS, PAGE_SIZE, STAT_COLUMNS
+    from features import DDD_CAR_OPTIONS
+    with st.container(border=True):
+        st.markdown("#### Eksplorasi Riwayat Observasi")
+        col_station_filter, col_date_filter, col_ddd_filter = st.columns(3)
+        with col_station_filter:
+            history_stations = tuple(st.multiselect("Stasiun:", station_options, default=[selected_station], format_func=lambda station: station.replace("-", " ").title(), key="analytics_station_multiselect"))
+        history_bounds = load_history_bounds(history_stations)
+        with col_date_filter:
+            if history_bounds is not None:
+                date_range = st.date_input("Rentang tanggal:", value=(history_bounds[0].date(), history_bounds[1].date()),
+                                           min_value=history_bounds[0].date(), max_value=history_bounds[1].date(), key="analytics_date_input")
             else:
-                st.info(f"File sampel data ('{DATA_SAMPLE_PATH}') tidak tersedia.")
+                date_range = ()
+        with col_ddd_filter:
+            ddd_filter = tuple(st.multiselect("Arah angin (ddd_car):", DDD_CAR_OPTIONS, key="analytics_ddd_multiselect"))
+        # Saat memilih rentang, date_input sempat mengembalikan tanggal awal saja
+        history_filters = {"start": date_range[0] if len(date_range) else None,
+                           "end": date_range[1] if len(date_range) == 2 else None, "ddd_car": ddd_filter}
+
+        total_rows = run_history_query("count_rows", history_stations, **history_filters)
+        if total_rows is not None:
+            n_pages = max(math.ceil(total_rows / PAGE_SIZE), 1)
+            col_page, col_page_info = st.columns([1, 3])
+            with col_page:
+                page_number = min(int(st.number_input("Halaman:", min_value=1, step=1, key="analytics_page_input")), n_pages)
+            with col_page_info:
+                st.caption(f"{total_rows:,} observasi cocok dengan filter · halaman {page_number} dari {n_pages} ({PAGE_SIZE} baris per halaman)")
+            page_result = run_history_query("query_page", history_stations, page=page_number - 1, **history_filters)
+            if page_result is not None:
+                page_frame = page_result[0]
+                page_frame["Tanggal"] = page_frame["Tanggal"].dt.date
+                page_frame["ddd_car"] = page_frame["ddd_car"].str.strip()
+                st.dataframe(page_frame, use_container_width=True, hide_index=True)
+
+    col_desc_stats_main, col_grouped_stats_main = st.columns(2)
     with col_desc_stats_main:
-        with st.container(border=True): 
+        with st.container(border=True):
             st.markdown("#### Statistik Deskriptif Fitur Numerik")
-            descriptive_stats = load_pickle_data(DESCRIPTIVE_STATS_PATH, "statistik deskriptif")
+            descriptive_stats = run_history_query("describe", history_stations, **history_filters)
             if descriptive_stats is not None:
                 st.dataframe(descriptive_stats.style.format("{:.2f}"), use_container_width=True)
-            else:
-                st.info(f"File statistik ('{DESCRIPTIVE_STATS_PATH}') tidak tersedia.")
+                st.caption("Dihitung dari seluruh observasi yang cocok dengan filter.")
+    with col_grouped_stats_main:
+        with st.container(border=True):
+            st.markdown("#### Statistik per Kelompok")
+            col_group_key, col_group_value = st.columns(2)
+            with col_group_key:
+                group_label = st.selectbox("Kelompokkan per:", list(GROUP_KEYS), key="analytics_group_selectbox")
+            with col_group_value:
+                group_column = st.selectbox("Kolom:", STAT_COLUMNS, key="analytics_group_column_selectbox")
+            grouped = run_history_query("grouped_stats", history_stations, group_key=GROUP_KEYS[group_label], column=group_column, **history_filters)
+            if grouped is not None:
+                st.dataframe(grouped.style.format({"mean": "{:.2f}", "stddev": "{:.2f}", "min": "{:.2f}", "max": "{:.2f}"}),
+                             use_container_width=True, hide_index=True)
 
 # Prediction Section
 elif menu == "Prediksi": 
+    import tempfile
+    import pandas as pd
+    from batch import CHUNK_ROWS, INTERVAL_COLUMNS, PREDICTION_COLUMN, score_file
+    from features import FEATURE_COLUMNS, NUMERIC_FEATURES, build_input_frame
+    from prediction_cache import get_prediction_cache
+    from predictor import INTERVAL_QUANTILES, predict_staged
+    from timing import StageTimer
+
     # ... (Sisa kode untuk Prediksi tetap sama, termasuk Panduan Parameter yang sudah diubah jadi 2 kolom) ...
     st.markdown("""
         <div class="fade-in-up" style="background: linear-gradient(135deg, #2c99a3 0%, #4db8c4 100%); padding: 25px; 
@@ -413,8 +755,58 @@ elif menu == "Prediksi":
                         <li>Model dilatih untuk kondisi cuaca Kabupaten Sambas.</li></ul></div>""", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+    with st.spinner('Memuat model prediksi, mohon tunggu...'):
+        model = load_ml_model(selected_station)
+
+    mode_prediksi = st.radio("Mode prediksi:", ["Input Manual", "Batch (Unggah File)"], horizontal=True, key="mode_prediksi_radio")
+
     if model is None:
         st.error("Model prediksi tidak dapat dimuat. Mohon periksa konfigurasi.")
+    elif mode_prediksi == "Batch (Unggah File)":
+        with st.container(border=True):
+            st.markdown("<h3 style='color: #2c99a3; margin-bottom: 10px;'>Prediksi Batch dari File</h3>", unsafe_allow_html=True)
+            st.caption(f"Unggah CSV/XLSX dengan kolom: {', '.join(FEATURE_COLUMNS)}. Kolom lain (mis. Tanggal) ikut disalin ke hasil, ditambah {PREDICTION_COLUMN} dan ketidakpastiannya ({', '.join(INTERVAL_COLUMNS)}).")
+            uploaded_file = st.file_uploader("File observasi", type=["csv", "xlsx"], key="batch_file_uploader")
+            run_in_background = st.checkbox("Proses di latar belakang (hasil tersimpan dan bisa diunduh nanti dari menu Pekerjaan)", value=False, key="batch_background_checkbox")
+            run_batch = st.button("Proses File", disabled=uploaded_file is None, key="batch_run_button")
+
+        if run_in_background:
+            if run_batch and uploaded_file is not None:
+                from jobs import submit_score
+                try:
+                    job_id = submit_score(uploaded_file.getvalue(), uploaded_file.name, selected_station)
+                    st.success(f"File masuk antrean sebagai pekerjaan #{job_id}.")
+                except Exception as e:
+                    st.error(f"Gagal menambahkan pekerjaan ke antrean: {e}")
+            show_jobs("score", limit=5)
+        elif run_batch and uploaded_file is not None:
+            progress_bar = st.progress(0, text="Memproses file...")
+            total_bytes = max(uploaded_file.size, 1)
+
+            def update_progress(report):
+                fraction = min(uploaded_file.tell() / total_bytes, 1.0) if not uploaded_file.name.lower().endswith(".xlsx") else 0
+                progress_bar.progress(fraction, text=f"{report.rows_total:,} baris diproses...")
+
+            try:
+                # Hasil ditulis per chunk ke file sementara agar memori tidak ikut membengkak
+                with tempfile.TemporaryFile(mode="w+", newline="") as out:
+                    log_chunk = lambda valid, outputs: record_predictions(valid, outputs, selected_station, model, valid["Tanggal"] if "Tanggal" in valid.columns else None, "batch")
+                    report = score_file(model, uploaded_file, uploaded_file.name, out, chunk_rows=CHUNK_ROWS, on_progress=update_progress, on_chunk=log_chunk)
+                    progress_bar.progress(1.0, text="Selesai.")
+                    out.seek(0)
+                    col_b1, col_b2, col_b3 = st.columns(3)
+                    col_b1.metric("Baris diprediksi", f"{report.rows_scored:,}")
+                    col_b2.metric("Baris tidak valid", f"{report.rows_invalid:,}")
+                    col_b3.metric("Kecepatan", f"{report.rows_per_second:,.0f} baris/detik")
+                    if report.errors:
+                        with st.expander(f"Contoh baris tidak valid ({len(report.errors)})"):
+                            st.dataframe(pd.DataFrame(report.errors, columns=["Baris", "Keterangan"]), hide_index=True, use_container_width=True)
+                    if report.rows_scored:
+                        st.download_button("Unduh Hasil Prediksi (CSV)", data=out.read(), file_name=f"prediksi_{uploaded_file.name.rsplit('.', 1)[0]}.csv", mime="text/csv", key="batch_download_button")
+            except ValueError as e:
+                st.error(f"File tidak valid: {e}")
+            except Exception as e:
+                st.error(f"Terjadi kesalahan saat prediksi batch: {e}")
     else:
         with st.container(border=True): 
             st.markdown("<h3 style='color: #2c99a3; margin-bottom: 20px;'>Masukkan Parameter Cuaca</h3>", unsafe_allow_html=True)
@@ -431,7 +823,11 @@ elif menu == "Prediksi":
                     ddd_x_input = st.number_input("Arah angin maks (°)", min_value=0, max_value=360, value=210, help="Arah angin saat kec. maks. (0-360°)", key="ddd_x_input")
                 
                 ddd_car_options = ['C', 'S', 'SE', 'E', 'NW', 'NE'] 
-                ddd_car_input = st.selectbox("Arah angin dominan (ddd_car)", options=ddd_car_options, index=0, help="Arah angin yang paling sering terjadi", key="ddd_car_input")
+                col_ddd_car_pred, col_date_pred = st.columns([2, 1])
+                with col_ddd_car_pred:
+                    ddd_car_input = st.selectbox("Arah angin dominan (ddd_car)", options=ddd_car_options, index=0, help="Arah angin yang paling sering terjadi", key="ddd_car_input")
+                with col_date_pred:
+                    prediction_date_input = st.date_input("Tanggal", value=pd.Timestamp.today().date(), help="Hari yang diprediksi; dibandingkan dengan Tavg aktual setelah observasinya masuk", key="prediction_date_input")
                 
                 _, col_button_pred, _ = st.columns([1.2, 1, 1.2]) 
                 with col_button_pred:
@@ -439,63 +835,178 @@ elif menu == "Prediksi":
             
         if submit_button:
             with st.spinner('Memproses prediksi...'):
-                time.sleep(0.5)
-                input_data = pd.DataFrame({
-                    'RH_avg': [RH_avg_input], 'RR': [RR_input], 'ss': [ss_input],
-                    'ff_x': [ff_x_input], 'ddd_x': [ddd_x_input], 'ff_avg': [ff_avg_input],
-                    'ddd_car': [ddd_car_input]
-                })
+                timer = StageTimer("prediksi")
+                with timer.stage("build_frame"):
+                    input_data = build_input_frame({
+                        'RH_avg': RH_avg_input, 'RR': RR_input, 'ss': ss_input,
+                        'ff_x': ff_x_input, 'ddd_x': ddd_x_input, 'ff_avg': ff_avg_input,
+                        'ddd_car': ddd_car_input
+                    })
                 try:
-                    predicted_t_avg = model.predict(input_data)[0]
+                    # Cache dipakai bersama semua sesi; forest hanya dijalankan bila kombinasi input belum pernah diprediksi
+                    prediction_cache = get_prediction_cache()
+                    prediction_summary = prediction_cache.predict(model, input_data, predict=lambda frame: predict_staged(model, frame, timer))
+                    cache_hit = "inference" not in timer.stages
+                    with timer.stage("log"):
+                        record_predictions(input_data, prediction_summary, selected_station, model, [prediction_date_input])
+                    predicted_t_avg, predicted_std, interval_low, interval_high = prediction_summary[0]
                     predicted_t_avg = round(max(predicted_t_avg, 0), 1)
+                    interval_low, interval_high = round(max(interval_low, 0), 1), round(max(interval_high, 0), 1)
+                    interval_level = round((INTERVAL_QUANTILES[1] - INTERVAL_QUANTILES[0]) * 100)
                     
-                    weather_material_icon = "help_outline" 
-                    if RR_input > 5 or (RH_avg_input > 85 and ss_input < 3):
-                        weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>umbrella</span>", "Berpotensi Hujan", "#4a90e2", "#e8f4f8"
-                    elif (predicted_t_avg <= 23):
-                        weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>filter_drama</span>", "Sejuk / Berawan", "#7f8c8d", "#f0f4f8"
-                    elif (RR_input == 0 and 60 <= RH_avg_input <= 85 and 3 <= ss_input <= 7) or (24 <= predicted_t_avg <= 28):
-                        weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>cloud</span>", "Berawan", "#f39c12", "#fff8e1"
-                    else:
-                        weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>wb_sunny</span>", "Cerah", "#f1c40f", "#fffbe1"
+                    with timer.stage("render"):
+                        weather_material_icon = "help_outline" 
+                        if RR_input > 5 or (RH_avg_input > 85 and ss_input < 3):
+                            weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>umbrella</span>", "Berpotensi Hujan", "#4a90e2", "#e8f4f8"
+                        elif (predicted_t_avg <= 23):
+                            weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>filter_drama</span>", "Sejuk / Berawan", "#7f8c8d", "#f0f4f8"
+                        elif (RR_input == 0 and 60 <= RH_avg_input <= 85 and 3 <= ss_input <= 7) or (24 <= predicted_t_avg <= 28):
+                            weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>cloud</span>", "Berawan", "#f39c12", "#fff8e1"
+                        else:
+                            weather_icon_html, weather_text, weather_color, weather_bg = "<span class='material-icons weather-icon'>wb_sunny</span>", "Cerah", "#f1c40f", "#fffbe1"
                     
-                    st.markdown("<h3 style='text-align:center; margin-top:25px; margin-bottom:-10px;'>Hasil Prediksi Cuaca</h3>", unsafe_allow_html=True)
-                    st.markdown(f"""
-                        <div class="modern-card" style="background: {weather_bg}; border: 1px solid {weather_color}33; text-align: center; padding: 25px;">
-                            {weather_icon_html}
-                            <h2 style="color: {weather_color}; margin: 15px 0 8px 0; font-size: 2.2em;">{predicted_t_avg}°C</h2>
-                            <h3 style="color: #333; margin: 0 0 20px 0; font-weight:500;">{weather_text}</h3>
-                            <div style="background: rgba(255,255,255,0.8); padding: 15px; border-radius: 12px; margin-top: 15px; font-size: 0.9em; color: #555;">
-                                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 10px;">
-                                    <div><strong>Kelembapan:</strong> {RH_avg_input}%</div>
-                                    <div><strong>Hujan:</strong> {RR_input} mm</div>
-                                    <div><strong>Penyinaran:</strong> {ss_input} jam</div>
-                                    <div><strong>Angin Rata-rata:</strong> {ff_avg_input} m/s</div>
-                                </div></div></div>""", unsafe_allow_html=True)
+                        st.markdown("<h3 style='text-align:center; margin-top:25px; margin-bottom:-10px;'>Hasil Prediksi Cuaca</h3>", unsafe_allow_html=True)
+                        st.markdown(f"""
+                            <div class="modern-card" style="background: {weather_bg}; border: 1px solid {weather_color}33; text-align: center; padding: 25px;">
+                                {weather_icon_html}
+                                <h2 style="color: {weather_color}; margin: 15px 0 8px 0; font-size: 2.2em;">{predicted_t_avg}°C</h2>
+                                <p style="color: #555; margin: 0 0 10px 0; font-size: 0.95em;">Interval {interval_level}%: <strong>{interval_low}–{interval_high}°C</strong> &nbsp;·&nbsp; sebaran antar pohon ±{predicted_std:.2f}°C</p>
+                                <h3 style="color: #333; margin: 0 0 20px 0; font-weight:500;">{weather_text}</h3>
+                                <div style="background: rgba(255,255,255,0.8); padding: 15px; border-radius: 12px; margin-top: 15px; font-size: 0.9em; color: #555;">
+                                    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 10px;">
+                                        <div><strong>Kelembapan:</strong> {RH_avg_input}%</div>
+                                        <div><strong>Hujan:</strong> {RR_input} mm</div>
+                                        <div><strong>Penyinaran:</strong> {ss_input} jam</div>
+                                        <div><strong>Angin Rata-rata:</strong> {ff_avg_input} m/s</div>
+                                    </div></div></div>""", unsafe_allow_html=True)
                     
-                    with st.container(border=True): 
-                        col_fi, col_eval = st.columns(2)
-                        with col_fi:
-                            st.markdown("<h4 style='color: #2c99a3; margin-bottom: 10px;'><span class='material-icons' style='vertical-align: bottom; font-size: 1.1em; margin-right: 5px;'>star_rate</span>Feature Importance</h4>", unsafe_allow_html=True)
-                            feature_importance_data = {
-                                'Fitur': ['RH_avg', 'RR', 'ddd_x', 'ss', 'ff_x', 'ff_avg', 'ddd_car (C)'],
-                                'Importance': [0.8123, 0.0763, 0.0453, 0.0346, 0.0199, 0.0099, 0.0015]
-                            }
-                            df_imp_display = pd.DataFrame(feature_importance_data)
-                            st.dataframe(df_imp_display.style.format({'Importance': "{:.4f}"}), hide_index=True, use_container_width=True)
-                            st.caption("<small>Berdasarkan <i>mean loss decrease</i> pada data latih.</small>", unsafe_allow_html=True)
-                        with col_eval:
-                            st.markdown("<h4 style='color: #2c99a3; margin-bottom: 10px;'><span class='material-icons' style='vertical-align: bottom; font-size: 1.1em; margin-right: 5px;'>assessment</span>Kinerja Model (Uji)</h4>", unsafe_allow_html=True)
-                            st.markdown(f"""
-                                <ul style='font-size: 0.9em; padding-left: 20px;'>
-                                    <li><strong>R² Score:</strong> 0.7400 (74.00%)</li>
-                                    <li><strong>MAE:</strong> 0.3525 °C</li>
-                                    <li><strong>RMSE:</strong> 0.4468 °C</li>
-                                </ul>
-                            """, unsafe_allow_html=True)
-                            st.caption("<small>Metrik evaluasi model pada data uji.</small>", unsafe_allow_html=True)
+                        with st.container(border=True): 
+                            col_fi, col_eval = st.columns(2)
+                            with col_fi:
+                                st.markdown("<h4 style='color: #2c99a3; margin-bottom: 10px;'><span class='material-icons' style='vertical-align: bottom; font-size: 1.1em; margin-right: 5px;'>star_rate</span>Feature Importance</h4>", unsafe_allow_html=True)
+                                importance = load_feature_importance(getattr(model, "version", None), selected_station)
+                                if importance is None:
+                                    st.info("Feature importance belum dihitung untuk versi model ini (python sensitivity.py importance).")
+                                else:
+                                    df_imp_display = importance[["feature", "share"]].rename(columns={"feature": "Fitur", "share": "Importance"})
+                                    st.dataframe(df_imp_display.style.format({'Importance': "{:.4f}"}), hide_index=True, use_container_width=True)
+                                    st.caption("<small>Berdasarkan <i>permutation importance</i> (kenaikan MSE bila fitur diacak) pada data observasi.</small>", unsafe_allow_html=True)
+                            with col_eval:
+                                st.markdown("<h4 style='color: #2c99a3; margin-bottom: 10px;'><span class='material-icons' style='vertical-align: bottom; font-size: 1.1em; margin-right: 5px;'>assessment</span>Kinerja Model (Uji)</h4>", unsafe_allow_html=True)
+                                model_test_metrics = load_model_metrics(getattr(model, "version", None), selected_station)
+                                if model_test_metrics is not None:
+                                    st.markdown(f"""
+                                        <ul style='font-size: 0.9em; padding-left: 20px;'>
+                                            <li><strong>R² Score:</strong> {model_test_metrics["r2"]:.4f} ({model_test_metrics["r2"] * 100:.2f}%)</li>
+                                            <li><strong>MAE:</strong> {model_test_metrics["mae"]:.4f} °C</li>
+                                            <li><strong>RMSE:</strong> {model_test_metrics["rmse"]:.4f} °C</li>
+                                        </ul>
+                                    """, unsafe_allow_html=True)
+                                st.caption("<small>Metrik evaluasi model pada data uji.</small>", unsafe_allow_html=True)
+
+                    timer.log(prediction=predicted_t_avg, interval=[interval_low, interval_high], cache_hit=cache_hit)
+                    if show_perf_panel:
+                        with st.expander("Panel Performa", expanded=True):
+                            perf_cols = st.columns(len(timer.stages) + 1)
+                            for perf_col, (stage_name, stage_seconds) in zip(perf_cols, timer.stages.items()):
+                                perf_col.metric(stage_name, f"{stage_seconds * 1000:.2f} ms")
+                            perf_cols[-1].metric("total", f"{timer.total * 1000:.2f} ms")
+                            cache_stats = prediction_cache.stats()
+                            hit_rate = f"{cache_stats['hit_rate'] * 100:.1f}%" if cache_stats['hit_rate'] is not None else "-"
+                            st.caption(f"Cache prediksi: {'hit' if cache_hit else 'miss'} | hit rate {hit_rate} "
+                                       f"({cache_stats['hits']:,} hit / {cache_stats['misses']:,} miss) | "
+                                       f"{cache_stats['entries']:,}/{cache_stats['max_entries']:,} entri, "
+                                       f"~{cache_stats['memory_bytes'] / 1024:.1f} KiB, {cache_stats['evictions']:,} eviksi")
                 except Exception as e:
                     st.error(f"Terjadi kesalahan saat prediksi: {e}")
+
+        # Eksplorasi what-if memakai nilai form terakhir; grid dievaluasi dalam satu panggilan predict
+        with st.container(border=True):
+            from sensitivity import GRID_POINTS, sweep_1d, sweep_2d
+            st.markdown("<h3 style='color: #2c99a3; margin-bottom: 10px;'><span class='material-icons' style='vertical-align: middle; margin-right: 5px;'>tune</span>Eksplorasi What-if</h3>", unsafe_allow_html=True)
+            st.caption("Satu atau dua fitur disapu sepanjang rentang inputnya, fitur lain tetap sesuai nilai form.")
+            col_sweep_x, col_sweep_y, col_sweep_n = st.columns(3)
+            sweep_x = col_sweep_x.selectbox("Fitur sumbu X", FEATURE_COLUMNS, index=0, key="sweep_x_select")
+            sweep_y = col_sweep_y.selectbox("Fitur sumbu Y (opsional)", ["-"] + [col for col in NUMERIC_FEATURES if col != sweep_x], index=0, key="sweep_y_select")
+            sweep_points = col_sweep_n.slider("Titik per sumbu", min_value=20, max_value=200, value=GRID_POINTS, step=10, key="sweep_points_slider")
+            current_values = {'RH_avg': RH_avg_input, 'RR': RR_input, 'ss': ss_input, 'ff_x': ff_x_input,
+                              'ddd_x': ddd_x_input, 'ff_avg': ff_avg_input, 'ddd_car': ddd_car_input}
+            sweep_timer = StageTimer("sensitivitas")
+            try:
+                if sweep_y == "-":
+                    with sweep_timer.stage("sweep"):
+                        sweep = sweep_1d(model, current_values, sweep_x, sweep_points)
+                    n_points = len(sweep)
+                    sweep_fig = create_sensitivity_chart(sweep, sweep_x, current_values[sweep_x])
+                else:
+                    with sweep_timer.stage("sweep"):
+                        x_values, y_values, sweep_grid = sweep_2d(model, current_values, sweep_x, sweep_y, sweep_points)
+                    n_points = sweep_grid.size
+                    sweep_fig = create_sensitivity_heatmap(x_values, y_values, sweep_grid, sweep_x, sweep_y, current_values)
+                st.plotly_chart(sweep_fig, use_container_width=True)
+                sweep_timer.log(points=n_points, x=sweep_x, y=sweep_y)
+                st.caption(f"{n_points:,} titik diprediksi dalam {sweep_timer.total * 1000:.1f} ms (satu panggilan predict).")
+            except Exception as e:
+                st.error(f"Terjadi kesalahan saat eksplorasi: {e}")
+# Background Jobs Section
+elif menu == "Pekerjaan":
+    from train import SEARCHES
+    st.markdown("""
+        <div class="fade-in-up" style="background: linear-gradient(135deg, #2c99a3 0%, #4db8c4 100%); padding: 25px; 
+                         border-radius: 16px; text-align: center; box-shadow: 0 8px 32px rgba(44, 153, 163, 0.3); 
+                         margin-bottom: 30px;">
+            <h1 style="color: white; margin: 0; font-size: 2.2em; font-weight: 700;"><span class="material-icons" style="font-size: 1.1em; vertical-align: middle; margin-right:10px;">pending_actions</span>Pekerjaan Latar Belakang</h1>
+            <p style="color: rgba(255,255,255,0.9); margin: 8px 0 0 0; font-size: 1.1em;">Prediksi batch, pelatihan ulang, dan pembaruan model tanpa menunggu di halaman</p>
+        </div>""", unsafe_allow_html=True)
+
+    with st.container(border=True):
+        st.markdown("<h3 style='color: #2c99a3; margin-bottom: 10px;'>Latih Ulang Model</h3>", unsafe_allow_html=True)
+        st.caption(f"Pipeline yang sama dengan notebook pemodelan, dilatih dari riwayat observasi stasiun {selected_station.replace('-', ' ').title()}. Versi baru langsung dipakai untuk prediksi setelah selesai.")
+        with st.form("retrain_form"):
+            col_t1, col_t2, col_t3 = st.columns(3)
+            search_input = col_t1.selectbox("Pencarian hyperparameter", SEARCHES, index=0, key="retrain_search_selectbox")
+            test_size_input = col_t2.select_slider("Porsi data uji", options=[0.2, 0.25, 0.3], value=0.3, format_func=lambda value: f"{value:.0%}", key="retrain_test_size_slider")
+            n_iter_input = col_t3.number_input("Kandidat (pencarian random)", min_value=2, max_value=100, value=20, step=1, key="retrain_n_iter_input")
+            submit_retrain = st.form_submit_button("Tambahkan ke Antrean")
+        if submit_retrain:
+            from jobs import submit_train
+            try:
+                job_id = submit_train(selected_station, search_input, test_size_input, int(n_iter_input))
+                st.success(f"Pelatihan ulang masuk antrean sebagai pekerjaan #{job_id}.")
+            except Exception as e:
+                st.error(f"Gagal menambahkan pekerjaan ke antrean: {e}")
+
+    with st.container(border=True):
+        st.markdown("<h3 style='color: #2c99a3; margin-bottom: 10px;'>Pembaruan Inkremental</h3>", unsafe_allow_html=True)
+        st.caption("Tanpa pencarian hyperparameter: pohon baru dilatih dari data terbaru dan pohon tertua dipensiunkan. Hasilnya diuji pada observasi yang masuk sesudah versi aktif dilatih; versi baru hanya diterbitkan bila tidak lebih buruk dari versi aktif.")
+        with st.form("incremental_form"):
+            col_u1, col_u2, col_u3 = st.columns(3)
+            new_trees_input = col_u1.number_input("Pohon baru", min_value=5, max_value=100, value=20, step=5, key="incremental_trees_input")
+            window_days_input = col_u2.number_input("Jendela data (hari)", min_value=30, max_value=3650, value=365, step=30, key="incremental_window_input")
+            holdout_days_input = col_u3.number_input("Holdout maks. (hari terakhir)", min_value=14, max_value=180, value=30, step=1, key="incremental_holdout_input")
+            submit_update_job = st.form_submit_button("Tambahkan ke Antrean")
+        if submit_update_job:
+            from jobs import submit_update
+            try:
+                job_id = submit_update(selected_station, int(new_trees_input), int(window_days_input), int(holdout_days_input))
+                st.success(f"Pembaruan inkremental masuk antrean sebagai pekerjaan #{job_id}.")
+            except Exception as e:
+                st.error(f"Gagal menambahkan pekerjaan ke antrean: {e}")
+
+    st.markdown("<h3 style='color: #2c99a3; margin-top: 20px;'>Daftar Pekerjaan</h3>", unsafe_allow_html=True)
+    show_jobs()
+
 # =========================
 # FOOTER
 # =========================
+
+# =========================
+# WARM-UP
+# =========================
+# Sekali per proses server, setelah halaman pertama selesai dirender: modul berat dan model
+# dimuat di background supaya pembukaan halaman Prediksi berikutnya tidak perlu menunggu
+@st.cache_resource
+def start_background_warmup():
+    return start_warmup()
+
+start_background_warmup()
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from features import DDD_CAR_OPTIONS, FEATURE_BOUNDS, FEATURE_COLUMNS, TARGET_COLUMN
+
+# =========================
+# ARTIFACT STORE
+# =========================
+# artifacts/
+#   manifest.json                  versi model aktif, skema fitur, hash konten
+#   models/<versi>/*.npy           array pohon (di-memory-map, dibagi antar proses worker)
+#   tables/<nama>.parquet          data tabular kolumnar
+# manifest["model"] adalah model stasiun default (Sambas); stasiun lain di manifest["station_models"][<id>]
+# Penulis manifest (ingest, train/publish, pekerja antrean, CLI) bisa berjalan bersamaan di beberapa proses:
+# setiap baca-ubah-tulis dilakukan di bawah flock pada manifest.lock (lihat update_manifest).
+STORE_DIR = os.environ.get("SAMBAS_ARTIFACT_DIR", "artifacts")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_LOCK_FILE = "manifest.lock"
+FORMAT_VERSION = 1
+
+# Sumber pickle lama -> nama tabel di store
+TABLE_SOURCES = {
+    "dataset": "dataset2.pkl",
+    "descriptive_stats": "descriptive_stats.pkl",
+}
+
+_verified = set()
+_verify_lock = threading.Lock()
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def feature_schema():
+    return {
+        "features": FEATURE_COLUMNS,
+        "target": TARGET_COLUMN,
+        "bounds": {col: list(bounds) for col, bounds in FEATURE_BOUNDS.items()},
+        "ddd_car_options": DDD_CAR_OPTIONS,
+    }
+
+
+def manifest_path(store_dir=STORE_DIR):
+    return os.path.join(store_dir, MANIFEST_FILE)
+
+
+def read_manifest(store_dir=STORE_DIR):
+    try:
+        with open(manifest_path(store_dir)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"Manifest '{manifest_path(store_dir)}' tidak ditemukan") from None
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ArtifactError(f"Format manifest {manifest.get('format')} tidak didukung")
+    return manifest
+
+
+def has_store(store_dir=STORE_DIR):
+    return os.path.exists(manifest_path(store_dir))
+
+
+# File sementara bernama unik di direktori tujuan, lalu os.replace: pembaca tidak pernah melihat file
+# setengah jadi dan penulis lain tidak berbagi path sementara yang sama
+def replace_atomically(path, write):
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}-", suffix=".tmp")
+    try:
+        os.close(fd)
+        write(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_manifest(manifest, store_dir=STORE_DIR):
+    def dump(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    replace_atomically(manifest_path(store_dir), dump)
+
+
+# Kunci eksklusif antarproses (flock) pada file kunci terpisah; file data tetap diganti dengan os.replace
+@contextmanager
+def file_lock(lock_path):
+    import fcntl
+
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def manifest_lock(store_dir=STORE_DIR):
+    return file_lock(os.path.join(store_dir, MANIFEST_LOCK_FILE))
+
+
+# with update_manifest() as manifest: ... -> manifest dibaca, diubah, dan ditulis di bawah satu kunci;
+# bila blok gagal, manifest tidak ditulis
+@contextmanager
+def update_manifest(store_dir=STORE_DIR):
+    with manifest_lock(store_dir):
+        manifest = read_manifest(store_dir) if has_store(store_dir) else {"format": FORMAT_VERSION, "tables": {}}
+        yield manifest
+        write_manifest(manifest, store_dir)
+
+
+def _verify(path, expected_sha256):
+    # Hash diperiksa sekali per file per proses
+    with _verify_lock:
+        if (path, expected_sha256) in _verified:
+            return
+        if file_sha256(path) != expected_sha256:
+            raise ArtifactError(f"Hash '{path}' tidak cocok dengan manifest")
+        _verified.add((path, expected_sha256))
+
+
+# =========================
+# WRITERS
+# =========================
+# trained_until: tanggal observasi terakhir dalam data latih (None bila tidak diketahui); baris sesudahnya
+# belum pernah dilihat versi ini dan dipakai sebagai holdout oleh incremental.py
+def publish_model(compiled, source_path=None, store_dir=STORE_DIR, metrics=None, station=None, trained_until=None,
+                  importance=None):
+    models_dir = os.path.join(store_dir, "models")
+    os.makedirs(models_dir, exist_ok=True)
+    # Staging unik per publish; versi = hash isi, jadi publish bersamaan dari model yang sama menghasilkan
+    # direktori yang identik dan cukup satu yang dipindahkan
+    files_dir_tmp = tempfile.mkdtemp(dir=models_dir, prefix=".staging-")
+    try:
+        compiled.save(files_dir_tmp)
+        files = {name: file_sha256(os.path.join(files_dir_tmp, name)) for name in sorted(os.listdir(files_dir_tmp))}
+        model_sha256 = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        version = f"rfr-{model_sha256[:12]}"
+        model_dir = os.path.join("models", version)
+        entry = {
+            "version": version,
+            "dir": model_dir,
+            "sha256": model_sha256,
+            "files": files,
+            "source": source_path,
+            "source_sha256": file_sha256(source_path) if source_path else None,
+            "feature_schema": feature_schema(),
+            "metrics": metrics,
+            "trained_until": trained_until,
+            "importance": importance,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with update_manifest(store_dir) as manifest:
+            os.chmod(files_dir_tmp, 0o755)
+            if not os.path.isdir(os.path.join(store_dir, model_dir)):
+                os.replace(files_dir_tmp, os.path.join(store_dir, model_dir))
+            if _is_default_station(station):
+                manifest["model"] = entry
+            else:
+                manifest.setdefault("station_models", {})[station] = dict(entry, station=station)
+    finally:
+        shutil.rmtree(files_dir_tmp, ignore_errors=True)
+    return version
+
+
+# Kompilasi pipeline sklearn, cek paritas pada data siap-model, hitung importance, lalu terbitkan sebagai
+# versi aktif
+def publish_pipeline(pipeline, source_path=None, store_dir=STORE_DIR, metrics=None, station=None, trained_until=None):
+    import pandas as pd
+
+    from compiled_forest import check_parity, compile_pipeline
+    from sensitivity import importance_records
+
+    compiled = compile_pipeline(pipeline)
+    reference = pd.read_csv("readyForModeling.csv")[FEATURE_COLUMNS]
+    ok, _, _ = check_parity(pipeline, compiled, reference)
+    if not ok:
+        raise ArtifactError("Forest terkompilasi tidak sama dengan pipeline asli")
+    os.makedirs(store_dir, exist_ok=True)
+    return publish_model(compiled, source_path=source_path, store_dir=store_dir, metrics=metrics, station=station,
+                         trained_until=trained_until, importance=importance_records(compiled, station))
+
+
+# Hasil turunan (metrik uji, importance) disimpan di entri model versi yang aktif
+def set_model_entry(version, store_dir=STORE_DIR, **fields):
+    with update_manifest(store_dir) as manifest:
+        entries = [manifest.get("model") or {}] + list(manifest.get("station_models", {}).values())
+        matching = [entry for entry in entries if entry.get("version") == version]
+        if not matching:
+            raise ArtifactError(f"Versi model {version} tidak aktif untuk stasiun mana pun")
+        for entry in matching:
+            entry.update(fields)
+
+
+def set_model_metrics(version, metrics, store_dir=STORE_DIR):
+    set_model_entry(version, store_dir, metrics=metrics)
+
+
+def publish_table(name, frame, store_dir=STORE_DIR):
+    os.makedirs(os.path.join(store_dir, "tables"), exist_ok=True)
+    relative_path = os.path.join("tables", f"{name}.parquet")
+    path = os.path.join(store_dir, relative_path)
+    # File dan entri manifest diganti di bawah kunci yang sama agar hash di manifest cocok dengan isi file
+    with update_manifest(store_dir) as manifest:
+        replace_atomically(path, lambda tmp_path: frame.to_parquet(tmp_path, engine="pyarrow"))
+        manifest.setdefault("tables", {})[name] = {
+            "path": relative_path,
+            "sha256": file_sha256(path),
+            "rows": int(len(frame)),
+            "columns": [str(col) for col in frame.columns],
+        }
+
+
+# Part riwayat ditulis oleh proses worker ingest.py; manifest diperbarui sekali di proses induk
+# Part yang sudah terdaftar dari sumber lain tidak boleh ditimpa diam-diam
+def check_history_part(registered, relative_path, source):
+    existing = registered.get(relative_path)
+    if existing is not None and existing["source"] != source:
+        raise ArtifactError(f"Part {relative_path} dari '{source}' bertabrakan dengan part dari "
+                            f"'{existing['source']}' yang sudah terdaftar")
+
+
+def register_history_parts(parts, store_dir=STORE_DIR):
+    with update_manifest(store_dir) as manifest:
+        registered = manifest.setdefault("history", {"dir": "history", "parts": {}})["parts"]
+        for part in parts:
+            check_history_part(registered, part["path"], part["source"])
+            registered[part["path"]] = {key: part[key] for key in ("source", "station", "rows", "min_date", "max_date", "sha256")}
+
+
+# =========================
+# LOADERS
+# =========================
+def _is_default_station(station):
+    from observations import DEFAULT_STATION
+
+    return station is None or station == DEFAULT_STATION
+
+
+def model_entry(station=None, store_dir=STORE_DIR, manifest=None):
+    manifest = manifest if manifest is not None else read_manifest(store_dir)
+    if _is_default_station(station):
+        entry = manifest.get("model")
+    else:
+        entry = manifest.get("station_models", {}).get(station)
+    if entry is None:
+        raise ArtifactError(f"Belum ada model untuk stasiun '{station}'" if station else "Manifest belum berisi model")
+    return entry
+
+
+# Stasiun -> versi model aktif
+def station_models(store_dir=STORE_DIR):
+    from observations import DEFAULT_STATION
+
+    manifest = read_manifest(store_dir)
+    versions = {station: entry["version"] for station, entry in manifest.get("station_models", {}).items()}
+    if manifest.get("model"):
+        versions[DEFAULT_STATION] = manifest["model"]["version"]
+    return versions
+
+
+def model_version(station=None, store_dir=STORE_DIR):
+    return model_entry(station, store_dir)["version"]
+
+
+def load_model(station=None, store_dir=STORE_DIR, verify=True, entry=None):
+    from compiled_forest import CompiledForest
+
+    entry = entry if entry is not None else model_entry(station, store_dir)
+    model_dir = os.path.join(store_dir, entry["dir"])
+    if verify:
+        for name, sha256 in entry["files"].items():
+            _verify(os.path.join(model_dir, name), sha256)
+    # mmap_mode="r": halaman array dibagi lewat page cache OS oleh semua proses yang memuat versi yang sama
+    model = CompiledForest.load(model_dir, mmap_mode="r")
+    model.version = entry["version"]
+    return model
+
+
+# Pipeline sklearn (pickle sumber) dari suatu versi; hash dicek agar isinya memang versi yang tercatat
+def load_source_model(entry):
+    from predictor import load_pipeline
+
+    if not entry.get("source"):
+        raise ArtifactError(f"Versi {entry['version']} tidak mencatat pickle sumber")
+    if entry.get("source_sha256") and file_sha256(entry["source"]) != entry["source_sha256"]:
+        raise ArtifactError(f"Pickle sumber {entry['source']} sudah berubah sejak versi {entry['version']} diterbitkan")
+    return load_pipeline(entry["source"], compiled=False)
+
+
+def table_path(name, store_dir=STORE_DIR, verify=True):
+    entry = read_manifest(store_dir).get("tables", {}).get(name)
+    if entry is None:
+        raise ArtifactError(f"Tabel '{name}' tidak ada di manifest")
+    path = os.path.join(store_dir, entry["path"])
+    if verify:
+        _verify(path, entry["sha256"])
+    return path
+
+
+def load_table(name, columns=None, filters=None, store_dir=STORE_DIR, verify=True):
+    import pandas as pd
+
+    return pd.read_parquet(table_path(name, store_dir, verify), columns=columns, filters=filters)
+
+
+def history_files(stations=None, store_dir=STORE_DIR, verify=True):
+    history = read_manifest(store_dir).get("history")
+    if not history:
+        return []
+    files = []
+    for relative_path, part in sorted(history["parts"].items()):
+        if stations is not None and part["station"] not in stations:
+            continue
+        path = os.path.join(store_dir, history["dir"], relative_path)
+        if verify:
+            _verify(path, part["sha256"])
+        files.append(path)
+    return files
+
+
+# Bangun store dari artefak pickle lama: python artifact_store.py build
+def build_from_pickles(store_dir=STORE_DIR):
+    import pandas as pd
+
+    from predictor import MODEL_PATH, load_pipeline
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, source in TABLE_SOURCES.items():
+        frame = pd.read_pickle(source)
+        if "Tanggal" in frame.columns:
+            frame["Tanggal"] = pd.to_datetime(frame["Tanggal"], format="%d-%m-%Y", errors="coerce")
+        publish_table(name, frame, store_dir)
+
+    # Pickle notebook dilatih dari readyForModeling.csv, yaitu tabel dataset setelah dibersihkan
+    dates = pd.read_parquet(os.path.join(store_dir, "tables", "dataset.parquet"), columns=["Tanggal"])["Tanggal"]
+    return publish_pipeline(load_pipeline(MODEL_PATH, compiled=False), source_path=MODEL_PATH, store_dir=store_dir,
+                            trained_until=str(dates.max().date()))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        sys.exit("Pemakaian: python artifact_store.py build")
+    print(f"Model aktif: {build_from_pickles()} -> {manifest_path()}")
@@ -0,0 +1,86 @@
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from features import FEATURE_COLUMNS, MAX_REPORTED_ERRORS, validate_frame
+from predictor import INTERVAL_QUANTILES, predict_summary
+
+# =========================
+# BATCH PREDICTION
+# =========================
+CHUNK_ROWS = 50_000
+PREDICTION_COLUMN = "Tavg_prediksi"
+# Kolom ketidakpastian mengikuti urutan predictor.SUMMARY_COLUMNS setelah mean
+INTERVAL_COLUMNS = [f"{PREDICTION_COLUMN}_std"] + [f"{PREDICTION_COLUMN}_p{round(q * 100):02d}" for q in INTERVAL_QUANTILES]
+
+
+@dataclass
+class BatchReport:
+    rows_total: int = 0
+    rows_scored: int = 0
+    rows_invalid: int = 0
+    predict_seconds: float = 0.0
+    total_seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return self.rows_scored / self.predict_seconds if self.predict_seconds > 0 else 0.0
+
+
+def _iter_excel_chunks(file, chunk_rows):
+    from openpyxl import load_workbook  # dipakai pandas untuk .xlsx, cukup dimuat saat dibutuhkan
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(col) if col is not None else "" for col in next(rows, ())]
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_input_chunks(file, filename, chunk_rows=CHUNK_ROWS):
+    if filename.lower().endswith(".xlsx"):
+        yield from _iter_excel_chunks(file, chunk_rows)
+    else:
+        yield from pd.read_csv(file, chunksize=chunk_rows)
+
+
+# Skor file per chunk dan tulis hasil CSV langsung ke `out`, sehingga memori tetap terbatas.
+# on_chunk(valid, outputs): dipanggil per chunk dengan baris valid dan ringkasan prediksinya (mis. untuk log pemantauan)
+def score_file(model, file, filename, out, chunk_rows=CHUNK_ROWS, on_progress=None, on_chunk=None):
+    report = BatchReport()
+    started = time.perf_counter()
+    offset = 0
+    for chunk in iter_input_chunks(file, filename, chunk_rows):
+        chunk.columns = chunk.columns.astype(str).str.strip()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        valid, n_invalid, errors = validate_frame(chunk)
+        report.rows_total += len(chunk)
+        report.rows_invalid += n_invalid
+        report.errors.extend(errors[:max(0, MAX_REPORTED_ERRORS - len(report.errors))])
+
+        if len(valid):
+            t0 = time.perf_counter()
+            outputs = predict_summary(model, valid[FEATURE_COLUMNS])
+            valid[[PREDICTION_COLUMN] + INTERVAL_COLUMNS] = outputs
+            report.predict_seconds += time.perf_counter() - t0
+            if on_chunk is not None:
+                on_chunk(valid, outputs)
+            report.rows_scored += len(valid)
+            valid.to_csv(out, index=False, header=report.rows_scored == len(valid))
+
+        if on_progress is not None:
+            on_progress(report)
+    report.total_seconds = time.perf_counter() - started
+    return report
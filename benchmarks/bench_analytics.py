@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import HistorySource, describe, grouped_stats, query_page
+from features import DDD_CAR_OPTIONS, NUMERIC_FEATURES, TARGET_COLUMN
+from ingest import CHUNK_ROWS, HISTORY_COLUMNS, write_part
+from observations import DATE_COLUMN, STATION_COLUMN
+
+# Jalankan dari root repo: python -m benchmarks.bench_analytics
+# Riwayat sintetis N_STATIONS stasiun x N_YEARS tahun data harian, ditulis dengan writer ingest.py
+# (satu file per stasiun, row group per CHUNK_ROWS baris), lalu kueri Analytics dibandingkan dengan
+# membaca seluruh Parquet ke pandas dan memfilter di sana.
+N_STATIONS = 30
+N_YEARS = 40
+REPEATS = 3
+
+
+def synthetic_station(station, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1985-01-01", periods=N_YEARS * 365, freq="D")
+    n = len(dates)
+    frame = pd.DataFrame({DATE_COLUMN: dates})
+    for col in ["Tn", "Tx", TARGET_COLUMN] + NUMERIC_FEATURES:
+        frame[col] = rng.normal(27 if col in ("Tn", "Tx", TARGET_COLUMN) else 50, 5, n).round(1)
+    frame["ddd_car"] = rng.choice([code.ljust(2) for code in DDD_CAR_OPTIONS], n)
+    frame[STATION_COLUMN] = station
+    return frame[HISTORY_COLUMNS]
+
+
+def write_history(directory):
+    files = {}
+    for i in range(N_STATIONS):
+        station = f"stasiun-{i:02d}"
+        frame = synthetic_station(station, i)
+        path = os.path.join(directory, station, "history.parquet")
+        chunks = (frame.iloc[start:start + CHUNK_ROWS] for start in range(0, len(frame), CHUNK_ROWS))
+        write_part(chunks, path, {"min_date": None, "max_date": None})
+        files[station] = path
+    return files
+
+
+def best_of(fn, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def pandas_filter(files, stations, start, end):
+    frame = pd.read_parquet([files[station] for station in stations])
+    return frame[(frame[DATE_COLUMN] >= start) & (frame[DATE_COLUMN] <= end)]
+
+
+def main():
+    import pyarrow.dataset as ds
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_history(directory)
+        all_stations = sorted(files)
+        n_rows = sum(ds.dataset(path).count_rows() for path in files.values())
+        print(f"Riwayat sintetis: {n_rows:,} baris, {N_STATIONS} file")
+
+        # Pemilihan file per stasiun dilakukan lewat manifest di aplikasi; di sini dengan memilih path
+        def source(stations):
+            return HistorySource(ds.dataset([files[station] for station in stations], format="parquet"))
+
+        cases = [
+            ("describe, 1 stasiun, 1 bulan", ["stasiun-07"], "2010-03-01", "2010-03-31"),
+            ("describe, semua stasiun, 1 tahun", all_stations, "2015-01-01", "2015-12-31"),
+            ("describe, semua stasiun, semua", all_stations, "1985-01-01", "2030-12-31"),
+        ]
+        print(f"{'kueri':<36} {'pandas (ms)':>12} {'arrow (ms)':>11} {'speedup':>8}")
+        for name, stations, start, end in cases:
+            pandas_s, expected = best_of(lambda: pandas_filter(files, stations, start, end)[[TARGET_COLUMN] + NUMERIC_FEATURES].describe())
+            arrow_s, actual = best_of(lambda: describe(source=source(stations), start=start, end=end))
+            assert np.allclose(expected.to_numpy(), actual.to_numpy()), name
+            print(f"{name:<36} {pandas_s * 1000:>12.1f} {arrow_s * 1000:>11.1f} {pandas_s / arrow_s:>7.1f}x")
+
+        page_pandas_s, _ = best_of(lambda: pandas_filter(files, all_stations, "1985-01-01", "2030-12-31").head(25))
+        page_s, _ = best_of(lambda: query_page(page=0, source=source(all_stations)))
+        print(f"{'halaman pertama, semua stasiun':<36} {page_pandas_s * 1000:>12.1f} {page_s * 1000:>11.1f} "
+              f"{page_pandas_s / page_s:>7.1f}x")
+        group_s, _ = best_of(lambda: grouped_stats("bulan", source=source(all_stations)))
+        print(f"{'grouped_stats per bulan, semua':<36} {'':>12} {group_s * 1000:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
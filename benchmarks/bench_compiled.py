@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from compiled_forest import check_parity, compile_pipeline
+from features import FEATURE_COLUMNS
+from predictor import load_pipeline
+
+# Jalankan dari root repo: python -m benchmarks.bench_compiled
+REPEATS = {1: 50, 100_000: 3}
+
+
+def make_rows(reference, n_rows, seed=42):
+    # Sampel ulang baris observasi asli agar distribusi fitur realistis
+    return reference.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def best_of(fn, frame, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(frame)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    pipeline = load_pipeline(compiled=False)
+    compiled = compile_pipeline(pipeline)
+    reference = pd.read_csv("readyForModeling.csv")[FEATURE_COLUMNS]
+
+    ok, expected, actual = check_parity(pipeline, compiled, make_rows(reference, 100_000))
+    print(f"Paritas 100k baris: {'OK' if ok else 'GAGAL'} (selisih maks {np.max(np.abs(expected - actual)):.2e})")
+
+    print(f"{'baris':>8} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>8}")
+    for n_rows, repeats in REPEATS.items():
+        frame = make_rows(reference, n_rows)
+        sklearn_s = best_of(pipeline.predict, frame, repeats)
+        compiled_s = best_of(compiled.predict, frame, repeats)
+        print(f"{n_rows:>8} {sklearn_s * 1000:>14.3f} {compiled_s * 1000:>14.3f} {sklearn_s / compiled_s:>7.1f}x")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+import argparse
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from features import DDD_CAR_OPTIONS, FEATURE_COLUMNS, TARGET_COLUMN
+from incremental import HOLDOUT_DAYS, NEW_TREES, update
+from observations import DATE_COLUMN
+from train import RANDOM_STATE, build_pipeline, evaluate, train
+
+# Jalankan dari root repo: python -m benchmarks.bench_incremental [--years 1 2 4] [--search grid]
+# Riwayat harian sintetis dengan relasi yang bergeser pelan (tren suhu dan pengaruh kelembapan berubah per
+# tahun), sehingga data lama makin kurang mewakili hari-hari terakhir. Untuk tiap panjang riwayat:
+# - full: train.train (pencarian hyperparameter penuh seperti train.py) atas seluruh riwayat sebelum holdout,
+# - incremental: versi sebelumnya (hyperparameter yang sama, dilatih tanpa STEP_DAYS hari sebelum holdout)
+#   diperbarui dengan incremental.update,
+# lalu keduanya dinilai pada holdout HOLDOUT_DAYS hari terakhir yang sama, yang tidak pernah dilihat versi
+# sebelumnya, hasil latih ulang penuh, maupun kandidat validasi incremental.update.
+END_DATE = "2024-12-31"
+STEP_DAYS = 1  # data yang "baru tiba" sejak versi sebelumnya
+TEST_SIZE = 0.3
+TREND_PER_YEAR = 0.1
+
+
+def synthetic_history(years, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=END_DATE, periods=years * 365, freq="D")
+    n = len(dates)
+    season = np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+    elapsed = np.arange(n) / 365.25
+    frame = pd.DataFrame({
+        DATE_COLUMN: dates,
+        "RH_avg": np.clip(85 + 6 * season + rng.normal(0, 4, n), 50, 100).round(1),
+        "RR": rng.gamma(0.6, 12, n).round(1),
+        "ss": np.clip(5 - 2 * season + rng.normal(0, 2, n), 0, 12).round(1),
+        "ff_x": rng.integers(1, 12, n).astype(float),
+        "ddd_x": rng.choice(np.arange(0, 360, 10), n).astype(float),
+        "ff_avg": rng.integers(0, 5, n).astype(float),
+        "ddd_car": rng.choice(DDD_CAR_OPTIONS, n),
+    })
+    frame[TARGET_COLUMN] = (26.8 + TREND_PER_YEAR * elapsed - (0.08 - 0.01 * elapsed) * (frame["RH_avg"] - 85)
+                            + 0.12 * frame["ss"] - 0.015 * frame["RR"] + 0.4 * season
+                            + rng.normal(0, 0.35, n)).round(1)
+    return frame
+
+
+# Versi "sebelumnya": pipeline dengan hyperparameter hasil pencarian, di-fit pada split latih yang sama
+# dengan train.train atas data tanpa hari-hari terbaru
+def previous_version(data, best_params):
+    from sklearn.model_selection import train_test_split
+
+    X_train, _, y_train, _ = train_test_split(data[FEATURE_COLUMNS], data[TARGET_COLUMN],
+                                              test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    return build_pipeline().set_params(**best_params).fit(X_train, y_train)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pembaruan inkremental vs latih ulang penuh")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 4], help="Panjang riwayat (tahun)")
+    parser.add_argument("--search", choices=("grid", "halving", "random"), default="grid")
+    parser.add_argument("--n-iter", type=int, default=20)
+    parser.add_argument("--new-trees", type=int, default=NEW_TREES)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    print(f"{'tahun':>5} {'baris':>6} {'full (s)':>9} {'inkr. (s)':>9} {'speedup':>8} "
+          f"{'MAE lama':>9} {'MAE full':>9} {'MAE inkr.':>9}")
+    for years in args.years:
+        data = synthetic_history(years)
+        holdout_start = data[DATE_COLUMN].max() - pd.Timedelta(days=HOLDOUT_DAYS - 1)
+        before_holdout = data[data[DATE_COLUMN] < holdout_start]
+        holdout = data[data[DATE_COLUMN] >= holdout_start]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            started = time.perf_counter()
+            full, metrics = train(before_holdout, TEST_SIZE, args.search, 1, cache_dir, args.n_iter)
+            full_s = time.perf_counter() - started
+        full_mae = evaluate(full, holdout[FEATURE_COLUMNS], holdout[TARGET_COLUMN])["mae"]
+
+        previous_data = before_holdout.iloc[:-STEP_DAYS]
+        previous = previous_version(previous_data, metrics["best_params"])
+        started = time.perf_counter()
+        _, updated = update(previous, data, previous_data[DATE_COLUMN].max(), holdout_days=HOLDOUT_DAYS,
+                            new_trees=args.new_trees)
+        incremental_s = time.perf_counter() - started  # validasi + latih ulang pohon baru dengan holdout
+        print(f"{years:>5} {len(data):>6} {full_s:>9.2f} {incremental_s:>9.2f} {full_s / incremental_s:>7.0f}x "
+              f"{updated['current_holdout']['mae']:>9.4f} {full_mae:>9.4f} {updated['mae']:>9.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
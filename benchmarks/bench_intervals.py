@@ -0,0 +1,41 @@
+import time
+
+import pandas as pd
+
+from benchmarks.bench_compiled import best_of, make_rows
+from compiled_forest import compile_pipeline
+from features import FEATURE_COLUMNS
+from predictor import load_pipeline, predict_summary
+
+# Jalankan dari root repo: python -m benchmarks.bench_intervals
+# Membandingkan predict biasa dengan predict_summary (mean + std + interval kuantil dari output per pohon)
+REPEATS = {1: 50, 10_000: 5, 100_000: 3}
+
+
+def main():
+    pipeline = load_pipeline(compiled=False)
+    compiled = compile_pipeline(pipeline)
+    reference = pd.read_csv("readyForModeling.csv")[FEATURE_COLUMNS]
+    predict_summary(pipeline, reference)  # kompilasi array pohon untuk pipeline sklearn (sekali per model)
+
+    print(f"{'model':>9} {'baris':>8} {'predict (ms)':>13} {'+interval (ms)':>15} {'overhead':>9}")
+    for name, model in (("sklearn", pipeline), ("compiled", compiled)):
+        for n_rows, repeats in REPEATS.items():
+            frame = make_rows(reference, n_rows)
+            predict_s = best_of(model.predict, frame, repeats)
+            summary_s = best_of(lambda rows: predict_summary(model, rows), frame, repeats)
+            print(f"{name:>9} {n_rows:>8} {predict_s * 1000:>13.3f} {summary_s * 1000:>15.3f} "
+                  f"{(summary_s / predict_s - 1) * 100:>+8.1f}%")
+
+    # Bagian ringkasan saja (kuantil + std) dari output pohon yang sudah ada
+    from predictor import summarize_trees
+
+    tree_outputs = compiled.predict_trees(make_rows(reference, 100_000))
+    started = time.perf_counter()
+    summarize_trees(tree_outputs)
+    print(f"Ringkasan interval untuk 100k baris x {compiled.n_trees} pohon: {(time.perf_counter() - started) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+
+# Jalankan dari root repo: python -m benchmarks.bench_startup
+# Setiap pengukuran memakai proses Python baru agar yang terukur adalah cold start.
+MODULES = ["streamlit", "pandas", "plotly.graph_objects", "jcopml.utils", "sklearn.ensemble", "app_imports"]
+PAGES = ["Dashboard", "Analytics", "Prediksi"]
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+if {module!r} == "app_imports":
+    import predictor, warmup  # impor level-atas app.py
+else:
+    import {module}
+print(time.perf_counter() - started)
+"""
+
+MODEL_SNIPPET = """
+import time, warnings
+warnings.filterwarnings("ignore")
+from predictor import get_model
+started = time.perf_counter()
+get_model()
+print(time.perf_counter() - started)
+"""
+
+RENDER_SNIPPET = """
+import time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.session_state["main_menu_selectbox"] = {page!r}
+started = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - started
+assert not at.exception, [e.value for e in at.exception]
+print(elapsed)
+"""
+
+# Sesi kedua membuka Prediksi setelah sesi pertama (Dashboard) memicu warm-up
+WARM_SESSION_SNIPPET = """
+import time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app.py", default_timeout=120).run()
+from predictor import get_model
+get_model()  # menunggu thread warm-up selesai
+at = AppTest.from_file("app.py", default_timeout=120)
+at.session_state["main_menu_selectbox"] = "Prediksi"
+started = time.perf_counter()
+at.run()
+print(time.perf_counter() - started)
+"""
+
+
+def run_snippet(code, **env):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env={**os.environ, **env}, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    results = {"import_s": {}, "model_load_s": None, "first_render_s": {}}
+    for module in MODULES:
+        results["import_s"][module] = run_snippet(IMPORT_SNIPPET.format(module=module))
+    results["model_load_s"] = run_snippet(MODEL_SNIPPET)
+    for page in PAGES:
+        for warmup in ("1", "0"):
+            key = f"{page} (warmup={'on' if warmup == '1' else 'off'})"
+            results["first_render_s"][key] = run_snippet(RENDER_SNIPPET.format(page=page), SAMBAS_WARMUP=warmup)
+    results["first_render_s"]["Prediksi (sesi kedua, setelah warm-up)"] = run_snippet(WARM_SESSION_SNIPPET)
+
+    for section, values in results.items():
+        if isinstance(values, dict):
+            print(section)
+            for name, seconds in values.items():
+                print(f"  {name:<40} {seconds * 1000:>9.1f} ms")
+        else:
+            print(f"{section:<42} {values * 1000:>9.1f} ms")
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.bench_compiled import make_rows
+from benchmarks.bench_startup import MODEL_SNIPPET, run_snippet
+from features import FEATURE_COLUMNS
+
+# Jalankan dari root repo: python -m benchmarks.suite [--output hasil.json] [--baseline hasil_lama.json]
+# Semua hasil ditulis sebagai satu JSON datar "<bagian>.<nama>" -> nilai. Nama berakhiran _ms berarti
+# makin kecil makin baik, _per_s makin besar makin baik. Run gagal (exit 1) bila ada metrik yang melewati
+# batas di thresholds.json, atau lebih lambat dari baseline melebihi toleransi.
+# Suite berjalan atas salinan sementara artifact store (SAMBAS_ARTIFACT_DIR), jadi prediksi dari submit
+# AppTest tidak masuk ke log monitoring store yang sebenarnya.
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+SECTIONS = ("load", "preprocess", "predict", "render", "sessions")
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+LATENCY_SAMPLES = 200
+LOAD_REPEATS = 3
+PAGES = ("Dashboard", "Analytics", "Prediksi")
+RENDER_REPEATS = 3
+CONCURRENT_SESSIONS = (1, 4)
+SESSIONS_PER_WORKER = 2
+BASELINE_TOLERANCE = 0.5
+
+
+# Jumlah pengulangan menyesuaikan ukuran batch agar tiap titik ukur memakan waktu yang sebanding
+def repeats_for(n_rows):
+    return max(3, min(LATENCY_SAMPLES, 100_000 // n_rows))
+
+
+def timings(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_metrics(prefix, samples):
+    return {
+        f"{prefix}_p50_ms": statistics.median(samples) * 1000,
+        f"{prefix}_p95_ms": percentile(samples, 0.95) * 1000,
+    }
+
+
+# =========================
+# MODEL LOAD
+# =========================
+def bench_load():
+    from artifact_store import has_store, load_model
+    from predictor import MODEL_PATH, load_pipeline
+
+    metrics = {}
+    pickle_s = timings(lambda: load_pipeline(MODEL_PATH, compiled=False), LOAD_REPEATS)
+    metrics["pickle_rfr_cuaca_ms"] = min(pickle_s) * 1000
+    # Proses baru: termasuk impor sklearn/NumPy yang dipicu get_model()
+    metrics["cold_process_ms"] = min(run_snippet(MODEL_SNIPPET) for _ in range(LOAD_REPEATS)) * 1000
+    if has_store():
+        # Tanpa verifikasi hash: yang diukur pemetaan array (mmap), bukan SHA-256 file
+        metrics["store_mmap_ms"] = min(timings(lambda: load_model(verify=False), LOAD_REPEATS)) * 1000
+    return metrics
+
+
+# =========================
+# PREPROCESSING (ColumnTransformer)
+# =========================
+def bench_preprocess(pipeline, reference):
+    metrics = {}
+    preprocess = pipeline[:-1]
+    for n_rows in BATCH_SIZES:
+        frame = make_rows(reference, n_rows)
+        samples = timings(lambda: preprocess.transform(frame), repeats_for(n_rows))
+        if n_rows == 1:
+            metrics.update(latency_metrics("single", samples))
+        else:
+            metrics[f"batch_{n_rows}_ms"] = statistics.median(samples) * 1000
+    return metrics
+
+
+# =========================
+# PREDICT LATENCY & THROUGHPUT
+# =========================
+def bench_predict(models, reference):
+    from predictor import predict_summary
+
+    metrics = {}
+    for name, model in models.items():
+        paths = {"predict": model.predict, "summary": lambda frame, model=model: predict_summary(model, frame)}
+        for path, fn in paths.items():
+            fn(reference.head(10))  # kompilasi/alokasi sekali sebelum diukur
+            for n_rows in BATCH_SIZES:
+                frame = make_rows(reference, n_rows)
+                samples = timings(lambda: fn(frame), repeats_for(n_rows))
+                prefix = f"{name}.{path}"
+                if n_rows == 1:
+                    metrics.update(latency_metrics(f"{prefix}.single", samples))
+                    continue
+                median_s = statistics.median(samples)
+                metrics[f"{prefix}.batch_{n_rows}_ms"] = median_s * 1000
+                metrics[f"{prefix}.batch_{n_rows}_rows_per_s"] = n_rows / median_s
+    return metrics
+
+
+# =========================
+# PAGE RENDER (AppTest)
+# =========================
+def _app_test(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath("app.py"), default_timeout=120)
+    at.session_state["main_menu_selectbox"] = page
+    return at
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(f"AppTest gagal: {[e.value for e in at.exception]}")
+    return at
+
+
+# Render pertama sesi baru (cache Streamlit & registry model sudah hangat) dan rerun sesi yang sama
+def bench_render():
+    from predictor import get_model
+
+    get_model()
+    metrics = {}
+    for page in PAGES:
+        _check(_app_test(page).run())  # isi cache st.cache_data/resource untuk halaman ini
+        first, rerun = [], []
+        for _ in range(RENDER_REPEATS):
+            at = _app_test(page)
+            started = time.perf_counter()
+            _check(at.run())
+            first.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            _check(at.run())
+            rerun.append(time.perf_counter() - started)
+        metrics[f"{page}.first_ms"] = statistics.median(first) * 1000
+        metrics[f"{page}.rerun_ms"] = statistics.median(rerun) * 1000
+    at = _check(_app_test("Prediksi").run())
+    submit = []
+    for _ in range(RENDER_REPEATS):
+        started = time.perf_counter()
+        _check(at.button[0].click().run())
+        submit.append(time.perf_counter() - started)
+    metrics["Prediksi.submit_ms"] = statistics.median(submit) * 1000
+    return metrics
+
+
+# =========================
+# CONCURRENT SESSIONS
+# =========================
+# Satu sesi = buka halaman Prediksi lalu submit form; beberapa sesi dijalankan bersamaan di thread
+def _session():
+    started = time.perf_counter()
+    at = _check(_app_test("Prediksi").run())
+    _check(at.button[0].click().run())
+    return time.perf_counter() - started
+
+
+def _safe_session(_):
+    try:
+        return _session()
+    except Exception:
+        return None
+
+
+def bench_sessions():
+    _session()  # sesi pemanasan
+    metrics = {}
+    for workers in CONCURRENT_SESSIONS:
+        n_sessions = workers * SESSIONS_PER_WORKER
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_safe_session, range(n_sessions)))
+        elapsed = time.perf_counter() - started
+        durations = [seconds for seconds in results if seconds is not None]
+        metrics[f"concurrency_{workers}.sessions_per_s"] = len(durations) / elapsed
+        metrics[f"concurrency_{workers}.errors"] = n_sessions - len(durations)
+        if durations:
+            metrics.update(latency_metrics(f"concurrency_{workers}.session", durations))
+    return metrics
+
+
+# =========================
+# THRESHOLDS & BASELINE
+# =========================
+def higher_is_better(name):
+    return name.endswith("_per_s")
+
+
+# thresholds.json: {"<metrik>": {"max": nilai}} atau {"min": nilai}; metrik yang tidak diukur dilewati
+def check_thresholds(metrics, thresholds):
+    violations = []
+    for name, limits in thresholds.items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if "max" in limits and value > limits["max"]:
+            violations.append({"metric": name, "value": value, "limit": limits["max"], "kind": "max"})
+        if "min" in limits and value < limits["min"]:
+            violations.append({"metric": name, "value": value, "limit": limits["min"], "kind": "min"})
+    return violations
+
+
+# Dibandingkan dengan hasil run sebelumnya di mesin yang sama
+def check_baseline(metrics, baseline, tolerance=BASELINE_TOLERANCE):
+    violations = []
+    for name, previous in baseline.items():
+        value = metrics.get(name)
+        if value is None or not previous or not (name.endswith("_ms") or higher_is_better(name)):
+            continue
+        if higher_is_better(name):
+            limit = previous * (1 - tolerance)
+            regressed = value < limit
+        else:
+            limit = previous * (1 + tolerance)
+            regressed = value > limit
+        if regressed:
+            violations.append({"metric": name, "value": value, "limit": limit, "kind": "baseline"})
+    return violations
+
+
+def environment():
+    import numpy
+    import sklearn
+    import streamlit
+
+    from artifact_store import ArtifactError, has_store, model_version
+
+    try:
+        version = model_version() if has_store() else "pickle"
+    except ArtifactError:
+        version = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "streamlit": streamlit.__version__,
+        "model_version": version,
+    }
+
+
+# Salinan store tanpa state runtime (log monitoring, antrean pekerjaan); harus dipasang sebelum
+# artifact_store diimpor karena STORE_DIR dibaca saat impor
+def isolated_store(target_dir):
+    source = os.environ.get("SAMBAS_ARTIFACT_DIR", "artifacts")
+    store_dir = os.path.join(target_dir, "artifacts")
+    if os.path.isdir(source):
+        shutil.copytree(source, store_dir, ignore=shutil.ignore_patterns("monitoring", "jobs", "*.lock", ".*.tmp"))
+    os.environ["SAMBAS_ARTIFACT_DIR"] = store_dir
+    return store_dir
+
+
+def run(sections):
+    from compiled_forest import compile_pipeline
+    from predictor import load_pipeline
+
+    reference = pd.read_csv("readyForModeling.csv")[FEATURE_COLUMNS]
+    pipeline = load_pipeline(compiled=False)
+    results = {}
+    for section in sections:
+        started = time.perf_counter()
+        if section == "load":
+            metrics = bench_load()
+        elif section == "preprocess":
+            metrics = bench_preprocess(pipeline, reference)
+        elif section == "predict":
+            metrics = bench_predict({"sklearn": pipeline, "compiled": compile_pipeline(pipeline)}, reference)
+        elif section == "render":
+            metrics = bench_render()
+        else:
+            metrics = bench_sessions()
+        results.update({f"{section}.{name}": value for name, value in metrics.items()})
+        print(f"[{section}] selesai dalam {time.perf_counter() - started:.1f} detik", file=sys.stderr)
+    return results
+
+
+def print_report(metrics, violations):
+    failed = {violation["metric"] for violation in violations}
+    for name, value in metrics.items():
+        print(f"{'GAGAL' if name in failed else '':<6}{name:<58} {value:>14.3f}")
+    for violation in violations:
+        print(f"Regresi: {violation['metric']} = {violation['value']:.3f} "
+              f"(batas {violation['kind']} {violation['limit']:.3f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark & load test jalur inferensi dan render")
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--output", help="Tulis hasil sebagai JSON ke path ini")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="Batas absolut per metrik (JSON)")
+    parser.add_argument("--baseline", help="Hasil JSON run sebelumnya untuk pembandingan relatif")
+    parser.add_argument("--tolerance", type=float, default=BASELINE_TOLERANCE,
+                        help="Perlambatan relatif terhadap baseline yang masih diterima")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")  # AppTest tanpa runtime mencetak peringatan ScriptRunContext untuk tiap rerun
+    with tempfile.TemporaryDirectory(prefix="sambas-bench-") as target_dir:
+        isolated_store(target_dir)
+        metrics = run(args.sections)
+        env = environment()
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    violations = check_thresholds(metrics, thresholds)
+    if args.baseline:
+        with open(args.baseline) as f:
+            violations += check_baseline(metrics, json.load(f)["metrics"], args.tolerance)
+
+    print_report(metrics, violations)
+    if args.output:
+        report = {"environment": env, "sections": args.sections, "metrics": metrics,
+                  "thresholds": args.thresholds, "violations": violations, "passed": not violations}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# COMPILED RANDOM FOREST
+# =========================
+# Pipeline sklearn (ColumnTransformer + RandomForestRegressor) diratakan menjadi array NumPy.
+# Semua pohon digabung menjadi satu tabel node; anak dari daun adalah daun itu sendiri sehingga
+# traversal cukup diulang sebanyak kedalaman maksimum, tervektorisasi untuk semua pohon x baris.
+TREE_ARRAYS = ("children", "feature", "threshold", "value", "roots")
+PREDICT_CHUNK_ROWS = 1_024
+META_FILE = "meta.json"
+
+
+class CompiledForest:
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.numeric_columns = meta["numeric_columns"]
+        self.categoric_column = meta["categoric_column"]
+        self.categories = meta["categories"]
+        self.numeric_fill = np.asarray(meta["numeric_fill"], dtype=np.float64)
+        self.categoric_fill = meta["categoric_fill"]
+        self.max_depth = meta["max_depth"]
+        self.version = None  # diisi oleh artifact_store saat dimuat dari manifest
+        for name in TREE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # Setara dengan ColumnTransformer: imputasi mean + one-hot (kategori tak dikenal -> nol)
+    def transform(self, frame):
+        numeric = frame[self.numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        numeric = np.where(np.isnan(numeric), self.numeric_fill, numeric)
+        categoric = frame[self.categoric_column].fillna(self.categoric_fill).to_numpy()
+        onehot = categoric[:, None] == np.asarray(self.categories, dtype=object)[None, :]
+        # sklearn membandingkan fitur sebagai float32 terhadap threshold float64
+        return np.hstack([numeric, onehot]).astype(np.float32)
+
+    # Node daun yang dicapai setiap pohon, per chunk baris: (start, node berbentuk (n_trees, n_rows_chunk))
+    def _iter_leaves(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            chunk = X[start:start + PREDICT_CHUNK_ROWS]
+            n_rows = len(chunk)
+            # Layout feature-major: nilai fitur f baris r ada di posisi f * n_rows + r
+            flat = np.ascontiguousarray(chunk.T).ravel()
+            rows = np.arange(n_rows)
+            node = np.repeat(self.roots[:, None], n_rows, axis=1)
+            for _ in range(self.max_depth):
+                position = np.take(self.feature, node)
+                position *= n_rows
+                position += rows
+                go_right = np.take(flat, position) > np.take(self.threshold, node)
+                node *= 2
+                node += go_right
+                node = np.take(self.children, node)
+            yield start, node
+
+    # Output setiap pohon, bentuk (n_trees, n_rows)
+    def predict_trees_transformed(self, X):
+        out = np.empty((self.n_trees, len(X)), dtype=np.float64)
+        for start, node in self._iter_leaves(X):
+            out[:, start:start + node.shape[1]] = np.take(self.value, node)
+        return out
+
+    # Mean, std dan kuantil antar pohon (n_rows, 2 + len(quantiles)) langsung per chunk, tanpa
+    # membentuk array (n_trees, n_rows) penuh; nilai daun diambil dalam layout baris x pohon
+    def predict_summary_transformed(self, X, quantiles):
+        out = np.empty((len(X), 2 + len(quantiles)), dtype=np.float64)
+        for start, node in self._iter_leaves(X):
+            out[start:start + node.shape[1]] = summarize_rows(np.take(self.value, node.T), quantiles)
+        return out
+
+    def predict_transformed(self, X):
+        return self.predict_trees_transformed(X).mean(axis=0)
+
+    def predict_trees(self, frame):
+        return self.predict_trees_transformed(self.transform(frame))
+
+    def predict(self, frame):
+        return self.predict_transformed(self.transform(frame))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in TREE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in TREE_ARRAYS}
+        return cls(meta, arrays)
+
+
+# Ringkasan per baris dari blok (n_rows, n_trees): mean, std, lalu kuantil dengan interpolasi linear
+# (sama dengan np.quantile). Sort sepanjang sumbu terakhir jauh lebih cepat daripada np.quantile(axis=0).
+def summarize_rows(block, quantiles):
+    n_trees = block.shape[1]
+    position = np.asarray(quantiles, dtype=np.float64) * (n_trees - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, n_trees - 1)
+    fraction = position - lower
+    block = np.sort(block, axis=1)
+    mean = block.mean(axis=1)
+    std = np.sqrt(np.mean((block - mean[:, None]) ** 2, axis=1))
+    return np.column_stack([mean, std, block[:, lower] * (1 - fraction) + block[:, upper] * fraction])
+
+
+def compile_pipeline(pipeline):
+    prep, forest = pipeline[0], pipeline[-1]
+    (_, numeric_pipe, numeric_columns), (_, categoric_pipe, categoric_columns) = prep.transformers_[:2]
+    categoric_imputer = categoric_pipe.named_steps["imputer"]
+    onehot = categoric_pipe.named_steps["onehot"]
+
+    children, features, thresholds, values, roots = [], [], [], [], []
+    offset, max_depth = 0, 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        left = np.where(is_leaf, node_ids, tree.children_left)
+        right = np.where(is_leaf, node_ids, tree.children_right)
+        children.append(np.stack([left, right], axis=1) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        # children[node] = [kiri, kanan], disimpan rata agar indeks anak = 2 * node + ke_kanan
+        "children": np.concatenate(children).ravel().astype(np.intp),
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "value": np.concatenate(values).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.intp),
+    }
+    meta = {
+        "numeric_columns": list(numeric_columns),
+        "categoric_column": categoric_columns[0],
+        "categories": [str(c) for c in onehot.categories_[0]],
+        "numeric_fill": numeric_pipe.named_steps["imputer"].statistics_.tolist(),
+        "categoric_fill": str(categoric_imputer.statistics_[0]),
+        "max_depth": int(max_depth),
+        "n_nodes": int(offset),
+    }
+    return CompiledForest(meta, arrays)
+
+
+# sha256 pickle sumber yang dicatat di meta.json saat ekspor CLI; None untuk ekspor lama
+def exported_source(directory):
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            return json.load(f).get("source_sha256")
+    except FileNotFoundError:
+        return None
+
+
+def check_parity(pipeline, compiled, frame, atol=1e-9):
+    expected = pipeline.predict(frame)
+    actual = compiled.predict(frame)
+    return float(np.max(np.abs(expected - actual))) <= atol, expected, actual
+
+
+# Ekspor: python compiled_forest.py [model/rfr_cuaca.pkl] [model/rfr_cuaca_compiled]
+if __name__ == "__main__":
+    from features import FEATURE_COLUMNS
+    from predictor import COMPILED_MODEL_DIR, MODEL_PATH, load_pipeline
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else COMPILED_MODEL_DIR
+    pipeline = load_pipeline(model_path, compiled=False)
+    compiled = compile_pipeline(pipeline)
+    reference = pd.read_csv("readyForModeling.csv")[FEATURE_COLUMNS]
+    ok, expected, actual = check_parity(pipeline, compiled, reference)
+    if not ok:
+        sys.exit(f"Paritas gagal: selisih maksimum {np.max(np.abs(expected - actual)):.3e}")
+    from artifact_store import file_sha256
+
+    compiled.meta["source_sha256"] = file_sha256(model_path)
+    compiled.save(out_dir)
+    print(f"{compiled.n_trees} pohon, {compiled.meta['n_nodes']} node, kedalaman {compiled.max_depth} -> {out_dir}")
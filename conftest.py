@@ -0,0 +1,17 @@
+import os
+import shutil
+import tempfile
+
+# Tes berjalan atas salinan sementara artifact store (tanpa log monitoring & antrean pekerjaan), jadi store
+# di artifacts/ tidak pernah ditulis. STORE_DIR dibaca saat artifact_store diimpor, jadi dipasang di sini
+# sebelum modul tes diimpor.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEST_DIR = tempfile.mkdtemp(prefix="sambas-test-")
+shutil.copytree(os.path.join(ROOT, "artifacts"), os.path.join(TEST_DIR, "artifacts"),
+                ignore=shutil.ignore_patterns("monitoring", "jobs", "*.lock", ".*.tmp"))
+os.environ["SAMBAS_ARTIFACT_DIR"] = os.path.join(TEST_DIR, "artifacts")
+os.chdir(ROOT)  # path relatif repo (model/, readyForModeling.csv)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
@@ -0,0 +1,64 @@
+import pandas as pd
+
+# =========================
+# FEATURE SCHEMA
+# =========================
+# Urutan kolom sama dengan readyForModeling.csv (tanpa target Tavg)
+NUMERIC_FEATURES = ['RH_avg', 'RR', 'ss', 'ff_x', 'ddd_x', 'ff_avg']
+CATEGORIC_FEATURES = ['ddd_car']
+FEATURE_COLUMNS = NUMERIC_FEATURES + CATEGORIC_FEATURES
+TARGET_COLUMN = 'Tavg'
+
+# Batas nilai mengikuti st.number_input pada form prediksi di app.py
+FEATURE_BOUNDS = {
+    'RH_avg': (0.0, 100.0),
+    'RR': (0.0, 200.0),
+    'ss': (0.0, 24.0),
+    'ff_x': (0.0, 50.0),
+    'ddd_x': (0, 360),
+    'ff_avg': (0.0, 50.0),
+}
+DDD_CAR_OPTIONS = ['C', 'S', 'SE', 'E', 'NW', 'NE']
+
+
+def normalize_ddd_car(values):
+    # Ekspor BMKG (dan data latih model) menulis kode satu huruf dengan spasi di belakang ("C ")
+    return values.astype(str).str.strip().str.upper().str.ljust(2)
+
+
+MAX_REPORTED_ERRORS = 50
+
+
+# Validasi & normalisasi frame input, mengembalikan (frame_valid, jumlah_baris_invalid, contoh_error)
+def validate_frame(df):
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+
+    df = df.copy()
+    invalid = pd.Series(False, index=df.index)
+    errors = []
+    for col in NUMERIC_FEATURES:
+        values = pd.to_numeric(df[col], errors='coerce')
+        low, high = FEATURE_BOUNDS[col]
+        bad = values.isna() | (values < low) | (values > high)
+        for idx in df.index[bad & ~invalid][:MAX_REPORTED_ERRORS - len(errors)]:
+            errors.append((idx, f"{col}={df.at[idx, col]} di luar rentang {low}-{high}"))
+        invalid |= bad
+        df[col] = values.astype(float)
+
+    ddd_car = normalize_ddd_car(df['ddd_car'])
+    bad = ~ddd_car.isin([opt.ljust(2) for opt in DDD_CAR_OPTIONS])
+    for idx in df.index[bad & ~invalid][:MAX_REPORTED_ERRORS - len(errors)]:
+        errors.append((idx, f"ddd_car={df.at[idx, 'ddd_car']!r} tidak dikenal"))
+    invalid |= bad
+    df['ddd_car'] = ddd_car
+
+    return df[~invalid], int(invalid.sum()), errors
+
+
+# Frame satu baris dari nilai form; nilai sudah dibatasi oleh widget sehingga cukup dinormalisasi
+def build_input_frame(values):
+    frame = pd.DataFrame([values], columns=FEATURE_COLUMNS)
+    frame['ddd_car'] = normalize_ddd_car(frame['ddd_car'])
+    return frame
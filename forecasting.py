@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from features import TARGET_COLUMN
+from observations import DATE_COLUMN, STATION_COLUMN, load_history
+
+# =========================
+# FORECASTING
+# =========================
+# Model harian kedua yang mempertahankan indeks tanggal: dari lag & rata-rata bergulir hari-hari
+# sebelumnya diprediksi Tavg, RH_avg dan RR hari berikutnya (multi-output). Prakiraan beberapa hari
+# dibuat rekursif: hasil hari ke-h menjadi lag untuk hari ke-h+1.
+FORECAST_MODEL_PATH = "model/rfr_forecast.pkl"
+SERIES_COLUMNS = [TARGET_COLUMN, "RH_avg", "RR"]
+LAGS = (1, 2, 3, 7)
+WINDOWS = (3, 7, 14)
+# Jumlah hari terakhir yang cukup untuk menghitung semua fitur satu hari
+LOOKBACK = max(max(LAGS), max(WINDOWS))
+FORECAST_DAYS = 7
+TEST_FRACTION = 0.2
+
+
+def feature_names():
+    names = [f"{col}_lag{lag}" for col in SERIES_COLUMNS for lag in LAGS]
+    names += [f"{col}_mean{window}" for col in SERIES_COLUMNS for window in WINDOWS]
+    return names + ["doy_sin", "doy_cos"]
+
+
+FEATURE_NAMES = feature_names()
+
+
+def _season(dates):
+    angle = 2 * np.pi * (dates.dayofyear.to_numpy() - 1) / 365.25
+    return np.sin(angle), np.cos(angle)
+
+
+# Seri harian per stasiun dengan kalender lengkap (hari tanpa observasi bersih = NaN),
+# supaya lag 1 selalu berarti "kemarin", bukan "baris sebelumnya"
+def daily_series(observations):
+    frames = []
+    for station, group in observations.groupby(STATION_COLUMN):
+        daily = group.groupby(group[DATE_COLUMN].dt.normalize())[SERIES_COLUMNS].mean().asfreq("D")
+        frames.append(daily.assign(**{STATION_COLUMN: station}))
+    return pd.concat(frames).rename_axis(DATE_COLUMN)
+
+
+# Semua baris sekaligus dengan operasi jendela pandas (shift/rolling), tanpa loop per baris.
+# Fitur untuk tanggal t hanya memakai data sampai t-1.
+def lag_features(daily):
+    columns = {}
+    for col in SERIES_COLUMNS:
+        values = daily[col]
+        for lag in LAGS:
+            columns[f"{col}_lag{lag}"] = values.shift(lag)
+        previous = values.shift(1)
+        for window in WINDOWS:
+            columns[f"{col}_mean{window}"] = previous.rolling(window, min_periods=1).mean()
+    columns["doy_sin"], columns["doy_cos"] = _season(daily.index)
+    return pd.DataFrame(columns, index=daily.index)[FEATURE_NAMES]
+
+
+# Fitur satu hari dari LOOKBACK hari terakhir (array hari x kolom); hasilnya sama dengan lag_features
+def window_features(window, date):
+    lags = window[-np.array(LAGS)].T.ravel()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # jendela tanpa observasi -> NaN, seperti rolling()
+        means = np.stack([np.nanmean(window[-size:], axis=0) for size in WINDOWS], axis=1).ravel()
+    return np.concatenate([lags, means, np.ravel(_season(pd.DatetimeIndex([date])))])
+
+
+def training_frame(observations):
+    frames = []
+    for _, daily in daily_series(observations).groupby(STATION_COLUMN):
+        daily = daily.drop(columns=STATION_COLUMN)
+        frames.append(pd.concat([lag_features(daily), daily[SERIES_COLUMNS]], axis=1))
+    frame = pd.concat(frames).sort_index()
+    # Hanya hari dengan target lengkap dan minimal satu hari riwayat
+    return frame.dropna(subset=SERIES_COLUMNS + [f"{TARGET_COLUMN}_mean{LOOKBACK}"])
+
+
+# =========================
+# INCREMENTAL STATE
+# =========================
+class ForecastState:
+    # Hanya LOOKBACK hari terakhir yang disimpan; menambah satu hari = geser jendela satu baris
+    def __init__(self, window, last_date):
+        self.window = np.asarray(window, dtype=float)
+        self.last_date = pd.Timestamp(last_date)
+
+    @classmethod
+    def from_daily(cls, daily):
+        daily = daily[SERIES_COLUMNS].asfreq("D")
+        tail = daily.tail(LOOKBACK).to_numpy()
+        padding = np.full((LOOKBACK - len(tail), len(SERIES_COLUMNS)), np.nan)
+        return cls(np.vstack([padding, tail]), daily.index[-1])
+
+    def copy(self):
+        return ForecastState(self.window.copy(), self.last_date)
+
+    def append(self, date, values):
+        date = pd.Timestamp(date)
+        gap = (date - self.last_date).days
+        if gap <= 0:
+            raise ValueError(f"Tanggal {date:%Y-%m-%d} tidak setelah {self.last_date:%Y-%m-%d}")
+        rows = np.full((gap, len(SERIES_COLUMNS)), np.nan)
+        rows[-1] = values
+        self.window = np.vstack([self.window, rows])[-LOOKBACK:]
+        self.last_date = date
+
+    # Observasi baru (mis. hasil ingest) ditambahkan tanpa menghitung ulang riwayat
+    def update(self, daily):
+        daily = daily[daily.index > self.last_date]
+        for date, values in zip(daily.index, daily[SERIES_COLUMNS].to_numpy()):
+            self.append(date, values)
+        return len(daily)
+
+    def next_features(self):
+        return window_features(self.window, self.last_date + pd.Timedelta(days=1))
+
+
+class Forecaster:
+    def __init__(self, model):
+        self.model = model
+
+    def forecast(self, state, days=FORECAST_DAYS):
+        state = state.copy()
+        dates, rows = [], []
+        for _ in range(days):
+            date = state.last_date + pd.Timedelta(days=1)
+            features = pd.DataFrame([state.next_features()], columns=FEATURE_NAMES)
+            values = self.model.predict(features)[0]
+            values[SERIES_COLUMNS.index("RR")] = max(values[SERIES_COLUMNS.index("RR")], 0)
+            state.append(date, values)
+            dates.append(date)
+            rows.append(values)
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(dates, name=DATE_COLUMN), columns=SERIES_COLUMNS)
+
+
+# =========================
+# TRAINING
+# =========================
+def build_model():
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ('prep', SimpleImputer(strategy='mean')),
+        ('algo', RandomForestRegressor(n_estimators=200, min_samples_leaf=5, max_features=0.6,
+                                       n_jobs=-1, random_state=42))
+    ])
+
+
+# Split berdasarkan waktu: model dilatih pada hari-hari awal dan diuji pada TEST_FRACTION hari terakhir
+def time_split(frame, test_fraction=TEST_FRACTION):
+    dates = frame.index.unique().sort_values()
+    cutoff = dates[int(len(dates) * (1 - test_fraction))]
+    return frame[frame.index < cutoff], frame[frame.index >= cutoff]
+
+
+def evaluate(model, test):
+    actual = test[TARGET_COLUMN].to_numpy()
+    predicted = model.predict(test[FEATURE_NAMES])[:, SERIES_COLUMNS.index(TARGET_COLUMN)]
+    baseline = test[f"{TARGET_COLUMN}_lag1"].fillna(test[f"{TARGET_COLUMN}_mean{LOOKBACK}"]).to_numpy()
+    return {"mae": float(np.mean(np.abs(actual - predicted))),
+            "rmse": float(np.sqrt(np.mean((actual - predicted) ** 2))),
+            "persistence_mae": float(np.mean(np.abs(actual - baseline))),
+            "n_test": int(len(test)), "test_start": f"{test.index.min():%Y-%m-%d}"}
+
+
+def train_forecaster(observations=None):
+    observations = load_history() if observations is None else observations
+    frame = training_frame(observations)
+    train, test = time_split(frame)
+    model = build_model().fit(train[FEATURE_NAMES], train[SERIES_COLUMNS])
+    metrics = evaluate(model, test)
+    # Model akhir dilatih ulang pada seluruh riwayat
+    model = build_model().fit(frame[FEATURE_NAMES], frame[SERIES_COLUMNS])
+    return Forecaster(model), metrics
+
+
+def load_forecaster(path=FORECAST_MODEL_PATH):
+    from jcopml.utils import load_model
+
+    return Forecaster(load_model(path))
+
+
+def save_forecaster(forecaster, metrics=None, path=FORECAST_MODEL_PATH):
+    from jcopml.utils import save_model
+
+    folder, file_name = os.path.split(path)
+    save_model(forecaster.model, file_name, folder_name=folder or ".")
+    if metrics is not None:
+        with open(os.path.splitext(path)[0] + "_metrics.json", "w") as f:
+            json.dump(metrics, f, indent=2)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["train"]:
+        sys.exit("Pemakaian: python forecasting.py train")
+    forecaster, metrics = train_forecaster()
+    print(f"Uji (mulai {metrics['test_start']}, {metrics['n_test']} hari): MAE Tavg {metrics['mae']:.3f} °C, "
+          f"RMSE {metrics['rmse']:.3f} °C; baseline persistensi MAE {metrics['persistence_mae']:.3f} °C")
+    save_forecaster(forecaster, metrics)
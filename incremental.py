@@ -0,0 +1,146 @@
+import argparse
+import copy
+import sys
+import time
+
+import pandas as pd
+
+from features import FEATURE_COLUMNS, TARGET_COLUMN
+from observations import DATE_COLUMN
+
+# =========================
+# INCREMENTAL FOREST UPDATE
+# =========================
+# Pembaruan tanpa GridSearchCV: preprocessing dan hyperparameter versi aktif dipertahankan, forest ditambah
+# NEW_TREES pohon yang dilatih pada jendela data terbaru (warm_start), lalu pohon tertua dipensiunkan sehingga
+# jumlah pohon tetap (sliding window).
+# Validasi: holdout = baris sesudah trained_until versi aktif (paling banyak HOLDOUT_DAYS hari terakhir), jadi
+# tidak pernah dilihat versi aktif maupun pohon baru kandidat validasi. Bila MAE kandidat tidak lebih buruk dari
+# MAE versi aktif + TOLERANCE, pohon baru dilatih ulang pada jendela + holdout sebelum diterbitkan, sehingga
+# hari yang baru tiba langsung ikut masuk model.
+WINDOW_DAYS = 365
+HOLDOUT_DAYS = 30
+NEW_TREES = 20
+TOLERANCE = 0.02
+MIN_HOLDOUT_ROWS = 10
+
+
+# Pipeline sklearn (bukan forest terkompilasi) versi aktif dan entri manifest-nya: pickle sumber yang tercatat
+# di manifest, atau pickle model/ (entri None) bila store belum dibangun
+def load_source_pipeline(station=None):
+    from artifact_store import has_store, load_source_model, model_entry
+    from predictor import load_pipeline
+    from train import default_output
+
+    if not has_store():
+        return load_pipeline(default_output(station), compiled=False), None
+    entry = model_entry(station)
+    return load_source_model(entry), entry
+
+
+# Holdout [maks(trained_until + 1 hari, akhir - holdout + 1), akhir] dan jendela latih window_days hari sebelumnya
+def split_recent(data, trained_until, window_days=WINDOW_DAYS, holdout_days=HOLDOUT_DAYS):
+    data = data.sort_values(DATE_COLUMN)
+    end = data[DATE_COLUMN].max()
+    holdout_start = max(pd.Timestamp(trained_until) + pd.Timedelta(days=1), end - pd.Timedelta(days=holdout_days - 1))
+    window_start = holdout_start - pd.Timedelta(days=window_days)
+    window = data[(data[DATE_COLUMN] >= window_start) & (data[DATE_COLUMN] < holdout_start)]
+    return window, data[data[DATE_COLUMN] >= holdout_start]
+
+
+# Salinan pipeline dengan `new_trees` pohon baru dari (X, y); pohon tertua dibuang sampai tersisa `max_trees`
+def grow_and_retire(pipeline, X, y, new_trees=NEW_TREES, max_trees=None, random_state=None):
+    candidate = copy.deepcopy(pipeline)
+    forest = candidate[-1]
+    max_trees = max_trees or len(forest.estimators_)
+    # Preprocessing tidak di-fit ulang: pohon lama dan baru melihat kolom hasil transformasi yang sama
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + new_trees,
+                      random_state=forest.random_state if random_state is None else random_state)
+    forest.fit(candidate[:-1].transform(X), y)
+    retired = max(0, len(forest.estimators_) - max_trees)
+    forest.estimators_ = forest.estimators_[retired:]
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+    return candidate, retired
+
+
+def update(pipeline, data, trained_until, window_days=WINDOW_DAYS, holdout_days=HOLDOUT_DAYS, new_trees=NEW_TREES,
+           max_trees=None, tolerance=TOLERANCE):
+    from train import evaluate
+
+    if trained_until is None:
+        raise ValueError("Tanggal akhir data latih versi aktif tidak diketahui; holdout yang belum pernah dilihat "
+                         "tidak bisa ditentukan (isi --trained-until)")
+    window, holdout = split_recent(data, trained_until, window_days, holdout_days)
+    if window.empty or len(holdout) < MIN_HOLDOUT_ROWS:
+        raise ValueError(f"Data baru sesudah {trained_until} belum cukup untuk holdout: {len(holdout)} baris "
+                         f"(minimal {MIN_HOLDOUT_ROWS}), {len(window)} baris jendela latih")
+    # Seed dari tanggal terakhir: pohon baru berbeda di tiap pembaruan tetapi dapat direproduksi
+    seed = int(holdout[DATE_COLUMN].max().strftime("%Y%m%d"))
+    started = time.perf_counter()
+    validation, _ = grow_and_retire(pipeline, window[FEATURE_COLUMNS], window[TARGET_COLUMN], new_trees, max_trees, seed)
+    current = evaluate(pipeline, holdout[FEATURE_COLUMNS], holdout[TARGET_COLUMN])
+    metrics = evaluate(validation, holdout[FEATURE_COLUMNS], holdout[TARGET_COLUMN])
+    # Model yang diterbitkan: pohon baru yang sama, dilatih ulang dengan holdout ikut di dalam jendela
+    recent = pd.concat([window, holdout])
+    candidate, retired = grow_and_retire(pipeline, recent[FEATURE_COLUMNS], recent[TARGET_COLUMN], new_trees, max_trees, seed)
+    metrics.update({
+        "search": "incremental", "n_train": int(len(recent)), "update_seconds": time.perf_counter() - started,
+        "trees_added": new_trees, "trees_retired": retired, "n_trees": len(candidate[-1].estimators_),
+        "window_start": str(window[DATE_COLUMN].min().date()), "holdout_start": str(holdout[DATE_COLUMN].min().date()),
+        "holdout_end": str(holdout[DATE_COLUMN].max().date()), "current_holdout": current,
+        "base_trained_until": str(pd.Timestamp(trained_until).date()), "trained_until": str(holdout[DATE_COLUMN].max().date()),
+        "best_params": {key: value for key, value in candidate.get_params().items()
+                        if key in ("algo__n_estimators", "algo__max_depth", "algo__max_features", "algo__min_samples_leaf")},
+    })
+    metrics["accepted"] = metrics["mae"] <= current["mae"] * (1 + tolerance)
+    return candidate, metrics
+
+
+def describe(metrics):
+    current = metrics["current_holdout"]
+    return (f"+{metrics['trees_added']} pohon / -{metrics['trees_retired']} pohon dalam {metrics['update_seconds']:.2f} detik | "
+            f"data latih versi aktif s.d. {metrics['base_trained_until']} | "
+            f"holdout {metrics['holdout_start']}..{metrics['holdout_end']} ({metrics['n_test']} baris): "
+            f"MAE {current['mae']:.4f} -> {metrics['mae']:.4f}, R2 {current['r2']:.4f} -> {metrics['r2']:.4f}")
+
+
+def main(argv=None):
+    from train import default_output, load_training_data, save_outputs
+
+    parser = argparse.ArgumentParser(description="Perbarui forest versi aktif dengan data terbaru tanpa pencarian penuh.")
+    parser.add_argument("--station", default=None, help="ID stasiun (default: stasiun default)")
+    parser.add_argument("--window-days", type=int, default=WINDOW_DAYS, help="Panjang jendela data untuk pohon baru")
+    parser.add_argument("--holdout-days", type=int, default=HOLDOUT_DAYS, help="Hari terakhir maksimum yang dipakai sebagai holdout")
+    parser.add_argument("--trained-until", default=None,
+                        help="Tanggal akhir data latih versi aktif (default: dari manifest)")
+    parser.add_argument("--new-trees", type=int, default=NEW_TREES, help="Jumlah pohon baru")
+    parser.add_argument("--max-trees", type=int, default=None, help="Jumlah pohon setelah pensiun (default: jumlah saat ini)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Kenaikan MAE relatif yang masih diterima")
+    parser.add_argument("--force", action="store_true", help="Terbitkan meskipun MAE holdout memburuk")
+    parser.add_argument("--output", default=None, help="Path pickle (default sama dengan train.py)")
+    parser.add_argument("--no-publish", action="store_true", help="Jangan terbitkan versi baru ke artifact store")
+    args = parser.parse_args(argv)
+
+    pipeline, entry = load_source_pipeline(args.station)
+    data = load_training_data(station=args.station)
+    candidate, metrics = update(pipeline, data, args.trained_until or (entry or {}).get("trained_until"),
+                                args.window_days, args.holdout_days, args.new_trees, args.max_trees, args.tolerance)
+    metrics["base_version"] = entry["version"] if entry else None
+    print(describe(metrics))
+    if not (metrics["accepted"] or args.force):
+        print("Kandidat ditolak: MAE holdout lebih buruk dari versi aktif (pakai --force untuk tetap menerbitkan)")
+        return 1
+
+    output = args.output or default_output(args.station)
+    print(f"Metrik ditulis ke {save_outputs(candidate, output, 'incremental', len(data), {'incremental': metrics})}")
+    if not args.no_publish:
+        from artifact_store import publish_pipeline
+
+        version = publish_pipeline(candidate, source_path=output, metrics=metrics, station=args.station,
+                                   trained_until=metrics["trained_until"])
+        print(f"Versi model aktif{f' untuk {args.station}' if args.station else ''}: {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from features import NUMERIC_FEATURES, TARGET_COLUMN, normalize_ddd_car
+from observations import DATE_COLUMN, STATION_COLUMN, clean_observations, station_for_wmo
+
+# =========================
+# STREAMING INGESTION
+# =========================
+# Ekspor stasiun BMKG: baris 0 berisi ID WMO, baris 1 header kolom, lalu data harian,
+# dan 16 baris keterangan di bagian bawah (sama seperti header=1 dan data[:-16] di notebook).
+# Setiap tahap adalah generator, jadi memori hanya sebesar satu chunk + 16 baris lookahead.
+FOOTER_ROWS = 16
+CHUNK_ROWS = 10_000
+SOURCE_SUFFIXES = (".xlsx", ".csv")
+RAW_NUMERIC_COLUMNS = ["Tn", "Tx", TARGET_COLUMN] + NUMERIC_FEATURES
+HISTORY_COLUMNS = [DATE_COLUMN] + RAW_NUMERIC_COLUMNS + ["ddd_car", STATION_COLUMN]
+
+
+def history_schema():
+    import pyarrow as pa
+
+    return pa.schema([(DATE_COLUMN, pa.timestamp("ns"))]
+                     + [(col, pa.float64()) for col in RAW_NUMERIC_COLUMNS]
+                     + [("ddd_car", pa.string()), (STATION_COLUMN, pa.string())])
+
+
+def iter_raw_rows(path):
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            yield from csv.reader(f)
+        return
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_preamble(rows):
+    meta, header = next(rows), next(rows)
+    wmo_id = None
+    for cell in meta:
+        match = re.search(r"\d{5}", str(cell or ""))
+        if match:
+            wmo_id = match.group(0)
+            break
+    return wmo_id, [str(col).strip() for col in header]
+
+
+def drop_footer(rows, n=FOOTER_ROWS):
+    lookahead = deque()
+    for row in rows:
+        lookahead.append(row)
+        if len(lookahead) > n:
+            yield lookahead.popleft()
+
+
+def batched(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def to_frames(batches, header, station, stats):
+    for batch in batches:
+        stats["rows_in"] += len(batch)
+        frame = pd.DataFrame(batch, columns=header)
+        for col in RAW_NUMERIC_COLUMNS:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+        frame[DATE_COLUMN] = pd.to_datetime(frame[DATE_COLUMN], format="%d-%m-%Y", errors="coerce")
+        ddd_car = frame["ddd_car"].astype("string").str.strip()
+        frame["ddd_car"] = normalize_ddd_car(ddd_car).where(ddd_car.fillna("") != "")
+        frame[STATION_COLUMN] = station
+        yield frame
+
+
+def clean_frames(frames, stats):
+    for frame in frames:
+        cleaned = clean_observations(frame)[HISTORY_COLUMNS]
+        stats["rows_out"] += len(cleaned)
+        if len(cleaned):
+            yield cleaned
+
+
+# Tulis semua chunk sebagai row group dalam satu file Parquet (file sementara unik), lalu rename secara atomik
+def write_part(frames, out_path, stats):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from artifact_store import replace_atomically
+
+    def write(tmp_path):
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for frame in frames:
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                first, last = frame[DATE_COLUMN].min(), frame[DATE_COLUMN].max()
+                stats["min_date"] = first if stats["min_date"] is None else min(stats["min_date"], first)
+                stats["max_date"] = last if stats["max_date"] is None else max(stats["max_date"], last)
+
+    schema = history_schema()
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    replace_atomically(out_path, write)
+
+
+# Nama part = path sumber relatif terhadap root ingest tanpa ekstensi, per segmen disanitasi:
+# <root>/2023/sambas.xlsx -> 2023/sambas, jadi file bernama sama di direktori berbeda tidak bertabrakan
+def part_name(path, root):
+    relative = os.path.relpath(os.path.splitext(path)[0], root)
+    return "/".join(re.sub(r"[^\w.-]+", "_", segment) for segment in relative.split(os.sep))
+
+
+def source_name(path, root):
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def ingest_file(path, history_dir, station=None, chunk_rows=CHUNK_ROWS, root=None, registered=None):
+    from artifact_store import check_history_part, file_sha256
+
+    started = time.perf_counter()
+    root = root if root is not None else os.path.dirname(os.path.abspath(path))
+    stats = {"rows_in": 0, "rows_out": 0, "min_date": None, "max_date": None}
+    rows = iter_raw_rows(path)
+    wmo_id, header = read_preamble(rows)
+    station = station or station_for_wmo(wmo_id)
+    relative_path = f"{station}/{part_name(path, root)}.parquet"
+    source = source_name(path, root)
+    check_history_part(registered or {}, relative_path, source)
+    out_path = os.path.join(history_dir, relative_path)
+
+    frames = clean_frames(to_frames(batched(drop_footer(rows), chunk_rows), header, station, stats), stats)
+    write_part(frames, out_path, stats)
+    return {
+        "path": relative_path,
+        "source": source,
+        "station": station,
+        "rows": stats["rows_out"],
+        "rows_in": stats["rows_in"],
+        "min_date": stats["min_date"].isoformat() if stats["min_date"] is not None else None,
+        "max_date": stats["max_date"].isoformat() if stats["max_date"] is not None else None,
+        "sha256": file_sha256(out_path),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def find_sources(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(path)
+                  for name in names if name.lower().endswith(SOURCE_SUFFIXES) and not name.startswith("~$"))
+
+
+# Banyak file stasiun-tahun diproses paralel; manifest hanya ditulis sekali oleh proses induk
+def ingest(paths, station=None, workers=None, chunk_rows=CHUNK_ROWS, root=None):
+    from artifact_store import STORE_DIR, ArtifactError, has_store, read_manifest, register_history_parts
+
+    root = root if root is not None else os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    names = {}
+    for path in paths:
+        name = part_name(path, root)
+        if name in names:
+            raise ArtifactError(f"'{names[name]}' dan '{path}' akan ditulis ke part yang sama ({name}.parquet)")
+        names[name] = path
+    registered = (read_manifest().get("history") or {}).get("parts", {}) if has_store() else {}
+
+    history_dir = os.path.join(STORE_DIR, "history")
+    started = time.perf_counter()
+    if len(paths) == 1 or workers == 1:
+        parts = [ingest_file(p, history_dir, station, chunk_rows, root, registered) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(ingest_file, p, history_dir, station, chunk_rows, root, registered) for p in paths]
+            parts = [future.result() for future in futures]
+    register_history_parts(parts)
+    return parts, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest ekspor stasiun BMKG (.xlsx/.csv) ke riwayat kolumnar.")
+    parser.add_argument("path", help="File ekspor atau direktori berisi banyak file stasiun-tahun")
+    parser.add_argument("--station", help="ID stasiun (default: dari ID WMO di baris pertama file)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--no-aggregates", action="store_true", help="Jangan perbarui cache agregat Dashboard")
+    args = parser.parse_args(argv)
+
+    from artifact_store import ArtifactError
+
+    paths = find_sources(args.path)
+    if not paths:
+        sys.exit(f"Tidak ada file {'/'.join(SOURCE_SUFFIXES)} di '{args.path}'")
+    root = args.path if os.path.isdir(args.path) else os.path.dirname(os.path.abspath(args.path))
+    try:
+        parts, seconds = ingest(paths, args.station, args.workers, args.chunk_rows, root)
+    except ArtifactError as error:
+        sys.exit(str(error))
+    for part in parts:
+        print(f"{part['source']}: {part['rows_in']} baris mentah -> {part['rows']} bersih "
+              f"({part['rows_in'] / part['seconds']:,.0f} baris/detik) -> {part['path']}")
+    rows_in = sum(part["rows_in"] for part in parts)
+    print(f"Total {len(parts)} file, {rows_in:,} baris dalam {seconds:.2f} detik ({rows_in / seconds:,.0f} baris/detik)")
+
+    if not args.no_aggregates:
+        from aggregates import refresh
+
+        _, added = refresh()
+        print(f"Cache agregat: {added} observasi baru")
+
+
+if __name__ == "__main__":
+    main()
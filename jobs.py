@@ -0,0 +1,475 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+
+from artifact_store import STORE_DIR
+
+# =========================
+# JOB TABLE
+# =========================
+# Pekerjaan panjang (skor file batch, latih ulang model, pembaruan inkremental) dicatat di <store>/jobs/jobs.db (SQLite, WAL).
+# Semua proses aplikasi di host yang sama menambah dan membaca tabel yang sama; satu pekerja per host
+# (lihat WORKER) mengklaim pekerjaan antrean dalam transaksi IMMEDIATE tanpa melewati MAX_RUNNING.
+# Input dan hasil tiap pekerjaan disimpan di <store>/jobs/<id>/.
+JOBS_DIR = "jobs"
+DB_FILE = "jobs.db"
+RESULT_FILE = "result.csv"
+MAX_RUNNING = int(os.environ.get("SAMBAS_JOB_WORKERS", 1))
+# Pekerjaan berjalan memperbarui heartbeat; tanpa heartbeat selama STALE_SECONDS (proses mati) dibatalkan.
+# Pekerjaan yang tidak pernah diklaim dalam QUEUE_TTL_SECONDS juga dibatalkan.
+HEARTBEAT_SECONDS = 5
+STALE_SECONDS = 60
+QUEUE_TTL_SECONDS = int(os.environ.get("SAMBAS_JOB_QUEUE_TTL", 3600))
+POLL_SECONDS = 1.0
+KINDS = ("score", "train", "update")
+ACTIVE_STATUSES = ("queued", "running")
+STATUS_LABELS = {"queued": "Antre", "running": "Berjalan", "done": "Selesai", "failed": "Gagal", "cancelled": "Dibatalkan"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def jobs_path(name="", store_dir=STORE_DIR):
+    return os.path.join(store_dir, JOBS_DIR, name)
+
+
+def job_dir(job_id, store_dir=STORE_DIR):
+    return jobs_path(job_id, store_dir)
+
+
+# Koneksi per panggilan (sqlite3 tidak berbagi koneksi antar thread); autocommit, transaksi eksplisit
+def connect(store_dir=STORE_DIR):
+    os.makedirs(jobs_path(store_dir=store_dir), exist_ok=True)
+    conn = sqlite3.connect(jobs_path(DB_FILE, store_dir), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _row(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+# =========================
+# SUBMIT / QUERY / CANCEL
+# =========================
+# inputs: {nama file: isi bytes} yang disalin ke direktori pekerjaan sebelum pekerjaan masuk antrean
+def submit(kind, params, inputs=None, store_dir=STORE_DIR):
+    if kind not in KINDS:
+        raise ValueError(f"Jenis pekerjaan tidak dikenal: {kind}")
+    job_id = uuid.uuid4().hex[:12]
+    directory = job_dir(job_id, store_dir)
+    os.makedirs(directory, exist_ok=True)
+    for name, data in (inputs or {}).items():
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+    with closing(connect(store_dir)) as conn:
+        conn.execute("INSERT INTO jobs (id, kind, status, params, message, created) VALUES (?, ?, 'queued', ?, ?, ?)",
+                     (job_id, kind, json.dumps(params), "Menunggu slot pekerja", time.time()))
+    ensure_worker(store_dir)
+    return job_id
+
+
+# File diunggah disimpan apa adanya; ekstensi menentukan pembaca (CSV/XLSX) seperti batch.iter_input_chunks
+def submit_score(data, filename, station=None, store_dir=STORE_DIR):
+    input_name = "input" + os.path.splitext(filename)[1].lower()
+    return submit("score", {"station": station, "filename": filename, "input": input_name},
+                  {input_name: data}, store_dir)
+
+
+def submit_train(station=None, search="grid", test_size=0.3, n_iter=20, store_dir=STORE_DIR):
+    return submit("train", {"station": station, "search": search, "test_size": test_size, "n_iter": n_iter},
+                  store_dir=store_dir)
+
+
+def submit_update(station=None, new_trees=20, window_days=365, holdout_days=30, store_dir=STORE_DIR):
+    return submit("update", {"station": station, "new_trees": new_trees, "window_days": window_days,
+                             "holdout_days": holdout_days}, store_dir=store_dir)
+
+
+def get_job(job_id, store_dir=STORE_DIR):
+    with closing(connect(store_dir)) as conn:
+        return _row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def list_jobs(kind=None, limit=20, store_dir=STORE_DIR):
+    query, args = "SELECT * FROM jobs", []
+    if kind is not None:
+        query, args = query + " WHERE kind = ?", [kind]
+    with closing(connect(store_dir)) as conn:
+        rows = conn.execute(query + " ORDER BY created DESC LIMIT ?", args + [limit]).fetchall()
+    return [_row(row) for row in rows]
+
+
+# Antrean langsung dibatalkan; pekerjaan berjalan berhenti di titik periksa berikutnya (antar chunk/tahap)
+def cancel(job_id, store_dir=STORE_DIR):
+    now = time.time()
+    with closing(connect(store_dir)) as conn:
+        conn.execute("UPDATE jobs SET status = 'cancelled', message = 'Dibatalkan pengguna', finished = ? "
+                     "WHERE id = ? AND status = 'queued'", (now, job_id))
+        conn.execute("UPDATE jobs SET cancel_requested = 1, message = 'Menunggu titik henti...' "
+                     "WHERE id = ? AND status = 'running'", (job_id,))
+
+
+def cancel_stale(conn, now=None):
+    now = now or time.time()
+    stale = conn.execute("UPDATE jobs SET status = 'cancelled', finished = ?, "
+                         "error = 'Proses pekerja berhenti (tidak ada heartbeat)' "
+                         "WHERE status = 'running' AND heartbeat < ?", (now, now - STALE_SECONDS)).rowcount
+    expired = conn.execute("UPDATE jobs SET status = 'cancelled', finished = ?, "
+                           "error = 'Terlalu lama dalam antrean' "
+                           "WHERE status = 'queued' AND created < ?", (now, now - QUEUE_TTL_SECONDS)).rowcount
+    return stale + expired
+
+
+# Klaim sampai `slots` pekerjaan tertua tanpa melewati MAX_RUNNING di seluruh host
+def claim(conn, owner, slots, max_running=MAX_RUNNING):
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        running = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+        limit = min(slots, max_running - running)
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT ?", (max(limit, 0),))]
+        for job_id in ids:
+            conn.execute("UPDATE jobs SET status = 'running', owner = ?, started = ?, heartbeat = ?, "
+                         "message = 'Dimulai' WHERE id = ?", (owner, now, now, job_id))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return ids
+
+
+# =========================
+# JOB EXECUTION (proses pekerja)
+# =========================
+class JobContext:
+    def __init__(self, job_id, store_dir=STORE_DIR):
+        self.job_id = job_id
+        self.store_dir = store_dir
+        self.directory = job_dir(job_id, store_dir)
+        self.stopped = threading.Event()
+
+    def _execute(self, sql, args=()):
+        with closing(connect(self.store_dir)) as conn:
+            return conn.execute(sql, args)
+
+    # Heartbeat terpisah dari progres: fit forest tidak melapor progres tetapi prosesnya masih hidup
+    def _beat(self):
+        while not self.stopped.wait(HEARTBEAT_SECONDS):
+            self._execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'",
+                          (time.time(), self.job_id))
+
+    def __enter__(self):
+        threading.Thread(target=self._beat, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+
+    def checkpoint(self):
+        with closing(connect(self.store_dir)) as conn:
+            row = conn.execute("SELECT status, cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+        if row is None or row["status"] != "running" or row["cancel_requested"]:
+            raise JobCancelled()
+
+    def progress(self, fraction, message=None):
+        self._execute("UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat = ? "
+                      "WHERE id = ? AND status = 'running'", (min(max(fraction, 0.0), 1.0), message, time.time(), self.job_id))
+        self.checkpoint()
+
+    def finish(self, status, result=None, error=None, message=None):
+        # Hanya dari 'running': pekerjaan yang sudah dibatalkan sebagai stale tidak ditimpa
+        self._execute("UPDATE jobs SET status = ?, result = ?, error = ?, message = COALESCE(?, message), "
+                      "progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, finished = ? "
+                      "WHERE id = ? AND status = 'running'",
+                      (status, json.dumps(result) if result is not None else None, error, message, status,
+                       time.time(), self.job_id))
+
+
+def run_score(ctx, params):
+    from batch import score_file
+    from monitoring import log_predictions
+    from predictor import get_model
+
+    model = get_model(params["station"])
+    input_path = os.path.join(ctx.directory, params["input"])
+    total_bytes = max(os.path.getsize(input_path), 1)
+    is_excel = params["input"].endswith(".xlsx")
+
+    def on_progress(report):
+        fraction = 0.0 if is_excel else source.tell() / total_bytes
+        ctx.progress(fraction, f"{report.rows_total:,} baris diproses")
+
+    def on_chunk(valid, outputs):
+        dates = valid["Tanggal"] if "Tanggal" in valid.columns else None
+        log_predictions(valid, outputs, params["station"], getattr(model, "version", None), dates, "job")
+
+    ctx.progress(0.0, "Memproses file")
+    with open(input_path, "rb") as source, open(os.path.join(ctx.directory, RESULT_FILE), "w", newline="") as out:
+        report = score_file(model, source, params["filename"], out, on_progress=on_progress, on_chunk=on_chunk)
+    return {"file": RESULT_FILE if report.rows_scored else None, "rows_total": report.rows_total,
+            "rows_scored": report.rows_scored, "rows_invalid": report.rows_invalid,
+            "rows_per_second": report.rows_per_second, "errors": report.errors,
+            "model_version": getattr(model, "version", None)}
+
+
+# Pipeline yang sama dengan train.py (reproduksi 2-Modeling.ipynb); pickle & metrik disimpan di direktori
+# pekerjaan, versi baru diterbitkan ke artifact store dan dipakai registry model saat permintaan berikutnya
+def run_train(ctx, params):
+    import tempfile
+
+    from artifact_store import publish_pipeline
+    from train import default_output, load_training_data, save_outputs, train, trained_until
+
+    station = params["station"]
+    ctx.progress(0.05, "Memuat riwayat observasi")
+    data = load_training_data(station=station)
+    if data.empty:
+        raise ValueError(f"Tidak ada riwayat observasi untuk stasiun '{station}'")
+    ctx.progress(0.1, f"Melatih ({params['search']}, {len(data):,} baris)")
+    with tempfile.TemporaryDirectory(prefix="sambas-job-") as cache_dir:
+        # n_jobs=1: paralelisme dibatasi oleh jumlah pekerja antrean, bukan di dalam satu pekerjaan
+        model, metrics = train(data, params["test_size"], params["search"], 1, cache_dir, params["n_iter"])
+    ctx.progress(0.85, "Menyimpan model")
+    split = f"{round((1 - params['test_size']) * 100)}:{round(params['test_size'] * 100)}"
+    output = os.path.join(ctx.directory, os.path.basename(default_output(station)))
+    save_outputs(model, output, split, len(data), {split: metrics})
+    ctx.progress(0.9, "Menerbitkan versi model")
+    version = publish_pipeline(model, source_path=output, metrics=metrics, station=station,
+                               trained_until=trained_until(data))
+    return {"file": os.path.basename(output), "version": version, "metrics": metrics}
+
+
+# incremental.py: pohon baru dari data terbaru, diterbitkan hanya bila MAE holdout tidak memburuk.
+# Kandidat yang ditolak tetap tercatat sebagai hasil (version None) beserta metrik pembandingnya.
+def run_update(ctx, params):
+    from artifact_store import publish_pipeline
+    from incremental import load_source_pipeline, update
+    from train import default_output, load_training_data, save_outputs
+
+    station = params["station"]
+    ctx.progress(0.1, "Memuat versi aktif dan riwayat observasi")
+    pipeline, entry = load_source_pipeline(station)
+    data = load_training_data(station=station)
+    ctx.progress(0.3, f"Menumbuhkan {params['new_trees']} pohon baru")
+    candidate, metrics = update(pipeline, data, (entry or {}).get("trained_until"), params["window_days"],
+                                params["holdout_days"], params["new_trees"])
+    metrics["base_version"] = entry["version"] if entry else None
+    if not metrics["accepted"]:
+        return {"file": None, "version": None, "metrics": metrics}
+    ctx.progress(0.7, "Menyimpan model")
+    output = os.path.join(ctx.directory, os.path.basename(default_output(station)))
+    save_outputs(candidate, output, "incremental", len(data), {"incremental": metrics})
+    ctx.progress(0.8, "Menerbitkan versi model")
+    version = publish_pipeline(candidate, source_path=output, metrics=metrics, station=station,
+                               trained_until=metrics["trained_until"])
+    return {"file": os.path.basename(output), "version": version, "metrics": metrics}
+
+
+RUNNERS = {"score": run_score, "train": run_train, "update": run_update}
+
+
+# Titik masuk di proses pekerja (ProcessPoolExecutor); semua status ditulis ke tabel, tidak ada yang dikembalikan
+def run_job(job_id, store_dir=STORE_DIR):
+    job = get_job(job_id, store_dir)
+    with JobContext(job_id, store_dir) as ctx:
+        try:
+            result = RUNNERS[job["kind"]](ctx, job["params"])
+        except JobCancelled:
+            ctx.finish("cancelled", message="Dibatalkan pengguna")
+        except Exception as e:
+            traceback.print_exc()
+            ctx.finish("failed", error=f"{type(e).__name__}: {e}", message="Gagal")
+        else:
+            ctx.finish("done", result, message="Selesai")
+
+
+# =========================
+# WORKER
+# =========================
+# Pool proses hidup di proses pekerja tersendiri (`python jobs.py worker`), bukan di server Streamlit:
+# proses server tidak ikut mem-fork, dan proses spawn mengimpor jobs.py sebagai __main__ alih-alih app.py.
+# Satu pekerja per host (flock pada worker.lock); aplikasi menyalakannya bila belum ada dan pekerja
+# berhenti sendiri setelah WORKER_IDLE_SECONDS tanpa pekerjaan.
+WORKER_LOCK = "worker.lock"
+WORKER_LOG = "worker.log"
+WORKER_IDLE_SECONDS = int(os.environ.get("SAMBAS_JOB_WORKER_IDLE", 300))
+
+
+class Dispatcher:
+    def __init__(self, max_workers=MAX_RUNNING, store_dir=STORE_DIR):
+        self.max_workers = max_workers
+        self.store_dir = store_dir
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.futures = {}
+        self.executor = None
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    # Proses pool yang mati mendadak membuat pool rusak (BrokenProcessPool); pekerjaannya ditandai gagal
+    # dan pool dibuat ulang
+    def _reap(self):
+        for job_id, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[job_id]
+            error = future.exception()
+            if error is not None:
+                with closing(connect(self.store_dir)) as conn:
+                    conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? "
+                                 "WHERE id = ? AND status = 'running'", (f"{type(error).__name__}: {error}", time.time(), job_id))
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = None
+
+    # Batalkan yang stale, lalu klaim pekerjaan antrean sebanyak slot kosong
+    def poll(self):
+        self._reap()
+        with closing(connect(self.store_dir)) as conn:
+            cancel_stale(conn)
+            slots = self.max_workers - len(self.futures)
+            ids = claim(conn, self.owner, slots, self.max_workers) if slots > 0 else []
+            pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        for job_id in ids:
+            self.futures[job_id] = self._executor().submit(run_job, job_id, self.store_dir)
+        return bool(self.futures or pending)
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+def _lock_file(store_dir):
+    import fcntl
+
+    handle = open(jobs_path(WORKER_LOCK, store_dir), "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def worker_running(store_dir=STORE_DIR):
+    connect(store_dir).close()  # pastikan direktori jobs ada
+    handle = _lock_file(store_dir)
+    if handle is None:
+        return True
+    handle.close()
+    return False
+
+
+def serve(store_dir=STORE_DIR, idle_seconds=WORKER_IDLE_SECONDS):
+    connect(store_dir).close()
+    handle = _lock_file(store_dir)
+    if handle is None:
+        return False
+    dispatcher = Dispatcher(store_dir=store_dir)
+    idle_since = time.time()
+    try:
+        while True:
+            try:
+                if dispatcher.poll():
+                    idle_since = time.time()
+            except sqlite3.Error as e:
+                print(f"Pekerja antrean: {e}", file=sys.stderr, flush=True)
+            if idle_seconds and time.time() - idle_since > idle_seconds:
+                break
+            time.sleep(POLL_SECONDS)
+    finally:
+        dispatcher.stop()
+        handle.close()
+    return True
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+# Dipanggil aplikasi saat menambah/menampilkan pekerjaan; murah bila pekerja sudah hidup
+def ensure_worker(store_dir=STORE_DIR):
+    import subprocess
+
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.poll() is None:
+            return _worker
+        if worker_running(store_dir):
+            return None
+        env = dict(os.environ, SAMBAS_ARTIFACT_DIR=os.path.abspath(store_dir))
+        with open(jobs_path(WORKER_LOG, store_dir), "ab") as log:
+            _worker = subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker"], env=env,
+                                       stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                       start_new_session=True)
+        return _worker
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Antrean pekerjaan latar (skor batch, latih ulang)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker_parser = commands.add_parser("worker", help="Jalankan pekerja antrean untuk host ini")
+    worker_parser.add_argument("--idle", type=int, default=WORKER_IDLE_SECONDS,
+                               help="Berhenti setelah sekian detik tanpa pekerjaan (0 = tidak pernah)")
+    commands.add_parser("list", help="Tampilkan pekerjaan terbaru")
+    cancel_parser = commands.add_parser("cancel", help="Batalkan pekerjaan")
+    cancel_parser.add_argument("job_id")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        if not serve(idle_seconds=args.idle):
+            print("Pekerja lain sudah berjalan untuk antrean ini", file=sys.stderr)
+    elif args.command == "cancel":
+        cancel(args.job_id)
+    else:
+        for job in list_jobs():
+            print(f"{job['id']}  {job['kind']:<6} {job['status']:<10} {job['progress']:>5.0%}  {job['message'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("sambas.registry")
+
+# =========================
+# MODEL REGISTRY
+# =========================
+# Model per stasiun dimuat saat pertama diminta dan dipakai bersama oleh semua sesi di proses ini.
+# Dengan SAMBAS_USE_COMPILED=1 array forest dari artifact store di-memory-map, sehingga beberapa proses
+# worker yang memuat versi yang sama berbagi halaman memori lewat page cache OS. Model yang paling lama tidak dipakai
+# dikeluarkan bila total ukuran melewati anggaran memori.
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("SAMBAS_MODEL_MEMORY_MB", 256)) * 1024 * 1024)
+
+
+def model_nbytes(model):
+    from compiled_forest import TREE_ARRAYS, CompiledForest
+
+    if isinstance(model, CompiledForest):
+        return sum(getattr(model, name).nbytes for name in TREE_ARRAYS)
+    import pickle
+
+    from predictor import compiled_trees
+
+    # Pipeline sklearn ditambah forest terkompilasinya untuk interval prediksi (dibuat di sini, jadi ikut anggaran)
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) + model_nbytes(compiled_trees(model))
+
+
+# Versi aktif dari store dalam bentuk yang dipilih SAMBAS_USE_COMPILED (predictor.USE_COMPILED): forest
+# terkompilasi (array di-memory-map) bila 1, pipeline sklearn dari pickle sumber versi itu bila 0 (default,
+# lebih cepat untuk batch besar). Bila pickle sumber hilang atau berubah, forest terkompilasi yang dilayani.
+def load_serving_model(entry):
+    from artifact_store import ArtifactError, load_model, load_source_model
+    from predictor import USE_COMPILED
+
+    if USE_COMPILED:
+        return load_model(entry=entry)
+    try:
+        model = load_source_model(entry)
+    except (ArtifactError, OSError) as error:
+        logger.warning("Versi %s dilayani sebagai forest terkompilasi: %s", entry["version"], error)
+        return load_model(entry=entry)
+    model.version = entry["version"]
+    return model
+
+
+# Hasil prediksi versi lama di cache tidak akan dipakai lagi
+def _forget(model):
+    from prediction_cache import get_prediction_cache, model_fingerprint
+
+    get_prediction_cache().invalidate(model_fingerprint(model))
+
+
+class ModelRegistry:
+    def __init__(self, memory_budget_bytes=MEMORY_BUDGET_BYTES):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.models = OrderedDict()  # stasiun -> (versi, model, ukuran)
+        self.lock = threading.Lock()
+        self.station_locks = {}
+        self.loads = 0
+        self.swaps = 0
+        self.evictions = 0
+        self._manifest = None
+        self._manifest_mtime = None
+
+    # Manifest dibaca ulang hanya bila file-nya berubah (mis. versi baru diterbitkan train.py)
+    def _read_manifest(self):
+        from artifact_store import manifest_path, read_manifest
+
+        mtime = os.stat(manifest_path()).st_mtime_ns
+        if mtime != self._manifest_mtime:
+            self._manifest, self._manifest_mtime = read_manifest(), mtime
+        return self._manifest
+
+    def _station_lock(self, station):
+        with self.lock:
+            return self.station_locks.setdefault(station, threading.Lock())
+
+    def get(self, station=None):
+        from artifact_store import ArtifactError, has_store, model_entry
+        from observations import DEFAULT_STATION
+        from prediction_cache import pickle_fingerprint
+        from predictor import load_pipeline
+
+        station = station or DEFAULT_STATION
+        if has_store():
+            with self.lock:
+                entry = model_entry(station, manifest=self._read_manifest())
+        elif station == DEFAULT_STATION:
+            entry = None  # tanpa store hanya ada pickle lama untuk stasiun default
+        else:
+            raise ArtifactError(f"Belum ada model untuk stasiun '{station}'")
+
+        # Tanpa store versi = hash pickle, jadi pickle yang ditulis ulang ikut dimuat ulang (hot-swap)
+        version = entry["version"] if entry else pickle_fingerprint()
+        with self.lock:
+            cached = self.models.get(station)
+            if cached is not None and cached[0] == version:
+                self.models.move_to_end(station)
+                return cached[1]
+
+        # Pemuatan per stasiun diserialkan; stasiun lain tetap bisa dilayani
+        with self._station_lock(station):
+            with self.lock:
+                cached = self.models.get(station)
+                if cached is not None and cached[0] == version:
+                    return cached[1]
+            model = load_serving_model(entry) if entry else load_pipeline()
+            if entry is None:
+                model.version = version
+            size = model_nbytes(model)
+            with self.lock:
+                previous = self.models.pop(station, None)
+                self.models[station] = (version, model, size)
+                self.loads += 1
+                if previous is not None:
+                    # Hot-swap: sesi yang masih memegang model lama menyelesaikan requestnya dengan model itu
+                    self.swaps += 1
+                    logger.info("Model %s: %s -> %s", station, previous[0], version)
+                evicted = self._evict(keep=station)
+                loaded_versions = {loaded_version for loaded_version, _, _ in self.models.values()}
+            for old_version, old_model, _ in ([previous] if previous is not None else []) + evicted:
+                if old_version not in loaded_versions:
+                    _forget(old_model)
+            return model
+
+    def _evict(self, keep):
+        evicted = []
+        while self.memory_bytes() > self.memory_budget_bytes and len(self.models) > 1:
+            station = next(iter(self.models))
+            if station == keep:
+                self.models.move_to_end(station)
+                continue
+            evicted.append(self.models.pop(station))
+            self.evictions += 1
+            logger.info("Model %s (%s, %d byte) dikeluarkan dari registry", station, evicted[-1][0], evicted[-1][2])
+        return evicted
+
+    # Versi yang sama untuk beberapa stasiun memakai file (dan halaman mmap) yang sama, jadi dihitung sekali
+    def memory_bytes(self):
+        return sum({version: size for version, _, size in self.models.values()}.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                "loaded": {station: {"version": version, "bytes": size} for station, (version, _, size) in self.models.items()},
+                "memory_bytes": self.memory_bytes(), "memory_budget_bytes": self.memory_budget_bytes,
+                "loads": self.loads, "swaps": self.swaps, "evictions": self.evictions,
+            }
+
+
+# Stasiun yang bisa dipilih: yang punya model di store ditambah yang punya riwayat observasi
+def available_stations():
+    from artifact_store import has_store, read_manifest, station_models
+    from observations import DEFAULT_STATION
+
+    if not has_store():
+        return [DEFAULT_STATION]
+    stations = set(station_models())
+    history = read_manifest().get("history") or {}
+    stations.update(part["station"] for part in history.get("parts", {}).values())
+    stations.add(DEFAULT_STATION)
+    return [DEFAULT_STATION] + sorted(stations - {DEFAULT_STATION})
+
+
+_registry = ModelRegistry()
+
+
+def get_registry():
+    return _registry
@@ -0,0 +1,356 @@
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import STORE_DIR
+from features import CATEGORIC_FEATURES, DDD_CAR_OPTIONS, FEATURE_COLUMNS, TARGET_COLUMN
+from observations import DATE_COLUMN, DEFAULT_STATION, STATION_COLUMN
+
+# =========================
+# PREDICTION LOG
+# =========================
+# <store>/monitoring/predictions.jsonl: satu baris JSON per prediksi (input, output, versi model, tanggal
+# observasi yang diprediksi). Hanya ditambah di akhir file; satu batch ditulis dengan write() ber-O_APPEND,
+# jadi beberapa proses worker bisa menulis ke file yang sama.
+MONITORING_DIR = "monitoring"
+LOG_FILE = "predictions.jsonl"
+STATE_FILE = "state.json"
+STATE_LOCK_FILE = "state.lock"
+PREDICTION_FIELD = "Tavg_prediksi"
+
+_log_lock = threading.Lock()
+
+
+def monitoring_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, MONITORING_DIR, name)
+
+
+# Tanggal per baris sebagai "YYYY-MM-DD"; yang kosong/tidak terbaca dianggap hari ini
+def _date_strings(dates, n_rows):
+    today = date.today().isoformat()
+    if dates is None:
+        return [today] * n_rows
+    parsed = pd.Series(dates).reset_index(drop=True)
+    if not pd.api.types.is_datetime64_any_dtype(parsed):
+        # ISO (YYYY-MM-DD) atau format ekspor BMKG (dd-mm-YYYY)
+        text = parsed.astype(str)
+        parsed = pd.to_datetime(text, format="ISO8601", errors="coerce").fillna(
+            pd.to_datetime(text, format="%d-%m-%Y", errors="coerce"))
+    return parsed.dt.strftime("%Y-%m-%d").fillna(today).tolist()
+
+
+# frame: input tervalidasi (FEATURE_COLUMNS); outputs: (n, 4) dari predict_summary atau daftar nilai Tavg.
+# dates: tanggal observasi per baris (default hari ini), dipakai untuk menggabungkan dengan Tavg aktual.
+def log_predictions(frame, outputs, station=None, model_version=None, dates=None, source="app", store_dir=STORE_DIR):
+    outputs = np.asarray(outputs, dtype=np.float64).reshape(len(frame), -1)
+    records = frame[FEATURE_COLUMNS].reset_index(drop=True).assign(**{
+        "ts": round(time.time(), 3),
+        STATION_COLUMN: station or DEFAULT_STATION,
+        "model_version": model_version,
+        "source": source,
+        DATE_COLUMN: _date_strings(dates, len(frame)),
+        PREDICTION_FIELD: outputs[:, 0],
+    })
+    payload = records.to_json(orient="records", lines=True).encode()
+    if not payload.endswith(b"\n"):
+        payload += b"\n"
+    path = monitoring_path(LOG_FILE, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _log_lock:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    return len(records)
+
+
+# =========================
+# STREAMING SKETCHES
+# =========================
+# Semua ringkasan berukuran tetap: jendela WINDOW prediksi/pasangan terakhir, berapa pun panjang log.
+WINDOW = int(os.environ.get("SAMBAS_MONITOR_WINDOW", 500))
+MAX_PENDING = 10_000
+# Prediksi yang Tavg aktualnya belum masuk sekian hari setelah tanggalnya dianggap tidak terpasangkan dan
+# dibuang dari antrean; tanpa batas ini tanggal tertua antrean (awal jendela muat riwayat) tidak pernah maju
+PENDING_MAX_AGE_DAYS = int(os.environ.get("SAMBAS_MONITOR_PENDING_DAYS", 7))
+DRIFT_BINS = 10
+PSI_WARNING, PSI_ALERT = 0.1, 0.25
+# Dengan sedikit input PSI/KS didominasi noise sampling (10 bin, puluhan sampel -> PSI > 0.25 walau tanpa
+# drift); status baru diberikan setelah jendela berisi sekian input
+MIN_DRIFT_SAMPLES = min(int(os.environ.get("SAMBAS_MONITOR_MIN_DRIFT", 300)), WINDOW)
+
+
+class DriftSketch:
+    # Bin dari kuantil distribusi latih; yang disimpan hanya indeks bin WINDOW input terakhir
+    def __init__(self, edges, expected, categories=None, recent=()):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.expected = np.asarray(expected, dtype=np.float64)
+        self.categories = categories
+        self.recent = deque(recent, maxlen=WINDOW)
+
+    @classmethod
+    def from_reference(cls, values, categorical=False):
+        if categorical:
+            categories = [code.ljust(2) for code in DDD_CAR_OPTIONS]
+            counts = pd.Series(values).value_counts().reindex(categories, fill_value=0).to_numpy()
+            # Bin terakhir: kategori di luar daftar
+            return cls([], np.append(counts, 0) / max(counts.sum(), 1), categories)
+        values = np.asarray(values, dtype=np.float64)
+        # Kuantil kembar (mis. RR yang sebagian besar 0) digabung menjadi satu bin
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, DRIFT_BINS + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        return cls(edges, counts / counts.sum())
+
+    def bin_index(self, values):
+        if self.categories is not None:
+            lookup = {code: i for i, code in enumerate(self.categories)}
+            return [lookup.get(value, len(self.categories)) for value in values]
+        return np.searchsorted(self.edges, np.asarray(values, dtype=np.float64), side="right").tolist()
+
+    def update(self, values):
+        # Hanya WINDOW nilai terakhir yang bisa tersisa di jendela
+        self.recent.extend(self.bin_index(list(values)[-WINDOW:]))
+
+    def observed(self):
+        counts = np.bincount(np.fromiter(self.recent, dtype=np.int64), minlength=len(self.expected))
+        return counts / max(counts.sum(), 1)
+
+    # Population Stability Index; proporsi 0 diganti epsilon agar log terdefinisi
+    def psi(self):
+        if not self.recent:
+            return None
+        actual, expected = np.clip(self.observed(), 1e-4, None), np.clip(self.expected, 1e-4, None)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+    # Statistik Kolmogorov-Smirnov pada batas bin (pendekatan dari histogram)
+    def ks(self):
+        if not self.recent:
+            return None
+        return float(np.max(np.abs(np.cumsum(self.observed()) - np.cumsum(self.expected))))
+
+    def to_dict(self):
+        return {"edges": self.edges.tolist(), "expected": self.expected.tolist(),
+                "categories": self.categories, "recent": list(self.recent)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["edges"], data["expected"], data["categories"], data["recent"])
+
+
+class AccuracyWindow:
+    # Pasangan (aktual, prediksi) terakhir untuk satu versi model; diulang dari nol bila versi berganti
+    def __init__(self, model_version=None, actual=(), predicted=(), total=0):
+        self.model_version = model_version
+        self.actual = deque(actual, maxlen=WINDOW)
+        self.predicted = deque(predicted, maxlen=WINDOW)
+        self.total = total
+
+    def add(self, actual, predicted, model_version):
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self.actual.clear()
+            self.predicted.clear()
+            self.total = 0
+        self.actual.append(float(actual))
+        self.predicted.append(float(predicted))
+        self.total += 1
+
+    def metrics(self):
+        if not self.actual:
+            return None
+        actual, predicted = np.array(self.actual), np.array(self.predicted)
+        errors = actual - predicted
+        mse = float(np.mean(errors ** 2))
+        variance = float(np.var(actual))
+        return {"n": len(actual), "total": self.total, "model_version": self.model_version,
+                "mae": float(np.mean(np.abs(errors))), "rmse": mse ** 0.5, "bias": float(np.mean(errors)),
+                "r2": 1 - mse / variance if variance > 0 else None}
+
+    def to_dict(self):
+        return {"model_version": self.model_version, "actual": list(self.actual),
+                "predicted": list(self.predicted), "total": self.total}
+
+
+# =========================
+# MONITOR
+# =========================
+class StationMonitor:
+    def __init__(self, drift, accuracy=None, pending=None, logged=0, expired=0):
+        self.drift = drift
+        self.accuracy = accuracy or AccuracyWindow()
+        # Tanggal -> [prediksi, versi model]; prediksi terakhir untuk suatu tanggal yang dinilai
+        self.pending = pending or {}
+        self.logged = logged
+        # Jumlah prediksi yang kedaluwarsa tanpa pernah mendapat Tavg aktual
+        self.expired = expired
+
+    # Distribusi acuan: riwayat observasi bersih stasiun ini (data latih model)
+    @classmethod
+    def for_station(cls, station):
+        from observations import load_history
+
+        history = load_history(stations=[station], columns=FEATURE_COLUMNS)
+        if history.empty:
+            history = load_history(stations=[DEFAULT_STATION], columns=FEATURE_COLUMNS)
+        return cls({col: DriftSketch.from_reference(history[col], col in CATEGORIC_FEATURES) for col in FEATURE_COLUMNS})
+
+    def observe(self, records):
+        self.logged += len(records)
+        for col, sketch in self.drift.items():
+            sketch.update(records[col])
+        for day, predicted, version in zip(records[DATE_COLUMN], records[PREDICTION_FIELD], records["model_version"]):
+            self.pending.pop(day, None)
+            self.pending[day] = [float(predicted), version]
+        while len(self.pending) > MAX_PENDING:
+            self.pending.pop(min(self.pending))
+
+    def join(self, actuals):
+        matched = 0
+        for day, actual in actuals.items():
+            entry = self.pending.pop(day, None)
+            if entry is not None:
+                self.accuracy.add(actual, entry[0], entry[1])
+                matched += 1
+        return matched
+
+    # Buang prediksi bertanggal sebelum cutoff ("YYYY-MM-DD"); dipanggil setelah join, jadi tiap prediksi
+    # sempat dipasangkan sekali dengan riwayat yang sudah ada
+    def expire(self, cutoff):
+        stale = [day for day in self.pending if day < cutoff]
+        for day in stale:
+            del self.pending[day]
+        self.expired += len(stale)
+        return len(stale)
+
+    def summary(self):
+        drift = []
+        for col, sketch in self.drift.items():
+            psi, n = sketch.psi(), len(sketch.recent)
+            if psi is None or n < MIN_DRIFT_SAMPLES:
+                status = None
+            else:
+                status = "stabil" if psi < PSI_WARNING else "waspada" if psi < PSI_ALERT else "drift"
+            drift.append({"feature": col, "psi": psi, "ks": sketch.ks(), "n": n, "status": status})
+        return {"accuracy": self.accuracy.metrics(), "drift": drift, "drift_min_samples": MIN_DRIFT_SAMPLES,
+                "pending": len(self.pending), "expired": self.expired, "pending_max_age_days": PENDING_MAX_AGE_DAYS,
+                "logged": self.logged}
+
+    def to_dict(self):
+        return {"drift": {col: sketch.to_dict() for col, sketch in self.drift.items()},
+                "accuracy": self.accuracy.to_dict(), "pending": self.pending, "logged": self.logged,
+                "expired": self.expired}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({col: DriftSketch.from_dict(sketch) for col, sketch in data["drift"].items()},
+                   AccuracyWindow(**data["accuracy"]), data["pending"], data["logged"], data.get("expired", 0))
+
+
+class Monitor:
+    # offset: posisi byte log yang sudah diproses; update() hanya membaca baris setelahnya
+    def __init__(self, stations=None, offset=0, store_dir=STORE_DIR):
+        self.stations = stations or {}
+        self.offset = offset
+        self.store_dir = store_dir
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        try:
+            with open(monitoring_path(STATE_FILE, store_dir)) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(store_dir=store_dir)
+        stations = {station: StationMonitor.from_dict(data) for station, data in state["stations"].items()}
+        return cls(stations, state["offset"], store_dir)
+
+    def save(self):
+        from artifact_store import replace_atomically
+
+        def dump(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump({"offset": self.offset, "stations": {station: monitor.to_dict() for station, monitor in self.stations.items()}}, f)
+
+        path = monitoring_path(STATE_FILE, self.store_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        replace_atomically(path, dump)
+
+    def _read_new_records(self):
+        try:
+            with open(monitoring_path(LOG_FILE, self.store_dir), "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Baris terakhir yang belum lengkap (sedang ditulis proses lain) dibaca pada update berikutnya
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            return None
+        self.offset += len(complete)
+        records = pd.read_json(io.BytesIO(complete), lines=True, convert_dates=False, dtype={DATE_COLUMN: str})
+        records["model_version"] = records["model_version"].astype(object).where(records["model_version"].notna(), None)
+        return records
+
+    def _station(self, station):
+        if station not in self.stations:
+            self.stations[station] = StationMonitor.for_station(station)
+        return self.stations[station]
+
+    # Log baru -> sketch drift & antrean prediksi; lalu gabungkan antrean dengan Tavg aktual yang sudah masuk
+    # dan buang yang lebih dari PENDING_MAX_AGE_DAYS hari melewati tanggalnya. today: acuan umur (tes).
+    def update(self, today=None):
+        from observations import load_history
+
+        records = self._read_new_records()
+        if records is not None:
+            for station, group in records.groupby(STATION_COLUMN):
+                self._station(station).observe(group)
+        cutoff = (pd.Timestamp(today or date.today()) - pd.Timedelta(days=PENDING_MAX_AGE_DAYS)).strftime("%Y-%m-%d")
+        matched = expired = 0
+        for station, monitor in self.stations.items():
+            if not monitor.pending:
+                continue
+            # Hanya baris riwayat sejak tanggal tertua yang menunggu (filter tanggal di level Parquet)
+            since = pd.Timestamp(min(monitor.pending)) - pd.Timedelta(days=1)
+            actuals = load_history(since=since, stations=[station], columns=[DATE_COLUMN, TARGET_COLUMN])
+            matched += monitor.join(dict(zip(actuals[DATE_COLUMN].dt.strftime("%Y-%m-%d"), actuals[TARGET_COLUMN])))
+            expired += monitor.expire(cutoff)
+        return (0 if records is None else len(records)), matched, expired
+
+    def summary(self, station=None):
+        monitor = self.stations.get(station or DEFAULT_STATION)
+        return monitor.summary() if monitor is not None else None
+
+
+_monitor_lock = threading.Lock()
+
+
+# Dipanggil Dashboard/service: memproses bagian log yang baru saja lalu menyimpan state. Muat-ubah-simpan
+# dilakukan di bawah flock pada state.lock, jadi worker app dan service tidak memproses log yang sama dua kali
+# atau saling menimpa state.
+def refresh_monitor(store_dir=STORE_DIR):
+    from artifact_store import file_lock
+
+    with _monitor_lock, file_lock(monitoring_path(STATE_LOCK_FILE, store_dir)):
+        monitor = Monitor.load(store_dir)
+        new_records, matched, expired = monitor.update()
+        if new_records or matched or expired:
+            monitor.save()
+        return monitor
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["update"]:
+        sys.exit("Pemakaian: python monitoring.py update [stasiun]")
+    monitor = refresh_monitor()
+    print(json.dumps(monitor.summary(sys.argv[2] if len(sys.argv) > 2 else None), indent=2))
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from features import FEATURE_COLUMNS, TARGET_COLUMN
+
+# =========================
+# OBSERVATION HISTORY
+# =========================
+DATE_COLUMN = "Tanggal"
+STATION_COLUMN = "station"
+DEFAULT_STATION = "sambas"
+# ID WMO pada baris pertama ekspor BMKG -> ID stasiun aplikasi
+WMO_STATIONS = {"96535": DEFAULT_STATION}
+HISTORY_TABLE = "dataset"
+# Kode BMKG untuk data tidak terukur / tidak tersedia pada kolom curah hujan
+RR_SENTINELS = (8888, 9999)
+OBSERVATION_COLUMNS = [TARGET_COLUMN] + FEATURE_COLUMNS
+
+
+# Aturan pembersihan dari 2-Modeling.ipynb: dropna lalu buang nilai sentinel RR
+def clean_observations(frame):
+    frame = frame.dropna().reset_index(drop=True)
+    frame = frame[~frame["RR"].isin(RR_SENTINELS)]
+    if STATION_COLUMN not in frame.columns:
+        frame = frame.assign(**{STATION_COLUMN: DEFAULT_STATION})
+    return frame
+
+
+def station_for_wmo(wmo_id):
+    if wmo_id is None:
+        return DEFAULT_STATION
+    return WMO_STATIONS.get(wmo_id, f"wmo-{wmo_id}")
+
+
+# Riwayat bersih dari part Parquet hasil ingest.py; bila belum ada, dari tabel dataset lama.
+# `since`: hanya baris setelah tanggal ini, `until`: sampai dan termasuk tanggal ini; difilter di level
+# Parquet (row group di luar rentang dilewati)
+def load_history(since=None, stations=None, columns=None, until=None):
+    import pyarrow.dataset as ds
+
+    from artifact_store import history_files, load_table
+
+    files = history_files(stations)
+    if not files:
+        filters = [(DATE_COLUMN, ">", pd.Timestamp(since))] if since is not None else []
+        filters += [(DATE_COLUMN, "<=", pd.Timestamp(until))] if until is not None else []
+        frame = clean_observations(load_table(HISTORY_TABLE, filters=filters or None))
+        if stations is not None:
+            frame = frame[frame[STATION_COLUMN].isin(stations)]
+        return frame if columns is None else frame[columns]
+
+    expression = None
+    if since is not None:
+        expression = ds.field(DATE_COLUMN) > pd.Timestamp(since)
+    if until is not None:
+        before = ds.field(DATE_COLUMN) <= pd.Timestamp(until)
+        expression = before if expression is None else expression & before
+    table = ds.dataset(files, format="parquet").to_table(columns=columns, filter=expression)
+    return table.to_pandas()
@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from features import FEATURE_COLUMNS, NUMERIC_FEATURES, normalize_ddd_car
+
+# =========================
+# PREDICTION CACHE
+# =========================
+# Hasil prediksi per baris input, dengan kunci = nilai fitur yang dikuantisasi ke step widget form
+# (0.1 untuk desimal, 1 untuk ddd_x). Satu cache per proses, jadi dipakai bersama oleh semua sesi
+# Streamlit (dan request /predict di service.py). Nilai yang disimpan adalah ringkasan prediksi
+# (mean, std, low, high; lihat predictor.SUMMARY_COLUMNS). Versi model ikut di kunci sehingga model
+# beberapa stasiun bisa berbagi cache; saat registry mengganti/mengeluarkan sebuah versi, entri versi itu dibuang.
+QUANTIZATION_STEPS = {'RH_avg': 0.1, 'RR': 0.1, 'ss': 0.1, 'ff_x': 0.1, 'ddd_x': 1, 'ff_avg': 0.1}
+MAX_ENTRIES = int(os.environ.get("SAMBAS_PREDICTION_CACHE_SIZE", 4096))
+# Perkiraan overhead satu entri OrderedDict (slot hash + node linked list)
+ENTRY_OVERHEAD_BYTES = 100
+
+_STEPS = np.array([QUANTIZATION_STEPS[col] for col in NUMERIC_FEATURES])
+_model_hashes = {}  # path -> (mtime_ns, ukuran, fingerprint)
+_model_hashes_lock = threading.Lock()
+
+
+# Hash file pickle; dihitung ulang hanya bila mtime atau ukuran file berubah (mis. train.py menulis ulang)
+def pickle_fingerprint(path=None):
+    from artifact_store import file_sha256
+    from predictor import MODEL_PATH
+
+    path = path or MODEL_PATH
+    stat = os.stat(path)
+    with _model_hashes_lock:
+        cached = _model_hashes.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        cached = (stat.st_mtime_ns, stat.st_size, "pickle-" + file_sha256(path)[:12])
+        with _model_hashes_lock:
+            _model_hashes[path] = cached
+    return cached[2]
+
+
+# Versi artefak: dari manifest untuk model store, atau hash pickle yang ditempelkan registry saat memuat
+# pickle lama; model tanpa versi dianggap pickle default di MODEL_PATH
+def model_fingerprint(model):
+    version = getattr(model, "version", None)
+    if version is not None:
+        return version
+    return pickle_fingerprint()
+
+
+# Nilai numerik dibulatkan ke grid step; model memprediksi nilai yang sudah dibulatkan ini,
+# sehingga semua input dengan kunci yang sama memang menghasilkan prediksi yang sama
+def quantize(frame):
+    units = np.rint(frame[NUMERIC_FEATURES].to_numpy(dtype=float) / _STEPS).astype(np.int64)
+    snapped = frame.copy()
+    snapped[NUMERIC_FEATURES] = units * _STEPS
+    snapped['ddd_car'] = normalize_ddd_car(frame['ddd_car'])
+    keys = [tuple(row) + (car,) for row, car in zip(units.tolist(), snapped['ddd_car'])]
+    return snapped[FEATURE_COLUMNS], keys
+
+
+def _tuple_bytes(values):
+    return sys.getsizeof(values) + sum(sys.getsizeof(part) for part in values)
+
+
+def _entry_bytes(key, value):
+    return _tuple_bytes(key) + _tuple_bytes(value) + ENTRY_OVERHEAD_BYTES
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.memory_bytes = 0
+
+    def get_many(self, fingerprint, keys):
+        with self.lock:
+            found = {}
+            for key in keys:
+                value = self.entries.get((fingerprint, key))
+                if value is None:
+                    self.misses += 1
+                    continue
+                self.entries.move_to_end((fingerprint, key))
+                self.hits += 1
+                found[key] = value
+            return found
+
+    def put_many(self, fingerprint, items):
+        with self.lock:
+            for key, value in items:
+                entry_key = (fingerprint, key)
+                if entry_key in self.entries:
+                    self.entries.move_to_end(entry_key)
+                    continue
+                self.entries[entry_key] = value
+                self.memory_bytes += _entry_bytes(key, value)
+                while len(self.entries) > self.max_entries:
+                    (_, old_key), old_value = self.entries.popitem(last=False)
+                    self.memory_bytes -= _entry_bytes(old_key, old_value)
+                    self.evictions += 1
+
+    # Dipanggil registry saat versi model diganti (hot-swap) atau dikeluarkan
+    def invalidate(self, fingerprint):
+        with self.lock:
+            stale = [entry_key for entry_key in self.entries if entry_key[0] == fingerprint]
+            for entry_key in stale:
+                self.memory_bytes -= _entry_bytes(entry_key[1], self.entries.pop(entry_key))
+            if stale:
+                self.invalidations += 1
+            return len(stale)
+
+    # Hanya baris yang belum ada di cache yang dikirim ke `predict` (satu panggilan untuk semua miss);
+    # hasil berbentuk (n_rows, 4) seperti predictor.predict_summary
+    def predict(self, model, frame, predict=None):
+        if predict is None:
+            from predictor import predict_summary
+
+            predict = partial(predict_summary, model)
+        fingerprint = model_fingerprint(model)
+        snapped, keys = quantize(frame)
+        found = self.get_many(fingerprint, keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            computed = predict(snapped.iloc[missing])
+            new_items = [(keys[i], tuple(row)) for i, row in zip(missing, computed.tolist())]
+            found.update(new_items)
+            self.put_many(fingerprint, new_items)
+        return np.array([found[key] for key in keys])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memory_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+                "memory_bytes": self.memory_bytes, "models": sorted({fingerprint for fingerprint, _ in self.entries}),
+            }
+
+
+_cache = PredictionCache()
+
+
+def get_prediction_cache():
+    return _cache
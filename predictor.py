@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+import weakref
+
+# Modul berat (jcopml/sklearn, NumPy) baru diimpor saat model benar-benar dimuat
+
+# =========================
+# MODEL LOADING
+# =========================
+MODEL_PATH = "model/rfr_cuaca.pkl"
+COMPILED_MODEL_DIR = "model/rfr_cuaca_compiled"
+# SAMBAS_USE_COMPILED=1 -> inferensi memakai forest terkompilasi (NumPy murni) alih-alih pipeline sklearn,
+# baik untuk pickle lama maupun versi dari artifact store (model_registry.load_serving_model)
+USE_COMPILED = os.environ.get("SAMBAS_USE_COMPILED", "0") == "1"
+
+logger = logging.getLogger("sambas.predictor")
+
+# Pipeline sklearn -> forest terkompilasinya; entri hilang bersama pipeline (mis. dikeluarkan registry)
+_compiled_trees = weakref.WeakKeyDictionary()
+_compiled_lock = threading.Lock()
+
+
+# Jalur pemuatan model yang sama untuk app.py (Streamlit) dan service.py (HTTP). Hasil ekspor di
+# compiled_dir hanya dipakai bila meta.json-nya mencatat sha256 pickle yang sama (train.py menulis ulang
+# pickle tanpa mengekspor ulang); selain itu pickle dikompilasi ulang di memori.
+def load_pipeline(path=MODEL_PATH, compiled=USE_COMPILED, compiled_dir=COMPILED_MODEL_DIR):
+    from jcopml.utils import load_model  # Pastikan library jcopml terinstal
+    from compiled_forest import CompiledForest, compile_pipeline, exported_source
+
+    if not compiled:
+        return load_model(path)
+    if os.path.isdir(compiled_dir):
+        from artifact_store import file_sha256
+
+        if exported_source(compiled_dir) == file_sha256(path):
+            return CompiledForest.load(compiled_dir)
+        logger.warning("%s bukan ekspor dari %s (jalankan python compiled_forest.py); dikompilasi ulang", compiled_dir, path)
+    return compile_pipeline(load_model(path))
+
+
+# Model yang dilayani app & service untuk satu stasiun: versi aktif di artifact store (lihat SAMBAS_USE_COMPILED),
+# atau pickle lama bila store belum dibangun (python artifact_store.py build). Registry berbagi satu
+# salinan per stasiun untuk semua sesi, memuat ulang saat versi di manifest berganti (hot-swap) dan
+# mengeluarkan model yang jarang dipakai di luar anggaran memori (SAMBAS_MODEL_MEMORY_MB).
+def get_model(station=None):
+    from model_registry import get_registry
+
+    return get_registry().get(station)
+
+
+# =========================
+# PREDICTION + UNCERTAINTY
+# =========================
+# Rata-rata forest dihitung dari output tiap pohon; array yang sama (n_trees x n_rows) dipakai
+# untuk simpangan baku dan interval kuantil, jadi tidak ada inferensi tambahan
+INTERVAL_QUANTILES = (0.05, 0.95)
+SUMMARY_COLUMNS = ["mean", "std", "low", "high"]
+
+
+# Pipeline sklearn memakai array pohon hasil kompilasi (paritas diuji di compiled_forest) untuk
+# mendapatkan semua output pohon dalam satu traversal tervektorisasi; dikompilasi sekali per model
+def compiled_trees(model):
+    from compiled_forest import CompiledForest, compile_pipeline
+
+    if isinstance(model, CompiledForest):
+        return model
+    with _compiled_lock:
+        compiled = _compiled_trees.get(model)
+        if compiled is None:
+            compiled = _compiled_trees[model] = compile_pipeline(model)
+    return compiled
+
+
+def _tree_predictor(model):
+    from compiled_forest import CompiledForest
+
+    if isinstance(model, CompiledForest):
+        return model.transform, model
+    return model[:-1].transform, compiled_trees(model)
+
+
+# tree_outputs: (n_trees, n_rows) -> (n_rows, 4) dengan urutan SUMMARY_COLUMNS
+def summarize_trees(tree_outputs, quantiles=INTERVAL_QUANTILES):
+    from compiled_forest import PREDICT_CHUNK_ROWS, summarize_rows
+    import numpy as np
+
+    out = np.empty((tree_outputs.shape[1], 2 + len(quantiles)), dtype=np.float64)
+    for start in range(0, tree_outputs.shape[1], PREDICT_CHUNK_ROWS):
+        block = tree_outputs[:, start:start + PREDICT_CHUNK_ROWS].T
+        out[start:start + len(block)] = summarize_rows(block, quantiles)
+    return out
+
+
+# Hasil (n_rows, 4) dengan urutan SUMMARY_COLUMNS; ringkasan dihitung per chunk di dalam traversal
+def predict_summary(model, frame, quantiles=INTERVAL_QUANTILES):
+    preprocess, forest = _tree_predictor(model)
+    return forest.predict_summary_transformed(preprocess(frame), quantiles)
+
+
+# Sama dengan predict_summary, tetapi preprocessing, inferensi pohon dan ringkasan interval diukur terpisah
+def predict_staged(model, frame, timer):
+    preprocess, forest = _tree_predictor(model)
+    with timer.stage("preprocess"):
+        features = preprocess(frame)
+    with timer.stage("inference"):
+        tree_outputs = forest.predict_trees_transformed(features)
+    with timer.stage("interval"):
+        return summarize_trees(tree_outputs)
@@ -0,0 +1,113 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from features import CATEGORIC_FEATURES, DDD_CAR_OPTIONS, FEATURE_BOUNDS, FEATURE_COLUMNS, TARGET_COLUMN, normalize_ddd_car
+
+# =========================
+# WHAT-IF SWEEPS
+# =========================
+# Satu baris input (nilai form) diulang sebanyak titik grid, lalu satu atau dua fitur diganti
+# dengan nilai grid. Seluruh grid diprediksi dalam satu panggilan model.predict.
+SWEEP_POINTS = 200
+GRID_POINTS = 60
+IMPORTANCE_REPEATS = 5
+
+
+def sweep_values(feature, n_points=SWEEP_POINTS):
+    if feature in CATEGORIC_FEATURES:
+        return np.array(DDD_CAR_OPTIONS, dtype=object)
+    low, high = FEATURE_BOUNDS[feature]
+    if isinstance(low, int):
+        return np.unique(np.linspace(low, high, n_points).round().astype(int))
+    return np.linspace(low, high, n_points)
+
+
+def _grid_frame(base_values, columns):
+    n_rows = len(next(iter(columns.values())))
+    frame = pd.DataFrame({col: np.repeat(base_values[col], n_rows) for col in FEATURE_COLUMNS})
+    for col, values in columns.items():
+        frame[col] = values
+    frame['ddd_car'] = normalize_ddd_car(frame['ddd_car'])
+    return frame
+
+
+def sweep_1d(model, base_values, feature, n_points=SWEEP_POINTS):
+    values = sweep_values(feature, n_points)
+    predictions = model.predict(_grid_frame(base_values, {feature: values}))
+    return pd.DataFrame({feature: values, TARGET_COLUMN: predictions})
+
+
+# Hasil: matriks prediksi (len(y_values), len(x_values)) untuk heatmap
+def sweep_2d(model, base_values, x_feature, y_feature, n_points=GRID_POINTS):
+    x_values, y_values = sweep_values(x_feature, n_points), sweep_values(y_feature, n_points)
+    xx, yy = np.meshgrid(x_values, y_values)
+    predictions = model.predict(_grid_frame(base_values, {x_feature: xx.ravel(), y_feature: yy.ravel()}))
+    return x_values, y_values, predictions.reshape(len(y_values), len(x_values))
+
+
+# =========================
+# FEATURE IMPORTANCE
+# =========================
+# Permutation importance: kenaikan MSE bila satu fitur diacak. Bekerja untuk pipeline sklearn maupun
+# forest terkompilasi; semua pengulangan untuk satu fitur diprediksi dalam satu panggilan.
+def permutation_importance(model, observations, n_repeats=IMPORTANCE_REPEATS, random_state=42):
+    rng = np.random.default_rng(random_state)
+    X = observations[FEATURE_COLUMNS].reset_index(drop=True)
+    y = observations[TARGET_COLUMN].to_numpy()
+    baseline = float(np.mean((y - model.predict(X)) ** 2))
+    stacked = pd.concat([X] * n_repeats, ignore_index=True)
+    rows = []
+    for col in FEATURE_COLUMNS:
+        permuted = stacked.copy()
+        permuted[col] = np.concatenate([X[col].to_numpy()[rng.permutation(len(X))] for _ in range(n_repeats)])
+        errors = (np.tile(y, n_repeats) - model.predict(permuted)) ** 2
+        increases = errors.reshape(n_repeats, len(X)).mean(axis=1) - baseline
+        rows.append({"feature": col, "importance": float(increases.mean()), "std": float(increases.std())})
+    importance = pd.DataFrame(rows)
+    total = importance["importance"].clip(lower=0).sum()
+    importance["share"] = importance["importance"].clip(lower=0) / total if total else 0.0
+    return importance.sort_values("importance", ascending=False).reset_index(drop=True)
+
+
+# Dihitung sekali saat versi diterbitkan (artifact_store.publish_pipeline) atas riwayat stasiunnya;
+# None bila stasiun belum punya observasi
+def importance_records(model, station=None):
+    from observations import DEFAULT_STATION, load_history
+
+    observations = load_history(stations=[station or DEFAULT_STATION])
+    if observations.empty:
+        return None
+    return permutation_importance(model, observations).to_dict(orient="records")
+
+
+# Jalur baca (UI): hanya importance yang tersimpan di manifest untuk versi aktif; None bila belum dihitung
+def feature_importance(version, station=None):
+    from artifact_store import has_store, model_entry
+
+    if version is None or not has_store():
+        return None
+    entry = model_entry(station)
+    if entry.get("version") != version or not entry.get("importance"):
+        return None
+    return pd.DataFrame(entry["importance"])
+
+
+# Isi importance versi aktif yang diterbitkan sebelum importance dihitung saat publish:
+# python sensitivity.py importance [stasiun]
+def backfill_importance(station=None):
+    from artifact_store import set_model_entry
+    from model_registry import get_registry
+
+    model = get_registry().get(station)
+    records = importance_records(model, station)
+    set_model_entry(model.version, importance=records)
+    return model.version, records
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["importance"] or len(sys.argv) > 3:
+        sys.exit("Pemakaian: python sensitivity.py importance [stasiun]")
+    version, records = backfill_importance(sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Importance versi {version}:\n{pd.DataFrame(records or []).to_string(index=False)}")
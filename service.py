@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_BOUNDS, FEATURE_COLUMNS, DDD_CAR_OPTIONS, validate_frame
+from prediction_cache import get_prediction_cache, model_fingerprint, quantize
+from artifact_store import ArtifactError
+from model_registry import available_stations, get_registry
+from monitoring import log_predictions, refresh_monitor
+from observations import DEFAULT_STATION
+from predictor import INTERVAL_QUANTILES, get_model, predict_summary
+
+# Jalankan dengan: uvicorn service:app --host 0.0.0.0 --port 8000
+logger = logging.getLogger("sambas.service")
+
+# =========================
+# SETTINGS
+# =========================
+MAX_BATCH_ROWS = int(os.environ.get("SAMBAS_MAX_BATCH_ROWS", 10_000))
+BATCH_WAIT_SECONDS = float(os.environ.get("SAMBAS_BATCH_WAIT_MS", 2)) / 1000
+PREDICT_THREADS = int(os.environ.get("SAMBAS_PREDICT_THREADS", 2))
+LATENCY_WINDOW = 10_000
+
+
+# =========================
+# LATENCY STATS
+# =========================
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"count": 0, "p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(np.fromiter(self.samples, float), [50, 99]) * 1000
+        return {"count": self.count, "p50_ms": round(p50, 3), "p99_ms": round(p99, 3)}
+
+
+# =========================
+# MICRO-BATCHER
+# =========================
+class MicroBatcher:
+    # Request yang datang bersamaan digabung menjadi satu panggilan predict per tick (per model/stasiun)
+    def __init__(self, executor):
+        self.executor = executor
+        self.queue = asyncio.Queue()
+        self.task = None
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def predict(self, model, frame):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((model, frame, future))
+        return await future
+
+    async def _collect(self):
+        pending = [await self.queue.get()]
+        rows = len(pending[0][1])
+        deadline = time.perf_counter() + BATCH_WAIT_SECONDS
+        while rows < MAX_BATCH_ROWS:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(item)
+            rows += len(item[1])
+        return pending
+
+    async def _run(self):
+        while True:
+            pending = await self._collect()
+            groups = {}
+            for model, frame, future in pending:
+                groups.setdefault(id(model), (model, []))[1].append((frame, future))
+            for model, items in groups.values():
+                await self._predict_group(model, items)
+
+    async def _predict_group(self, model, items):
+        frames = [frame for frame, _ in items]
+        batch = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        self.batch_sizes.append(len(batch))
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(predict_summary, model), batch[FEATURE_COLUMNS])
+        except Exception as e:
+            logger.exception("Prediksi batch gagal")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        start = 0
+        for frame, future in items:
+            if not future.done():
+                future.set_result(predictions[start:start + len(frame)])
+            start += len(frame)
+
+
+# =========================
+# ASGI APP
+# =========================
+class PredictionService:
+    # Model diambil dari registry per request (?station=<id>), sehingga versi baru yang diterbitkan
+    # ke artifact store langsung dipakai tanpa restart
+    def __init__(self):
+        self.executor = None
+        self.batcher = None
+        self.latency = LatencyTracker()
+
+    async def startup(self):
+        self.executor = ThreadPoolExecutor(max_workers=PREDICT_THREADS, thread_name_prefix="predict")
+        model = await self._model(None)
+        self.batcher = MicroBatcher(self.executor)
+        self.batcher.start()
+        logger.info("Model %s dimuat", getattr(model, "version", None) or "pickle")
+
+    async def _model(self, station):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, get_model, station)
+
+    async def shutdown(self):
+        if self.batcher is not None:
+            await self.batcher.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            status, payload = await self._dispatch(scope, receive)
+            body = json.dumps(payload).encode()
+            await send({"type": "http.response.start", "status": status,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+            await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(self, scope, receive):
+        method, path = scope["method"], scope["path"].rstrip("/")
+        station = parse_qs(scope.get("query_string", b"").decode()).get("station", [None])[0]
+        if method == "GET" and path == "/health":
+            if self.batcher is None:
+                return 200, {"status": "loading", "model_version": None}
+            try:
+                model = await self._model(station)
+            except ArtifactError as e:
+                return 404, {"error": str(e)}
+            return 200, {"status": "ok", "station": station or DEFAULT_STATION,
+                         "model_version": getattr(model, "version", None)}
+        if method == "GET" and path == "/models":
+            return 200, {"stations": available_stations(), "registry": get_registry().stats()}
+        if method == "GET" and path == "/metrics":
+            sizes = self.batcher.batch_sizes if self.batcher is not None else ()
+            return 200, {"latency": self.latency.summary(),
+                         "mean_batch_rows": round(float(np.mean(sizes)), 2) if sizes else None,
+                         "prediction_cache": get_prediction_cache().stats()}
+        if method == "GET" and path == "/monitoring":
+            summary = await asyncio.get_running_loop().run_in_executor(self.executor, lambda: refresh_monitor().summary(station))
+            if summary is None:
+                return 404, {"error": f"Belum ada prediksi tercatat untuk stasiun '{station or DEFAULT_STATION}'"}
+            return 200, summary
+        if method == "GET" and path == "/schema":
+            return 200, {"features": FEATURE_COLUMNS, "bounds": FEATURE_BOUNDS, "ddd_car": DDD_CAR_OPTIONS}
+        if method != "POST" or path not in ("/predict", "/predict/batch"):
+            return 404, {"error": "Endpoint tidak ditemukan"}
+        if self.batcher is None:
+            return 503, {"error": "Model belum dimuat"}
+        try:
+            model = await self._model(station)
+        except ArtifactError as e:
+            return 404, {"error": str(e)}
+
+        started = time.perf_counter()
+        try:
+            payload = json.loads(await self._read_body(receive) or b"null")
+        except json.JSONDecodeError:
+            return 400, {"error": "Body harus berupa JSON"}
+        if path == "/predict":
+            rows = [payload] if isinstance(payload, dict) else None
+        else:
+            rows = payload.get("rows") if isinstance(payload, dict) else None
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return 400, {"error": "Format input tidak valid"}
+        if len(rows) > MAX_BATCH_ROWS:
+            return 413, {"error": f"Maksimal {MAX_BATCH_ROWS} baris per request"}
+
+        try:
+            frame, n_invalid, errors = validate_frame(pd.DataFrame.from_records(rows))
+        except ValueError as e:
+            return 422, {"error": str(e)}
+        if n_invalid:
+            return 422, {"error": f"{n_invalid} baris tidak valid",
+                         "details": [{"row": int(idx), "message": msg} for idx, msg in errors]}
+
+        if path == "/predict":
+            predictions = await self._predict_cached(model, frame.reset_index(drop=True))
+        else:
+            predictions = await self.batcher.predict(model, frame.reset_index(drop=True))
+        self.latency.record(time.perf_counter() - started)
+        self._log(frame, predictions, station, model)
+        # Baris ringkasan: mean, std, batas bawah & atas interval (predictor.SUMMARY_COLUMNS)
+        means = [round(max(float(row[0]), 0), 1) for row in predictions]
+        stds = [round(float(row[1]), 2) for row in predictions]
+        intervals = [[round(max(float(row[2]), 0), 1), round(max(float(row[3]), 0), 1)] for row in predictions]
+        interval_level = round(INTERVAL_QUANTILES[1] - INTERVAL_QUANTILES[0], 2)
+        if path == "/predict":
+            return 200, {"Tavg": means[0], "std": stds[0], "interval": intervals[0], "interval_level": interval_level}
+        return 200, {"predictions": means, "std": stds, "intervals": intervals, "interval_level": interval_level}
+
+    # Log pemantauan ditulis di thread executor tanpa ditunggu, jadi tidak menahan event loop maupun respons.
+    # Kolom Tanggal opsional per baris menandai hari yang diprediksi (default hari ini).
+    def _log(self, frame, predictions, station, model):
+        dates = frame["Tanggal"] if "Tanggal" in frame.columns else None
+        future = self.executor.submit(log_predictions, frame, predictions, station, getattr(model, "version", None), dates, "service")
+        future.add_done_callback(_log_failure)
+
+    # Satu baris: cek cache dulu, miss diteruskan ke micro-batcher
+    async def _predict_cached(self, model, frame):
+        cache = get_prediction_cache()
+        fingerprint = model_fingerprint(model)
+        snapped, keys = quantize(frame)
+        found = cache.get_many(fingerprint, keys)
+        if keys[0] in found:
+            return np.array([found[keys[0]]])
+        predictions = await self.batcher.predict(model, snapped)
+        cache.put_many(fingerprint, [(keys[0], tuple(predictions[0].tolist()))])
+        return predictions
+
+    async def _read_body(self, receive):
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        return b"".join(chunks)
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.warning("Prediksi tidak tercatat untuk pemantauan: %s", future.exception())
+
+
+app = PredictionService()
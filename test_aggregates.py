@@ -0,0 +1,69 @@
+import csv
+import os
+
+import pandas as pd
+import pytest
+
+from aggregates import AggregateCache, refresh, summarize
+from ingest import FOOTER_ROWS, ingest, iter_raw_rows
+from observations import load_history
+
+SOURCE = "dataset cuaca.xlsx"
+
+
+# Ekspor BMKG sintetis: baris data `rows` dari SOURCE di bawah ID WMO lain, dengan preamble & footer asli
+def write_export(path, wmo_id, select=slice(None)):
+    rows = list(iter_raw_rows(SOURCE))
+    meta, header, data, footer = rows[0], rows[1], rows[2:-FOOTER_ROWS], rows[-FOOTER_ROWS:]
+    meta = [str(cell).replace("96535", wmo_id) if cell is not None else "" for cell in meta]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows([meta, header] + [["" if cell is None else cell for cell in row]
+                                                  for row in data[select] + footer])
+    return path
+
+
+def assert_buckets_match_history(cache, station):
+    history = load_history(stations=[station])
+    for gran in ("daily", "monthly"):
+        expected = summarize(history, gran)
+        actual = cache.tables[gran].xs(station, level="station", drop_level=False)
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False)
+
+
+@pytest.fixture
+def refreshed():
+    refresh()  # cache store sudah mencakup semua part sebelum tes menambah part
+
+
+def test_refresh_adds_new_station(tmp_path, refreshed):
+    parts, _ = ingest([write_export(str(tmp_path / "baru" / "96999.csv"), "96999")], workers=1)
+    station = parts[0]["station"]
+    assert station == "wmo-96999"
+
+    cache, added = refresh()
+    assert added == parts[0]["rows"] > 0
+    assert cache.has_station(station)
+    assert_buckets_match_history(cache, station)
+    # Tersimpan: cache yang dimuat ulang sama dan tidak ada part yang tersisa untuk refresh berikutnya
+    assert_buckets_match_history(AggregateCache.load(), station)
+    assert refresh()[1] == 0
+
+
+def test_refresh_recomputes_backfilled_buckets(tmp_path, refreshed):
+    # Paruh kedua riwayat lebih dulu, lalu paruh pertama yang bertanggal sebelum observasi terakhir;
+    # batasnya di tengah bulan, jadi satu bucket bulanan tersentuh kedua part
+    late, _ = ingest([write_export(str(tmp_path / "akhir" / "96998.csv"), "96998", slice(200, None))], workers=1)
+    station = late[0]["station"]
+    refresh()
+    ingest([write_export(str(tmp_path / "awal" / "96998.csv"), "96998", slice(None, 200))], workers=1)
+
+    cache, added = refresh()
+    assert added > 0
+    assert_buckets_match_history(cache, station)
+    assert cache.tables["monthly"].xs(station, level="station")["n"].sum() == len(load_history(stations=[station]))
+
+
+def test_station_without_aggregates():
+    cache, _ = refresh(save=False)
+    assert not cache.has_station("wmo-00000")
@@ -0,0 +1,49 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from compiled_forest import META_FILE, TREE_ARRAYS, CompiledForest, check_parity, compile_pipeline
+from features import FEATURE_COLUMNS
+from predictor import COMPILED_MODEL_DIR, MODEL_PATH, load_pipeline
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _reference():
+    return pd.read_csv(os.path.join(ROOT, "readyForModeling.csv"))[FEATURE_COLUMNS]
+
+
+# Pickle yang di-commit, dikompilasi ulang maupun hasil ekspor di model/, harus memprediksi sama persis
+def test_check_parity_against_committed_pickle():
+    pipeline = load_pipeline(os.path.join(ROOT, MODEL_PATH), compiled=False)
+    reference = _reference()
+    for compiled in (compile_pipeline(pipeline), CompiledForest.load(os.path.join(ROOT, COMPILED_MODEL_DIR))):
+        ok, expected, actual = check_parity(pipeline, compiled, reference)
+        assert ok, abs(expected - actual).max()
+
+
+# Direktori ekspor hanya berisi array yang dimuat CompiledForest.load
+def test_compiled_dir_has_no_stale_arrays():
+    expected = {f"{name}.npy" for name in TREE_ARRAYS} | {META_FILE}
+    assert set(os.listdir(os.path.join(ROOT, COMPILED_MODEL_DIR))) == expected
+
+
+# Pickle yang dilatih ulang (di sini: forest dipangkas) tanpa ekspor ulang: ekspor lama tidak boleh dilayani
+def test_stale_export_is_not_served(tmp_path):
+    pipeline = load_pipeline(os.path.join(ROOT, MODEL_PATH), compiled=False)
+    compiled_dir = str(tmp_path / "compiled")
+    shutil.copytree(os.path.join(ROOT, COMPILED_MODEL_DIR), compiled_dir)
+    model_path = str(tmp_path / "rfr_cuaca.pkl")
+    shutil.copy(os.path.join(ROOT, MODEL_PATH), model_path)
+    assert isinstance(load_pipeline(model_path, compiled=True, compiled_dir=compiled_dir), CompiledForest)
+
+    pipeline[-1].estimators_ = pipeline[-1].estimators_[:10]
+    with open(model_path, "wb") as f:
+        pickle.dump(pipeline, f)
+    served = load_pipeline(model_path, compiled=True, compiled_dir=compiled_dir)
+    reference = _reference()
+    assert served.n_trees == 10
+    np.testing.assert_allclose(served.predict(reference), pipeline.predict(reference), atol=1e-9)
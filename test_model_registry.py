@@ -0,0 +1,61 @@
+import os
+import pickle
+
+from artifact_store import publish_model
+from compiled_forest import compile_pipeline
+from model_registry import ModelRegistry
+from prediction_cache import get_prediction_cache
+from predictor import MODEL_PATH, load_pipeline
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# Terbitkan forest yang dipangkas ke n_trees sebagai versi aktif stasiun uji (pickle sumber di tmp_path)
+def publish_pruned(tmp_path, station, n_trees):
+    pipeline = load_pipeline(os.path.join(ROOT, MODEL_PATH), compiled=False)
+    pipeline[-1].estimators_ = pipeline[-1].estimators_[:n_trees]
+    source_path = str(tmp_path / f"{station}-{n_trees}.pkl")
+    with open(source_path, "wb") as f:
+        pickle.dump(pipeline, f)
+    return publish_model(compile_pipeline(pipeline), source_path=source_path, station=station)
+
+
+def test_new_version_is_swapped_in(tmp_path):
+    registry = ModelRegistry()
+    old_version = publish_pruned(tmp_path, "wmo-97001", 5)
+    old_model = registry.get("wmo-97001")
+    assert old_model.version == old_version and registry.get("wmo-97001") is old_model
+    cache = get_prediction_cache()
+    cache.put_many(old_version, [((1,), (27.0, 0.1, 26.8, 27.2))])
+
+    new_version = publish_pruned(tmp_path, "wmo-97001", 6)
+    new_model = registry.get("wmo-97001")
+    assert new_version != old_version and new_model.version == new_version
+    assert len(new_model[-1].estimators_) == 6
+    stats = registry.stats()
+    assert (stats["loads"], stats["swaps"], stats["evictions"]) == (2, 1, 0)
+    assert stats["loaded"] == {"wmo-97001": {"version": new_version, "bytes": stats["memory_bytes"]}}
+    # Hasil prediksi versi lama dibuang dari cache
+    assert old_version not in cache.stats()["models"]
+
+
+def test_least_recently_used_station_is_evicted(tmp_path):
+    registry = ModelRegistry()
+    first_version = publish_pruned(tmp_path, "wmo-97002", 5)
+    publish_pruned(tmp_path, "wmo-97003", 6)
+    registry.get("wmo-97002")
+    # Anggaran cukup untuk satu model saja
+    registry.memory_budget_bytes = registry.stats()["memory_bytes"] + 1
+    get_prediction_cache().put_many(first_version, [((2,), (27.0, 0.1, 26.8, 27.2))])
+
+    registry.get("wmo-97003")
+    stats = registry.stats()
+    assert list(stats["loaded"]) == ["wmo-97003"]
+    assert (stats["loads"], stats["swaps"], stats["evictions"]) == (2, 0, 1)
+    assert first_version not in get_prediction_cache().stats()["models"]
+
+    # Stasiun yang dikeluarkan dimuat ulang saat diminta lagi, dan giliran stasiun lain yang keluar
+    assert registry.get("wmo-97002").version == first_version
+    stats = registry.stats()
+    assert list(stats["loaded"]) == ["wmo-97002"]
+    assert (stats["loads"], stats["evictions"]) == (3, 2)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+import observations
+from monitoring import PENDING_MAX_AGE_DAYS, Monitor, log_predictions
+from observations import DEFAULT_STATION, load_history
+
+TODAY = "2024-07-10"  # riwayat sambas di store tes: 2023-07-01 .. 2024-06-30
+
+
+def log_days(store_dir, days):
+    frame = load_history(stations=[DEFAULT_STATION]).head(len(days))
+    log_predictions(frame, [27.0] * len(days), station=DEFAULT_STATION, model_version="v-test", dates=days,
+                    store_dir=store_dir)
+
+
+def test_unmatched_prediction_expires(tmp_path, monkeypatch):
+    # Catat awal jendela muat riwayat yang diminta tiap update() (bukan muat distribusi acuan tanpa since)
+    windows = []
+
+    def spy(since=None, **kwargs):
+        if since is not None:
+            windows.append(since)
+        return load_history(since=since, **kwargs)
+
+    monkeypatch.setattr(observations, "load_history", spy)
+    # 2024-06-20 punya Tavg aktual, 2023-01-15 tidak pernah (sebelum riwayat), 2024-07-08 belum masuk
+    log_days(tmp_path, ["2024-06-20", "2023-01-15", "2024-07-08"])
+    monitor = Monitor(store_dir=tmp_path)
+    assert monitor.update(today=TODAY) == (3, 1, 1)
+    assert windows == [pd.Timestamp("2023-01-14")]
+    assert list(monitor.stations[DEFAULT_STATION].pending) == ["2024-07-08"]
+
+    monitor.save()
+    monitor = Monitor.load(tmp_path)
+    summary = monitor.summary()
+    assert (summary["pending"], summary["expired"], summary["accuracy"]["n"]) == (1, 1, 1)
+
+    # Prediksi lama yang tak terpasangkan tidak lagi menarik jendela ke 2023
+    log_days(tmp_path, ["2024-07-09"])
+    assert monitor.update(today=TODAY) == (1, 0, 0)
+    assert windows[-1] == pd.Timestamp("2024-07-07")
+
+    # Setelah PENDING_MAX_AGE_DAYS hari tanpa Tavg aktual, sisanya ikut kedaluwarsa
+    later = pd.Timestamp("2024-07-09") + pd.Timedelta(days=PENDING_MAX_AGE_DAYS + 1)
+    assert monitor.update(today=later) == (0, 0, 2)
+    assert monitor.summary()["expired"] == 3
+    assert not monitor.stations[DEFAULT_STATION].pending
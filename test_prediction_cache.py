@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS
+from prediction_cache import PredictionCache, quantize
+
+
+def frame(*rows):
+    return pd.DataFrame([dict(zip(FEATURE_COLUMNS, row)) for row in rows])
+
+
+# Nilai dalam satu step widget (0.1; ddd_x: 1) dan penulisan ddd_car yang berbeda memberi kunci yang sama
+def test_quantize_keys():
+    snapped, keys = quantize(frame(
+        (85.04, 0.0, 6.12, 4.96, 180.4, 2.0, "c"),
+        (84.96, 0.04, 6.08, 5.03, 179.6, 1.96, " C "),
+        (85.06, 0.0, 6.1, 5.0, 180.0, 2.0, "C"),
+        (85.0, 0.0, 6.1, 5.0, 181.0, 2.0, "NW"),
+    ))
+    assert keys[0] == keys[1] == (850, 0, 61, 50, 180, 20, "C ")
+    assert keys[2] == (851, 0, 61, 50, 180, 20, "C ")
+    assert keys[3] == (850, 0, 61, 50, 181, 20, "NW")
+    assert list(snapped.columns) == FEATURE_COLUMNS
+    np.testing.assert_allclose(snapped.loc[0, ["RH_avg", "ss", "ddd_x"]].astype(float), [85.0, 6.1, 180.0])
+    assert snapped["ddd_car"].tolist() == ["C ", "C ", "C ", "NW"]
+
+
+# Model hanya dipanggil untuk kunci yang belum ada, dengan nilai yang sudah dibulatkan
+def test_predict_reuses_quantized_rows():
+    calls = []
+
+    def predict(snapped):
+        calls.append(snapped)
+        return np.column_stack([snapped["RH_avg"].to_numpy(), np.zeros((len(snapped), 3))])
+
+    cache = PredictionCache(max_entries=2)
+    first = cache.predict(None, frame((85.04, 0, 6, 5, 180, 2, "C"), (84.96, 0, 6, 5, 180, 2, "C ")), predict)
+    assert len(calls) == 1 and calls[0]["RH_avg"].tolist() == [85.0, 85.0]
+    np.testing.assert_allclose(first[:, 0], [85.0, 85.0])
+    assert (cache.stats()["hits"], cache.stats()["misses"], cache.stats()["entries"]) == (0, 2, 1)
+
+    cache.predict(None, frame((85.01, 0, 6, 5, 180, 2, "c")), predict)
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+
+    # max_entries=2: entri yang paling lama tidak dipakai dikeluarkan
+    cache.predict(None, frame((70, 0, 6, 5, 180, 2, "C"), (60, 0, 6, 5, 180, 2, "C")), predict)
+    assert len(calls) == 2 and len(calls[1]) == 2
+    assert (cache.stats()["entries"], cache.stats()["evictions"]) == (2, 1)
@@ -0,0 +1,37 @@
+import asyncio
+import json
+
+from service import PredictionService
+
+
+# Satu request HTTP langsung ke aplikasi ASGI (tanpa server), dengan lifespan startup/shutdown di sekelilingnya
+def request(method, path, query=b"", body=b""):
+    async def run():
+        service = PredictionService()
+        await service.startup()
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        try:
+            await service({"type": "http", "method": method, "path": path, "query_string": query}, receive, send)
+        finally:
+            await service.shutdown()
+        return messages[0]["status"], json.loads(messages[1]["body"])
+
+    return asyncio.run(run())
+
+
+def test_health_reports_model_version():
+    status, payload = request("GET", "/health")
+    assert status == 200 and payload["status"] == "ok" and payload["model_version"]
+
+
+def test_health_unknown_station_is_404():
+    status, payload = request("GET", "/health", b"station=nope")
+    assert status == 404
+    assert "nope" in payload["error"]
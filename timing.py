@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+# =========================
+# STRUCTURED PERF LOG
+# =========================
+# Set SAMBAS_PERF_LOG=/path/perf.jsonl untuk menyimpan satu baris JSON per prediksi
+perf_logger = logging.getLogger("sambas.perf")
+PERF_LOG_PATH = os.environ.get("SAMBAS_PERF_LOG")
+if PERF_LOG_PATH and not perf_logger.handlers:
+    _handler = logging.FileHandler(PERF_LOG_PATH)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    perf_logger.addHandler(_handler)
+    perf_logger.setLevel(logging.INFO)
+    perf_logger.propagate = False
+
+
+class StageTimer:
+    # Mencatat durasi tiap tahap (detik) sesuai urutan eksekusi
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, stage_name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage_name] = self.stages.get(stage_name, 0.0) + time.perf_counter() - started
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_record(self, **extra):
+        return {
+            "event": self.name,
+            "ts": time.time(),
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            "total_ms": round(self.total * 1000, 3),
+            **extra,
+        }
+
+    def log(self, **extra):
+        perf_logger.info(json.dumps(self.as_record(**extra)))
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from features import CATEGORIC_FEATURES, FEATURE_COLUMNS, NUMERIC_FEATURES, TARGET_COLUMN
+from predictor import MODEL_PATH
+
+# =========================
+# TRAINING CLI
+# =========================
+# Mereproduksi pipeline 2-Modeling.ipynb (num_pipe/cat_pipe + RandomForestRegressor + GridSearchCV).
+# Paralelisme hanya di satu level: --n-jobs untuk pencarian, forest di dalamnya n_jobs=1,
+# sehingga core tidak over-subscribed seperti GridSearchCV(n_jobs=-1) berisi RF(n_jobs=-1).
+METRICS_PATH = "model/metrics.json"
+RANDOM_STATE = 42
+CV_FOLDS = 3
+SEARCHES = ("grid", "halving", "random")
+
+
+def build_pipeline(memory=None):
+    from jcopml.pipeline import cat_pipe, num_pipe
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+
+    preprocessor = ColumnTransformer([
+        ('numeric', num_pipe(impute='mean'), NUMERIC_FEATURES),
+        ('categoric', cat_pipe(encoder='onehot'), CATEGORIC_FEATURES),
+    ])
+    # memory=: preprocessing yang sudah di-fit di-cache per fold, dipakai ulang oleh semua kombinasi parameter
+    return Pipeline([
+        ('prep', preprocessor),
+        ('algo', RandomForestRegressor(n_jobs=1, random_state=RANDOM_STATE))
+    ], memory=memory)
+
+
+def build_search(pipeline, search, n_jobs, n_iter=20):
+    from jcopml.tuning import grid_search_params as gsp
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+
+    if search == "grid":
+        return GridSearchCV(pipeline, gsp.rf_params, cv=CV_FOLDS, n_jobs=n_jobs)
+    if search == "random":
+        return RandomizedSearchCV(pipeline, gsp.rf_params, n_iter=n_iter, cv=CV_FOLDS, n_jobs=n_jobs,
+                                  random_state=RANDOM_STATE)
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+
+    # Successive halving dengan jumlah pohon sebagai resource: kandidat lemah dibuang
+    # setelah dievaluasi dengan forest kecil, hanya sisanya yang dilatih sampai 200 pohon
+    param_grid = {key: values for key, values in gsp.rf_params.items() if key != 'algo__n_estimators'}
+    max_trees = max(gsp.rf_params['algo__n_estimators'])
+    return HalvingGridSearchCV(pipeline, param_grid, resource='algo__n_estimators', min_resources=25,
+                               max_resources=max_trees, factor=2, cv=CV_FOLDS, n_jobs=n_jobs,
+                               random_state=RANDOM_STATE)
+
+
+# Metrik uji yang sama untuk train.py, pembaruan inkremental dan metrik Dashboard (aggregates.model_metrics)
+def evaluate(model, X, y):
+    residuals = y.to_numpy() - model.predict(X)
+    mse = float(np.mean(residuals ** 2))
+    return {"r2": 1 - mse / float(np.var(y.to_numpy())), "mae": float(np.mean(np.abs(residuals))),
+            "rmse": mse ** 0.5, "mse": mse, "n_test": int(len(y))}
+
+
+def train(data, test_size, search="grid", n_jobs=-1, cache_dir=None, n_iter=20):
+    from joblib import Memory
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(data[FEATURE_COLUMNS], data[TARGET_COLUMN],
+                                                        test_size=test_size, random_state=RANDOM_STATE)
+    memory = Memory(cache_dir, verbose=0) if cache_dir else None
+    model = build_search(build_pipeline(memory), search, n_jobs, n_iter)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    best = model.best_estimator_
+    best.set_params(memory=None, algo__n_jobs=-1)  # seperti artefak notebook: prediksi memakai semua core
+    metrics = evaluate(best, X_test, y_test)
+    metrics.update({
+        "test_size": test_size, "n_train": int(len(y_train)), "search": search,
+        "best_params": {key: (value.item() if hasattr(value, "item") else value) for key, value in model.best_params_.items()},
+        "cv_best_score": float(model.best_score_), "train_r2": float(best.score(X_train, y_train)),
+        "n_candidates": int(len(model.cv_results_["params"])), "fit_seconds": fit_seconds,
+    })
+    return best, metrics
+
+
+def load_training_data(path=None, station=None):
+    import pandas as pd
+
+    from observations import DEFAULT_STATION, load_history
+
+    if path:
+        return pd.read_csv(path)
+    return load_history(stations=[station or DEFAULT_STATION]).reset_index(drop=True)
+
+
+# Tanggal observasi terakhir yang ikut data latih (CSV siap-model tanpa kolom tanggal: tidak diketahui)
+def trained_until(data):
+    from observations import DATE_COLUMN
+
+    if DATE_COLUMN not in data.columns or data.empty:
+        return None
+    return str(data[DATE_COLUMN].max().date())
+
+
+# Model stasiun default tetap di model/rfr_cuaca.pkl; stasiun lain model/rfr_cuaca_<stasiun>.pkl
+def default_output(station=None):
+    from observations import DEFAULT_STATION
+
+    if station is None or station == DEFAULT_STATION:
+        return MODEL_PATH
+    return os.path.splitext(MODEL_PATH)[0] + f"_{station}.pkl"
+
+
+def metrics_path_for(output):
+    if output == MODEL_PATH:
+        return METRICS_PATH
+    return os.path.splitext(output)[0] + "_metrics.json"
+
+
+# Pickle model (format jcopml seperti notebook) dan metrics.json di sebelahnya
+def save_outputs(model, output, selected, n_rows, splits):
+    from jcopml.utils import save_model
+
+    folder, file_name = os.path.split(output)
+    save_model(model, file_name, folder_name=folder or ".")
+    metrics_path = metrics_path_for(output)
+    with open(metrics_path, "w") as f:
+        json.dump({"model": output, "selected_split": selected, "n_rows": int(n_rows), "splits": splits}, f, indent=2)
+    return metrics_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latih ulang RandomForestRegressor suhu rata-rata (Tavg).")
+    parser.add_argument("--data", help="CSV siap-model (default: riwayat observasi di artifact store)")
+    parser.add_argument("--test-size", type=float, nargs="+", default=[0.3, 0.2],
+                        help="Satu/lebih rasio uji; model dari rasio pertama yang disimpan (default: 0.3 0.2)")
+    parser.add_argument("--search", choices=SEARCHES, default="grid")
+    parser.add_argument("--n-iter", type=int, default=20, help="Jumlah kandidat untuk --search random")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Proses paralel untuk pencarian (forest selalu n_jobs=1)")
+    parser.add_argument("--cache-dir", default=None, help="Direktori cache preprocessing (default: direktori sementara)")
+    parser.add_argument("--station", default=None, help="ID stasiun; riwayat stasiun ini dipakai dan modelnya diterbitkan untuk stasiun ini")
+    parser.add_argument("--output", default=None, help="Path pickle (default: model/rfr_cuaca.pkl atau model/rfr_cuaca_<stasiun>.pkl)")
+    parser.add_argument("--no-publish", action="store_true", help="Jangan terbitkan versi baru ke artifact store")
+    args = parser.parse_args(argv)
+
+    args.output = args.output or default_output(args.station)
+    data = load_training_data(args.data, args.station)
+    if data.empty:
+        sys.exit(f"Tidak ada riwayat observasi untuk stasiun '{args.station}'")
+    with tempfile.TemporaryDirectory(prefix="sambas-train-") as tmp_cache:
+        cache_dir = args.cache_dir or tmp_cache
+        results = {}
+        for test_size in args.test_size:
+            split_name = f"{round((1 - test_size) * 100)}:{round(test_size * 100)}"
+            model, metrics = train(data, test_size, args.search, args.n_jobs, cache_dir, args.n_iter)
+            results[split_name] = (model, metrics)
+            print(f"[{split_name}] {metrics['best_params']} | CV R2 {metrics['cv_best_score']:.4f} | "
+                  f"uji R2 {metrics['r2']:.4f} MAE {metrics['mae']:.4f} RMSE {metrics['rmse']:.4f} "
+                  f"({metrics['n_candidates']} kandidat, {metrics['fit_seconds']:.1f} detik)")
+
+    selected = next(iter(results))
+    model, metrics = results[selected]
+    metrics_path = save_outputs(model, args.output, selected, len(data),
+                                {name: split_metrics for name, (_, split_metrics) in results.items()})
+    print(f"Metrik ditulis ke {metrics_path}")
+
+    if not args.no_publish:
+        from artifact_store import publish_pipeline
+
+        version = publish_pipeline(model, source_path=args.output, metrics=metrics, station=args.station,
+                                   trained_until=trained_until(data))
+        print(f"Versi model aktif{f' untuk {args.station}' if args.station else ''}: {version}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import logging
+import os
+import threading
+import time
+
+from predictor import get_model
+
+logger = logging.getLogger("sambas.warmup")
+
+# SAMBAS_WARMUP=0 mematikan pemuatan awal di background
+WARMUP_ENABLED = os.environ.get("SAMBAS_WARMUP", "1") != "0"
+IMPORT_WAIT_SECONDS = 30
+
+_started = threading.Event()
+_imports_ready = threading.Event()
+
+
+def _warm_up():
+    started = time.perf_counter()
+    try:
+        import pandas  # noqa: F401
+        import plotly.graph_objects  # noqa: F401
+    finally:
+        _imports_ready.set()
+    try:
+        get_model()
+    except Exception:
+        logger.exception("Warm-up gagal; model akan dimuat saat halaman Prediksi dibuka")
+        return
+    logger.info("Warm-up selesai dalam %.2f detik", time.perf_counter() - started)
+
+
+# Memuat modul berat dan model di thread terpisah agar render halaman pertama tidak menunggu
+def start_warmup():
+    if not WARMUP_ENABLED:
+        return None
+    _started.set()
+    thread = threading.Thread(target=_warm_up, name="sambas-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# Dua thread yang mengimpor pandas bersamaan bisa mendapat modul setengah jadi,
+# jadi halaman menunggu impor warm-up selesai sebelum mengimpor modul berat sendiri
+def wait_for_imports(timeout=IMPORT_WAIT_SECONDS):
+    if _started.is_set():
+        _imports_ready.wait(timeout)